@@ -1,6 +1,7 @@
 """
 FINOVA — Personal Finance Agent
-Entry point: starts the Telegram bot, scheduler, and polling triggers.
+Entry point: starts the Telegram bot, scheduler, polling triggers and, when
+configured, the webhook endpoint.
 """
 
 import asyncio
@@ -9,10 +10,17 @@ import signal
 import sys
 
 from src.config import settings
-from src.database.models import init_db
+from src.database.crud import warm_classification_cache
+from src.database.models import AsyncSessionLocal, init_db
+from src.open_finance.client import client
+from src.reports.charts import shutdown_chart_pool
 from src.telegram.bot import build_application
+from src.telegram.dispatcher import dispatcher
+from src.telegram.outbox import outbox
 from src.scheduler.runner import start_scheduler
+from src.triggers.scheduler import build_watcher_scheduler
 from src.triggers.transaction_watcher import TransactionWatcher
+from src.triggers.webhook import WebhookServer
 from src.triggers.investment_watcher import InvestmentWatcher
 
 logging.basicConfig(
@@ -29,6 +37,8 @@ async def main() -> None:
     # Initialise database
     await init_db()
     logger.info("Database initialised.")
+    async with AsyncSessionLocal() as session:
+        await warm_classification_cache(session)
 
     # Build Telegram application
     app = build_application()
@@ -45,11 +55,16 @@ async def main() -> None:
         await app.start()
         await app.updater.start_polling(drop_pending_updates=True)
         logger.info("Telegram bot started (polling).")
+        dispatcher.start(app.bot)
 
         watcher_tasks = [
-            asyncio.create_task(tx_watcher.run(), name="tx_watcher"),
-            asyncio.create_task(inv_watcher.run(), name="inv_watcher"),
+            asyncio.create_task(build_watcher_scheduler(tx_watcher, inv_watcher).run(), name="watchers"),
+            asyncio.create_task(outbox.run(), name="outbox_worker"),
         ]
+        if settings.webhook_enabled:
+            # Pushed events sync just the named accounts through the same watcher
+            webhook = WebhookServer(tx_watcher.ingest)
+            watcher_tasks.append(asyncio.create_task(webhook.run(), name="webhook_server"))
 
         # Graceful shutdown on SIGINT / SIGTERM
         loop = asyncio.get_running_loop()
@@ -72,11 +87,15 @@ async def main() -> None:
         for task in watcher_tasks:
             task.cancel()
         await asyncio.gather(*watcher_tasks, return_exceptions=True)
+        await dispatcher.stop()
 
         scheduler.shutdown(wait=False)
         await app.updater.stop()
         await app.stop()
 
+    await client.aclose()
+    shutdown_chart_pool()
+
     logger.info("FINOVA stopped cleanly.")
 
 
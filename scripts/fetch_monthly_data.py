@@ -21,7 +21,7 @@ import asyncio
 import json
 import logging
 import sys
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from pathlib import Path
 
 # ---------------------------------------------------------------------------
@@ -36,11 +36,15 @@ from src.database.models import AsyncSessionLocal, init_db  # noqa: E402
 from src.database.crud import (  # noqa: E402
     get_all_accounts,
     get_all_investments,
-    insert_transaction,
-    upsert_account,
-    upsert_investment,
+    get_rollup_by_category,
+    get_rollup_totals,
+    insert_transactions_bulk,
+    upsert_accounts_bulk,
+    upsert_investments_bulk,
 )
 from src.open_finance.client import client  # noqa: E402
+from src.open_finance.transactions import iter_transaction_pages  # noqa: E402
+from src.reports.analytics import summarize_portfolio  # noqa: E402
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -111,8 +115,8 @@ async def fetch_and_store_accounts(session) -> dict:
                 "currency": item.get("currencyCode", "BRL"),
                 "last_updated": datetime.now(tz=timezone.utc),
             }
-            await upsert_account(session, record)
             accounts.append(record)
+        await upsert_accounts_bulk(session, accounts)
 
         logger.info("Fetched and stored %d account(s).", len(accounts))
         return {"error": False, "data": accounts}
@@ -133,8 +137,9 @@ async def fetch_and_store_transactions(
     label: str = "",
 ) -> dict:
     """
-    Fetch all transactions across every account for the given date range.
-    Deduplicates against the DB (insert_transaction skips existing IDs).
+    Fetch all transactions across every account for the given date range,
+    following every result page.
+    Each page is stored with one bulk insert that skips existing IDs.
     Returns the full list regardless of whether each was new or already known.
     """
     logger.info("Fetching transactions [%s] %s -> %s ...", label, from_date, to_date)
@@ -149,50 +154,46 @@ async def fetch_and_store_transactions(
 
         transactions = []
         for account_id in account_ids:
-            resp = await client.get(
-                "/transactions",
-                params={
-                    "accountId": account_id,
-                    "from": from_date,
-                    "to": to_date,
-                    "pageSize": 500,
-                },
-            )
-            for item in resp.get("results", []):
-                raw_amount = _safe_float(item.get("amount", 0))
-                # Pluggy returns DEBIT amounts as positive values with type=DEBIT.
-                # Convert debits to negative cents so the sign carries semantic meaning.
-                tx_type = (item.get("type") or "").upper()
-                amount_cents = _to_cents(raw_amount)
-                if tx_type == "DEBIT":
-                    amount_cents = -abs(amount_cents)
-                else:
-                    amount_cents = abs(amount_cents)
-
-                description = item.get("description", "")
-                merchant_raw = item.get("merchant")
-                merchant: str | None = None
-                if isinstance(merchant_raw, dict):
-                    merchant = merchant_raw.get("name") or None
-                elif isinstance(merchant_raw, str) and merchant_raw.strip():
-                    merchant = merchant_raw.strip()
-
-                category = classify_transaction(description, merchant)
-                ts = _parse_timestamp(item.get("date", item.get("timestamp", "")))
-
-                record = {
-                    "transaction_id": item["id"],
-                    "account_id": item.get("accountId", account_id),
-                    "amount_cents": amount_cents,
-                    "description": description,
-                    "merchant": merchant,
-                    "category": category,
-                    "timestamp": ts,
-                    "already_notified": False,
-                }
-                # insert_transaction is a no-op if transaction_id already exists
-                await insert_transaction(session, record)
-                transactions.append(record)
+            # Stream every page (Pluggy caps pageSize at 500) so busy
+            # accounts are not truncated after the first page.
+            async for results in iter_transaction_pages(account_id, from_date, to_date):
+                page_records = []
+                for item in results:
+                    raw_amount = _safe_float(item.get("amount", 0))
+                    # Pluggy returns DEBIT amounts as positive values with type=DEBIT.
+                    # Convert debits to negative cents so the sign carries semantic meaning.
+                    tx_type = (item.get("type") or "").upper()
+                    amount_cents = _to_cents(raw_amount)
+                    if tx_type == "DEBIT":
+                        amount_cents = -abs(amount_cents)
+                    else:
+                        amount_cents = abs(amount_cents)
+
+                    description = item.get("description", "")
+                    merchant_raw = item.get("merchant")
+                    merchant: str | None = None
+                    if isinstance(merchant_raw, dict):
+                        merchant = merchant_raw.get("name") or None
+                    elif isinstance(merchant_raw, str) and merchant_raw.strip():
+                        merchant = merchant_raw.strip()
+
+                    category = classify_transaction(description, merchant)
+                    ts = _parse_timestamp(item.get("date", item.get("timestamp", "")))
+
+                    record = {
+                        "transaction_id": item["id"],
+                        "account_id": item.get("accountId", account_id),
+                        "amount_cents": amount_cents,
+                        "description": description,
+                        "merchant": merchant,
+                        "category": category,
+                        "timestamp": ts,
+                        "already_notified": True,  # history import: never alerted
+                    }
+                    page_records.append(record)
+                # Existing transaction IDs are skipped by the bulk insert
+                await insert_transactions_bulk(session, page_records)
+                transactions.extend(page_records)
 
         logger.info(
             "Fetched %d transaction(s) [%s] across %d account(s).",
@@ -217,6 +218,7 @@ async def fetch_and_store_investments(session) -> dict:
     try:
         data = await client.get("/investments", params={"itemId": settings.pluggy_item_id})
         investments = []
+        db_records = []
         for item in data.get("results", []):
             quantity = _safe_float(item.get("quantity", 1) or 1, default=1.0)
             total_value_cents = _to_cents(item.get("value", item.get("balance", 0)))
@@ -263,16 +265,16 @@ async def fetch_and_store_investments(session) -> dict:
                 "last_month_rate": last_month_rate,
                 "subtype": item.get("subtype", ""),
             }
-            # upsert_investment only persists fields that match Investment columns;
-            # the extra keys are harmless (SQLAlchemy ignores unknown kwargs at the
-            # model constructor level — but to be safe we pass only model fields)
+            # upsert_investments_bulk writes every key as a column, so the
+            # report-only extras must be stripped before persisting
             db_record = {k: v for k, v in record.items() if k in {
                 "asset_id", "ticker", "name", "quantity",
                 "current_price_cents", "open_price_cents", "total_value_cents",
                 "daily_change_pct", "alert_triggered", "last_updated",
             }}
-            await upsert_investment(session, db_record)
+            db_records.append(db_record)
             investments.append(record)
+        await upsert_investments_bulk(session, db_records)
 
         logger.info("Fetched and stored %d investment position(s).", len(investments))
         return {"error": False, "data": investments}
@@ -299,19 +301,19 @@ def extract_income_records(transactions: list[dict]) -> list[dict]:
 # Summary stats helpers
 # ---------------------------------------------------------------------------
 
-def _summarise_transactions(transactions: list[dict]) -> dict:
-    total_debits = sum(t["amount_cents"] for t in transactions if t["amount_cents"] < 0)
-    total_credits = sum(t["amount_cents"] for t in transactions if t["amount_cents"] > 0)
-    by_category: dict[str, int] = {}
-    for tx in transactions:
-        cat = tx.get("category", "Other")
-        by_category[cat] = by_category.get(cat, 0) + tx["amount_cents"]
+async def _summarise_month(session, from_date: str, to_date: str) -> dict:
+    """Month totals from the daily_rollups table instead of the raw rows."""
+    start, end = date.fromisoformat(from_date), date.fromisoformat(to_date)
+    totals = await get_rollup_totals(session, start, end)
+    by_category = await get_rollup_by_category(session, start, end)
     return {
-        "count": len(transactions),
-        "total_debits_cents": total_debits,
-        "total_credits_cents": total_credits,
-        "net_cents": total_credits + total_debits,  # debits are negative
-        "by_category_cents": by_category,
+        "count": totals["count"],
+        "total_debits_cents": -totals["spent_cents"],
+        "total_credits_cents": totals["received_cents"],
+        "net_cents": totals["received_cents"] - totals["spent_cents"],
+        "by_category_cents": {
+            cat: sums["received_cents"] - sums["spent_cents"] for cat, sums in by_category.items()
+        },
     }
 
 
@@ -325,28 +327,36 @@ async def run() -> dict:
     # Initialise DB schema if it does not yet exist
     await init_db()
 
-    async with AsyncSessionLocal() as session:
-        # 1. Current account balances
-        accounts_result = await fetch_and_store_accounts(session)
+    try:
+        async with AsyncSessionLocal() as session:
+            # 1. Current account balances
+            accounts_result = await fetch_and_store_accounts(session)
+
+            # 2. January 2026 transactions (report month)
+            jan_result = await fetch_and_store_transactions(
+                session,
+                from_date=REPORT_MONTH_FROM,
+                to_date=REPORT_MONTH_TO,
+                label="Jan-2026",
+            )
 
-        # 2. January 2026 transactions (report month)
-        jan_result = await fetch_and_store_transactions(
-            session,
-            from_date=REPORT_MONTH_FROM,
-            to_date=REPORT_MONTH_TO,
-            label="Jan-2026",
-        )
+            # 3. Investment portfolio
+            investments_result = await fetch_and_store_investments(session)
 
-        # 3. Investment portfolio
-        investments_result = await fetch_and_store_investments(session)
+            # 4. December 2025 transactions (prior month for MoM comparison)
+            dec_result = await fetch_and_store_transactions(
+                session,
+                from_date=PRIOR_MONTH_FROM,
+                to_date=PRIOR_MONTH_TO,
+                label="Dec-2025",
+            )
 
-        # 4. December 2025 transactions (prior month for MoM comparison)
-        dec_result = await fetch_and_store_transactions(
-            session,
-            from_date=PRIOR_MONTH_FROM,
-            to_date=PRIOR_MONTH_TO,
-            label="Dec-2025",
-        )
+            # Summaries for both months come from the incrementally maintained rollups
+            jan_summary = await _summarise_month(session, REPORT_MONTH_FROM, REPORT_MONTH_TO)
+            dec_summary = await _summarise_month(session, PRIOR_MONTH_FROM, PRIOR_MONTH_TO)
+    finally:
+        # Pooled connections and the token refresher belong to this event loop
+        await client.aclose()
 
     # 5. Income records — derived from January transactions
     jan_transactions = jan_result["data"] if not jan_result.get("error") else []
@@ -355,9 +365,7 @@ async def run() -> dict:
     # -------------------------------------------------------------------
     # Build structured payload for report-builder
     # -------------------------------------------------------------------
-    jan_summary = _summarise_transactions(jan_transactions)
     dec_transactions = dec_result["data"] if not dec_result.get("error") else []
-    dec_summary = _summarise_transactions(dec_transactions)
 
     # Month-over-month deltas
     mom_spend_delta_cents = (
@@ -369,9 +377,10 @@ async def run() -> dict:
 
     # Investment totals
     investments = investments_result["data"] if not investments_result.get("error") else []
-    portfolio_total_value_cents = sum(i["total_value_cents"] for i in investments)
-    portfolio_total_invested_cents = sum(i.get("invested_cents", 0) for i in investments)
-    portfolio_total_gain_cents = sum(i.get("gain_cents", 0) for i in investments)
+    portfolio = summarize_portfolio(investments)
+    portfolio_total_value_cents = portfolio["total_value_cents"]
+    portfolio_total_invested_cents = portfolio["invested_cents"]
+    portfolio_total_gain_cents = portfolio["pnl_cents"]
     alerted_investments = [i for i in investments if i.get("alert_triggered")]
 
     # Account balances total
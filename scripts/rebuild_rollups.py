@@ -0,0 +1,44 @@
+"""
+scripts/rebuild_rollups.py
+
+Recomputes the daily_rollups table from the raw transactions ledger.
+Run it once on databases that predate the table (init_db also does this
+automatically when it first creates daily_rollups), or after bulk edits to
+transactions made outside the CRUD helpers.
+
+Usage (from project root, with venv active):
+    python -m scripts.rebuild_rollups
+"""
+
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# Ensure project root is on sys.path when run as a script
+# ---------------------------------------------------------------------------
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from src.database.crud import rebuild_daily_rollups  # noqa: E402
+from src.database.models import AsyncSessionLocal, init_db  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger("rebuild-rollups")
+
+
+async def run() -> int:
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        count = await rebuild_daily_rollups(session)
+    logger.info("daily_rollups now holds %d row(s).", count)
+    return count
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,53 @@
+"""
+scripts/reclassify.py
+
+Re-runs category classification over the whole transactions ledger, e.g.
+after editing CATEGORY_KEYWORDS in src/config.py. Only rows whose category
+changed are written, and daily_rollups is rebuilt afterwards.
+
+Repeated descriptions are served from the classification cache, which is
+warmed from (and saved back to) the classification_cache table.
+
+Usage (from project root, with venv active):
+    python -m scripts.reclassify
+"""
+
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# Ensure project root is on sys.path when run as a script
+# ---------------------------------------------------------------------------
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+from src.config import classification_cache, classify_many  # noqa: E402
+from src.database.crud import (  # noqa: E402
+    persist_classification_cache,
+    reclassify_transactions,
+    warm_classification_cache,
+)
+from src.database.models import AsyncSessionLocal, init_db  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+)
+logger = logging.getLogger("reclassify")
+
+
+async def run() -> int:
+    await init_db()
+    async with AsyncSessionLocal() as session:
+        await warm_classification_cache(session)
+        changed = await reclassify_transactions(session, classify_many)
+        await persist_classification_cache(session)
+    logger.info("Done — %d transaction(s) changed category. Cache: %s", changed, classification_cache.stats())
+    return changed
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
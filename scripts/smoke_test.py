@@ -128,16 +128,22 @@ async def send_telegram_summary(accounts: list, transactions: list, investments:
 
 
 async def main() -> None:
+    from src.open_finance.client import client
+
     print(f"\n{SEPARATOR}")
     print("  FINOVA — Smoke Test")
     print(f"{SEPARATOR}\n")
 
-    accounts = await test_accounts()
-    print()
-    transactions = await test_transactions()
-    print()
-    investments = await test_investments()
-    print()
+    try:
+        accounts = await test_accounts()
+        print()
+        transactions = await test_transactions()
+        print()
+        investments = await test_investments()
+        print()
+    finally:
+        # Fecha as conexões HTTP/2 e o renovador de token antes do loop terminar
+        await client.aclose()
 
     if accounts or transactions or investments:
         await send_telegram_summary(accounts, transactions, investments)
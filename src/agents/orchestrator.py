@@ -9,10 +9,8 @@ from telegram.ext import ContextTypes
 
 from src.database.crud import get_all_accounts, get_all_investments, get_transactions_since
 from src.database.models import AsyncSessionLocal
-from src.open_finance.accounts import fetch_accounts
-from src.open_finance.investments import fetch_investments
-from src.open_finance.transactions import fetch_transactions
-from src.database.crud import upsert_account, upsert_investment, insert_transaction
+from src.open_finance.coordinator import coordinator
+from src.database.crud import upsert_accounts_bulk, upsert_investments_bulk
 from src.telegram.formatter import fmt_accounts, fmt_investments, fmt_transactions
 from src.reports.daily import build_daily_summary
 from src.reports.monthly import build_monthly_report
@@ -30,15 +28,14 @@ async def handle_intent(
 ) -> None:
     chat_id = update.effective_chat.id
     try:
-        message, photo_path = await _resolve(intent, user_text)
-        if photo_path:
-            with open(photo_path, "rb") as f:
-                await context.bot.send_photo(
-                    chat_id=chat_id,
-                    photo=f,
-                    caption=message,
-                    parse_mode="Markdown",
-                )
+        message, photo = await _resolve(intent, user_text)
+        if photo:
+            await context.bot.send_photo(
+                chat_id=chat_id,
+                photo=photo,
+                caption=message,
+                parse_mode="Markdown",
+            )
         else:
             await update.message.reply_text(message, parse_mode="Markdown")
     except Exception as exc:
@@ -49,32 +46,27 @@ async def handle_intent(
         )
 
 
-async def _resolve(intent: str, user_text: str) -> tuple[str, str | None]:
+async def _resolve(intent: str, user_text: str) -> tuple[str, bytes | None]:
     if intent == "saldo":
-        result = await fetch_accounts()
+        result = await coordinator.accounts()
         async with AsyncSessionLocal() as session:
             if not result["error"]:
-                for a in result["data"]:
-                    await upsert_account(session, a)
+                await upsert_accounts_bulk(session, result["data"])
             accounts = await get_all_accounts(session)
         return fmt_accounts(accounts), None
 
     if intent == "extrato":
-        result = await fetch_transactions(days=7)
+        await coordinator.sync_transactions(days=7)
         async with AsyncSessionLocal() as session:
-            if not result["error"]:
-                for t in result["data"]:
-                    await insert_transaction(session, t)
             since = datetime.now(tz=timezone.utc) - timedelta(days=7)
             transactions = await get_transactions_since(session, since)
         return fmt_transactions(transactions, title="Extrato — últimos 7 dias"), None
 
     if intent == "carteira":
-        result = await fetch_investments()
+        result = await coordinator.investments()
         async with AsyncSessionLocal() as session:
             if not result["error"]:
-                for i in result["data"]:
-                    await upsert_investment(session, i)
+                await upsert_investments_bulk(session, result["data"])
             investments = await get_all_investments(session)
         return fmt_investments(investments), None
 
@@ -0,0 +1,187 @@
+"""
+Keyword-based transaction classifier compiled into an Aho-Corasick automaton.
+
+Every keyword of every category is matched in a single pass over the text,
+so cost grows with the length of the description rather than with the number
+of rules. Semantics match a plain substring search: the first category (in
+rule order) with any keyword contained in the text wins.
+Text and keywords are lowercased and accent-folded ("Farmácia" → "farmacia").
+
+`ClassificationCache` puts a bounded LRU in front of the classifier, keyed by
+the normalized text, and can be warmed from / drained to persistent storage.
+Persisted entries are tagged with `rules_hash` so a rule change invalidates them.
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+
+DEFAULT_CATEGORY = "Other"
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip diacritics."""
+    text = text.lower()
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class KeywordClassifier:
+    def __init__(self, rules: dict[str, list[str]], default: str = DEFAULT_CATEGORY) -> None:
+        self._categories = list(rules)
+        self._default = default
+        # Rule order matters (first category wins), so it is part of the hash
+        serialized = json.dumps([[category, list(keywords)] for category, keywords in rules.items()])
+        self.rules_hash = hashlib.sha256(serialized.encode()).hexdigest()[:16]
+        folded = [fold(keyword) for keywords in rules.values() for keyword in keywords if keyword]
+        # Keywords that can match on digits, e.g. "99" (the ride app)
+        self.digit_keywords = tuple(kw for kw in folded if any(ch.isdigit() for ch in kw))
+        self.matches_hash = any("#" in kw for kw in folded)
+        self._no_match = len(self._categories)
+
+        # Trie: per-node transitions, failure link and the best (lowest)
+        # category rank reachable by a keyword ending at that node.
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._rank: list[int] = [self._no_match]
+
+        for rank, keywords in enumerate(rules.values()):
+            for keyword in keywords:
+                if keyword:
+                    self._add(fold(keyword), rank)
+        self._link()
+
+    def _add(self, keyword: str, rank: int) -> None:
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._rank.append(self._no_match)
+            node = nxt
+        self._rank[node] = min(self._rank[node], rank)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(ch, 0)
+                # A node also "matches" every keyword that is a suffix of it
+                self._rank[child] = min(self._rank[child], self._rank[self._fail[child]])
+                queue.append(child)
+
+    def classify_text(self, text: str) -> str:
+        goto, fail, ranks = self._goto, self._fail, self._rank
+        best = self._no_match
+        state = 0
+        for ch in fold(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if ranks[state] < best:
+                best = ranks[state]
+                if best == 0:
+                    break
+        return self._categories[best] if best < self._no_match else self._default
+
+    def classify(self, description: str, merchant: str | None = None) -> str:
+        return self.classify_text(f"{description} {merchant or ''}")
+
+    def classify_many(self, items: Iterable[tuple[str, str | None]]) -> list[str]:
+        """Classify (description, merchant) pairs in one call."""
+        return [self.classify(description, merchant) for description, merchant in items]
+
+
+_DIGITS = re.compile(r"\d+")
+
+
+def _occurrences(text: str, keyword: str) -> Iterable[int]:
+    """Start offsets of every (possibly overlapping) occurrence of `keyword`."""
+    start = text.find(keyword)
+    while start != -1:
+        yield start
+        start = text.find(keyword, start + 1)
+
+
+class ClassificationCache:
+    def __init__(self, classifier: KeywordClassifier, maxsize: int = 10_000) -> None:
+        self._classifier = classifier
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._unsaved: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def rules_hash(self) -> str:
+        return self._classifier.rules_hash
+
+    def key(self, description: str, merchant: str | None = None) -> str:
+        text = " ".join(fold(f"{description} {merchant or ''}").split())
+        # Order/card numbers make every "IFOOD *1234" unique. A digit run is
+        # masked unless a digit keyword matches across it ("99" in "99 pop"),
+        # so masking never changes the category.
+        if self._classifier.matches_hash:
+            return text
+        keep = [
+            (start, start + len(keyword))
+            for keyword in self._classifier.digit_keywords
+            for start in _occurrences(text, keyword)
+        ]
+        return _DIGITS.sub(
+            lambda m: m.group() if any(s < m.end() and m.start() < e for s, e in keep) else "#",
+            text,
+        )
+
+    def classify(self, description: str, merchant: str | None = None) -> str:
+        key = self.key(description, merchant)
+        category = self._entries.get(key)
+        if category is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return category
+        self.misses += 1
+        category = self._classifier.classify_text(key)
+        self._store(key, category)
+        if len(self._unsaved) < self._maxsize:
+            self._unsaved[key] = category
+        return category
+
+    def classify_many(self, items: Iterable[tuple[str, str | None]]) -> list[str]:
+        return [self.classify(description, merchant) for description, merchant in items]
+
+    def _store(self, key: str, category: str) -> None:
+        self._entries[key] = category
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def load(self, entries: dict[str, str]) -> None:
+        """Warm the cache with persisted entries computed under the current rules."""
+        for key, category in entries.items():
+            self._store(key, category)
+
+    def drain_unsaved(self) -> dict[str, str]:
+        """Entries computed since the last drain, for persisting."""
+        unsaved, self._unsaved = self._unsaved, {}
+        return unsaved
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._unsaved.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
@@ -4,11 +4,14 @@ All other modules import `settings` from here.
 """
 
 import os
+from collections.abc import Iterable
 from dataclasses import dataclass, field
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
 
+from src.classifier import ClassificationCache, KeywordClassifier
+
 load_dotenv()
 
 
@@ -44,11 +47,164 @@ class Settings:
     poll_interval_seconds: int = field(
         default_factory=lambda: int(os.getenv("POLL_INTERVAL_SECONDS", "300"))
     )
+    # Adaptive polling: faster after a change, slower when idle or in quiet hours
+    poll_min_interval_seconds: int = field(
+        default_factory=lambda: int(os.getenv("POLL_MIN_INTERVAL_SECONDS", "60"))
+    )
+    poll_max_interval_seconds: int = field(
+        default_factory=lambda: int(os.getenv("POLL_MAX_INTERVAL_SECONDS", "1800"))
+    )
+    poll_jitter_fraction: float = field(
+        default_factory=lambda: float(os.getenv("POLL_JITTER_FRACTION", "0.1"))
+    )
+    # Local-time windows, "HH:MM-HH:MM" (may wrap past midnight)
+    quiet_hours: str = field(
+        default_factory=lambda: os.getenv("QUIET_HOURS", "00:00-07:00")
+    )
+    # Investments are polled only inside this window on weekdays
+    market_hours: str = field(
+        default_factory=lambda: os.getenv("MARKET_HOURS", "10:00-18:00")
+    )
+
+    # Pluggy webhook ingestion — off unless a shared secret is set
+    webhook_secret: str = field(default_factory=lambda: os.getenv("WEBHOOK_SECRET", ""))
+    webhook_host: str = field(default_factory=lambda: os.getenv("WEBHOOK_HOST", "0.0.0.0"))
+    webhook_port: int = field(default_factory=lambda: int(os.getenv("WEBHOOK_PORT", "8080")))
+    webhook_path: str = field(default_factory=lambda: os.getenv("WEBHOOK_PATH", "/webhooks/pluggy"))
+    # Transaction polling becomes a safety net while webhooks are on
+    webhook_safety_poll_seconds: int = field(
+        default_factory=lambda: int(os.getenv("WEBHOOK_SAFETY_POLL_SECONDS", "1800"))
+    )
+
+    # Pluggy dates are whole days and banks post late with earlier dates,
+    # so re-read at least a full day behind the watermark
+    sync_overlap_minutes: int = field(
+        default_factory=lambda: int(os.getenv("SYNC_OVERLAP_MINUTES", "1440"))
+    )
+    classification_cache_size: int = field(
+        default_factory=lambda: int(os.getenv("CLASSIFICATION_CACHE_SIZE", "10000"))
+    )
+    fetch_cache_ttl_seconds: int = field(
+        default_factory=lambda: int(os.getenv("FETCH_CACHE_TTL_SECONDS", "60"))
+    )
+    account_list_ttl_seconds: int = field(
+        default_factory=lambda: int(os.getenv("ACCOUNT_LIST_TTL_SECONDS", "3600"))
+    )
+    fetch_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("FETCH_CONCURRENCY", "4"))
+    )
+
+    # Access token lifecycle (Open Finance client)
+    token_refresh_margin_seconds: int = field(
+        default_factory=lambda: int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+    )
+    token_default_ttl_seconds: int = field(
+        default_factory=lambda: int(os.getenv("TOKEN_DEFAULT_TTL_SECONDS", "7200"))
+    )
+
+    # Outbound Telegram queue
+    telegram_global_rate: float = field(
+        default_factory=lambda: float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))
+    )
+    telegram_chat_rate: float = field(
+        default_factory=lambda: float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+    )
+    telegram_coalesce_window_seconds: float = field(
+        default_factory=lambda: float(os.getenv("TELEGRAM_COALESCE_WINDOW_SECONDS", "2"))
+    )
+    telegram_send_retries: int = field(
+        default_factory=lambda: int(os.getenv("TELEGRAM_SEND_RETRIES", "3"))
+    )
+
+    # Notification outbox worker
+    outbox_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+    )
+    outbox_lease_seconds: int = field(
+        default_factory=lambda: int(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+    )
+    outbox_poll_seconds: int = field(
+        default_factory=lambda: int(os.getenv("OUTBOX_POLL_SECONDS", "30"))
+    )
+    outbox_max_attempts: int = field(
+        default_factory=lambda: int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    )
+
+    # Chart rendering worker processes
+    chart_workers: int = field(
+        default_factory=lambda: int(os.getenv("CHART_WORKERS", "1"))
+    )
+    chart_max_concurrent_renders: int = field(
+        default_factory=lambda: int(os.getenv("CHART_MAX_CONCURRENT_RENDERS", "2"))
+    )
+    chart_render_timeout_seconds: float = field(
+        default_factory=lambda: float(os.getenv("CHART_RENDER_TIMEOUT_SECONDS", "30"))
+    )
+    chart_cache_size: int = field(
+        default_factory=lambda: int(os.getenv("CHART_CACHE_SIZE", "32"))
+    )
+
+    # Investment price history: keep raw polls this long, then hourly, then daily
+    snapshot_hourly_after_hours: int = field(
+        default_factory=lambda: int(os.getenv("SNAPSHOT_HOURLY_AFTER_HOURS", "24"))
+    )
+    snapshot_daily_after_days: int = field(
+        default_factory=lambda: int(os.getenv("SNAPSHOT_DAILY_AFTER_DAYS", "30"))
+    )
+
+    # Retries, rate limiting and circuit breaker (Open Finance client)
+    http_max_retries: int = field(
+        default_factory=lambda: int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    )
+    http_backoff_base_seconds: float = field(
+        default_factory=lambda: float(os.getenv("HTTP_BACKOFF_BASE_SECONDS", "0.5"))
+    )
+    http_backoff_max_seconds: float = field(
+        default_factory=lambda: float(os.getenv("HTTP_BACKOFF_MAX_SECONDS", "30"))
+    )
+    api_rate_limit_per_second: float = field(
+        default_factory=lambda: float(os.getenv("API_RATE_LIMIT_PER_SECOND", "5"))
+    )
+    api_rate_limit_burst: int = field(
+        default_factory=lambda: int(os.getenv("API_RATE_LIMIT_BURST", "10"))
+    )
+    circuit_failure_threshold: int = field(
+        default_factory=lambda: int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    )
+    circuit_reset_seconds: int = field(
+        default_factory=lambda: int(os.getenv("CIRCUIT_RESET_SECONDS", "300"))
+    )
+
+    # Conditional-request cache for /accounts and /investments ("" = memory only)
+    http_cache_dir: str = field(
+        default_factory=lambda: os.getenv("HTTP_CACHE_DIR", "")
+    )
+
+    # HTTP connection pool (Open Finance client)
+    http_max_connections: int = field(
+        default_factory=lambda: int(os.getenv("HTTP_MAX_CONNECTIONS", "10"))
+    )
+    http_max_keepalive_connections: int = field(
+        default_factory=lambda: int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "5"))
+    )
+    http_keepalive_expiry: float = field(
+        default_factory=lambda: float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    )
 
     # Database
     database_url: str = field(
         default_factory=lambda: os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./data/finova.db")
     )
+    sqlite_cache_size_kb: int = field(
+        default_factory=lambda: int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))
+    )
+    sqlite_mmap_size_bytes: int = field(
+        default_factory=lambda: int(os.getenv("SQLITE_MMAP_SIZE_BYTES", str(256 * 1024 * 1024)))
+    )
+
+    @property
+    def webhook_enabled(self) -> bool:
+        return bool(self.webhook_secret)
 
     @property
     def tz(self) -> ZoneInfo:
@@ -106,9 +262,14 @@ CATEGORY_KEYWORDS: dict[str, list[str]] = {
 }
 
 
+# Compiled once; first matching category (in the order above) wins
+_classifier = KeywordClassifier(CATEGORY_KEYWORDS)
+classification_cache = ClassificationCache(_classifier, maxsize=settings.classification_cache_size)
+
+
 def classify_transaction(description: str, merchant: str | None = None) -> str:
-    text = f"{description} {merchant or ''}".lower()
-    for category, keywords in CATEGORY_KEYWORDS.items():
-        if any(kw in text for kw in keywords):
-            return category
-    return "Other"
+    return classification_cache.classify(description, merchant)
+
+
+def classify_many(items: Iterable[tuple[str, str | None]]) -> list[str]:
+    return classification_cache.classify_many(items)
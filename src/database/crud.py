@@ -1,18 +1,81 @@
 """
 CRUD helpers for the local SQLite database.
 All functions are async and accept an AsyncSession.
+
+The `*_bulk` variants write a whole batch with one INSERT ... ON CONFLICT
+statement per chunk and a single commit; prefer them over the per-row helpers
+when storing API results. Upserts only rewrite rows whose values actually
+changed, so re-storing an identical poll touches no pages.
 """
 
 import logging
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import select
+from sqlalchemy import case, delete, func, literal_column, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.models import Account, Investment, Transaction
+from src.config import classification_cache, settings
+from src.database.models import (
+    Account,
+    ClassificationCacheEntry,
+    DailyRollup,
+    Investment,
+    InvestmentSnapshot,
+    NotificationOutbox,
+    SyncCursor,
+    Transaction,
+)
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT statement — keeps bound parameters well under SQLite's limit
+BULK_CHUNK_SIZE = 500
+
+# Refreshed on every fetch; a difference here alone is not a change
+_VOLATILE_COLUMNS = frozenset({"last_updated"})
+
+
+def _chunks(rows: list[dict]) -> Iterable[list[dict]]:
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        yield rows[start:start + BULK_CHUNK_SIZE]
+
+
+async def _existing_ids(session: AsyncSession, column, ids: list[str]) -> set[str]:
+    existing: set[str] = set()
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        result = await session.execute(select(column).where(column.in_(ids[start:start + BULK_CHUNK_SIZE])))
+        existing.update(result.scalars().all())
+    return existing
+
+
+async def _upsert_bulk(session: AsyncSession, model, key: str, rows: list[dict]) -> list[str]:
+    """
+    Insert or update `rows` keyed by `key`; returns the keys that were new.
+    Existing rows are only rewritten when a non-volatile column differs.
+    """
+    if not rows:
+        return []
+    column = getattr(model, key)
+    ids = [row[key] for row in rows]
+    existing = await _existing_ids(session, column, ids)
+    written = 0
+    for chunk in _chunks(rows):
+        stmt = insert(model).values(chunk)
+        columns = [name for name in chunk[0] if name != key]
+        compared = [name for name in columns if name not in _VOLATILE_COLUMNS]
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={name: stmt.excluded[name] for name in columns},
+            where=or_(*(getattr(model, name).is_distinct_from(stmt.excluded[name]) for name in compared))
+            if compared else None,
+        ).returning(column)
+        written += len((await session.execute(stmt)).all())
+    await session.commit()
+    logger.debug("%s upsert: %d of %d rows written.", model.__tablename__, written, len(rows))
+    return list(dict.fromkeys(i for i in ids if i not in existing))
+
 
 # ── Accounts ─────────────────────────────────────────────────────────────────
 
@@ -29,6 +92,10 @@ async def upsert_account(session: AsyncSession, data: dict) -> Account:
     return result
 
 
+async def upsert_accounts_bulk(session: AsyncSession, rows: list[dict]) -> list[str]:
+    return await _upsert_bulk(session, Account, "account_id", rows)
+
+
 async def get_all_accounts(session: AsyncSession) -> list[Account]:
     result = await session.execute(select(Account))
     return list(result.scalars().all())
@@ -47,11 +114,45 @@ async def insert_transaction(session: AsyncSession, data: dict) -> Transaction |
         return None
     tx = Transaction(**data)
     session.add(tx)
+    await _add_to_rollups(session, [data])
     await session.commit()
     await session.refresh(tx)
     return tx
 
 
+async def insert_transactions_bulk(session: AsyncSession, rows: list[dict]) -> list[str]:
+    """Insert new transactions, skipping known IDs. Returns the inserted IDs."""
+    inserted: list[str] = []
+    for chunk in _chunks(rows):
+        result = await session.execute(
+            insert(Transaction)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=["transaction_id"])
+            .returning(Transaction.transaction_id)
+        )
+        new_ids = set(result.scalars().all())
+        new_rows = []
+        for row in chunk:
+            # First occurrence of a duplicated ID is the one that was stored
+            if row["transaction_id"] in new_ids:
+                new_ids.discard(row["transaction_id"])
+                new_rows.append(row)
+        await _add_to_rollups(session, new_rows)
+        inserted.extend(row["transaction_id"] for row in new_rows)
+    await session.commit()
+    return inserted
+
+
+async def get_transactions_by_ids(session: AsyncSession, transaction_ids: list[str]) -> list[Transaction]:
+    transactions: list[Transaction] = []
+    for start in range(0, len(transaction_ids), BULK_CHUNK_SIZE):
+        result = await session.execute(
+            select(Transaction).where(Transaction.transaction_id.in_(transaction_ids[start:start + BULK_CHUNK_SIZE]))
+        )
+        transactions.extend(result.scalars().all())
+    return sorted(transactions, key=lambda tx: tx.timestamp)
+
+
 async def mark_transaction_notified(session: AsyncSession, transaction_id: str) -> None:
     tx = await session.get(Transaction, transaction_id)
     if tx:
@@ -59,10 +160,37 @@ async def mark_transaction_notified(session: AsyncSession, transaction_id: str)
         await session.commit()
 
 
-async def get_unnotified_transactions(session: AsyncSession) -> list[Transaction]:
-    result = await session.execute(
-        select(Transaction).where(Transaction.already_notified.is_(False))
-    )
+async def _flag_notified(session: AsyncSession, transaction_ids: list[str]) -> int:
+    updated = 0
+    for start in range(0, len(transaction_ids), BULK_CHUNK_SIZE):
+        result = await session.execute(
+            update(Transaction)
+            .where(Transaction.transaction_id.in_(transaction_ids[start:start + BULK_CHUNK_SIZE]))
+            .values(already_notified=True)
+        )
+        updated += result.rowcount
+    return updated
+
+
+async def mark_transactions_notified(session: AsyncSession, transaction_ids: list[str]) -> int:
+    """Flag a batch as notified with one UPDATE per chunk and a single commit."""
+    updated = await _flag_notified(session, transaction_ids)
+    await session.commit()
+    return updated
+
+
+async def get_unnotified_transactions(
+    session: AsyncSession,
+    since: datetime | None = None,
+    min_abs_cents: int = 0,
+) -> list[Transaction]:
+    # `== False` renders as `already_notified = 0`, the partial index's predicate
+    stmt = select(Transaction).where(Transaction.already_notified == False)  # noqa: E712
+    if since is not None:
+        stmt = stmt.where(Transaction.timestamp >= since)
+    if min_abs_cents:
+        stmt = stmt.where(func.abs(Transaction.amount_cents) >= min_abs_cents)
+    result = await session.execute(stmt.order_by(Transaction.timestamp))
     return list(result.scalars().all())
 
 
@@ -73,6 +201,274 @@ async def get_transactions_since(session: AsyncSession, since: datetime) -> list
     return list(result.scalars().all())
 
 
+# ── Aggregations ─────────────────────────────────────────────────────────────
+# Computed inside SQLite so reports never materialize the underlying rows.
+
+async def get_transaction_totals(session: AsyncSession, since: datetime) -> dict[str, int]:
+    """Count, total spent (positive cents) and total received since `since`."""
+    result = await session.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(case((Transaction.amount_cents < 0, -Transaction.amount_cents), else_=0)), 0),
+            func.coalesce(func.sum(case((Transaction.amount_cents > 0, Transaction.amount_cents), else_=0)), 0),
+        ).where(Transaction.timestamp >= since)
+    )
+    count, spent, received = result.one()
+    return {"count": count, "spent_cents": spent, "received_cents": received}
+
+
+async def get_spending_by_category(session: AsyncSession, since: datetime) -> dict[str, int]:
+    """Debits since `since` grouped by category, as positive cents."""
+    result = await session.execute(
+        select(Transaction.category, func.sum(-Transaction.amount_cents))
+        .where(Transaction.timestamp >= since, Transaction.amount_cents < 0)
+        .group_by(Transaction.category)
+    )
+    return {category: total for category, total in result.all()}
+
+
+# ── Daily rollups ────────────────────────────────────────────────────────────
+# daily_rollups is kept in step with the ledger by the insert helpers above,
+# inside the same transaction as the rows it summarizes.
+
+async def _add_to_rollups(session: AsyncSession, rows: list[dict]) -> None:
+    deltas: dict[tuple, list[int]] = {}
+    for row in rows:
+        amount = row["amount_cents"]
+        # Same wall-clock date SQLite's date() sees on the stored timestamp
+        key = (row["timestamp"].date(), row["account_id"], row.get("category") or "Other")
+        delta = deltas.setdefault(key, [0, 0, 0, 0])
+        if amount < 0:
+            delta[0] += -amount
+            delta[2] += 1
+        else:
+            delta[1] += amount
+            delta[3] += 1
+    if not deltas:
+        return
+
+    values = [
+        {
+            "day": day, "account_id": account_id, "category": category,
+            "debit_cents": d[0], "credit_cents": d[1], "debit_count": d[2], "credit_count": d[3],
+        }
+        for (day, account_id, category), d in deltas.items()
+    ]
+    for chunk in _chunks(values):
+        stmt = insert(DailyRollup).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "account_id", "category"],
+            set_={
+                name: getattr(DailyRollup, name) + stmt.excluded[name]
+                for name in ("debit_cents", "credit_cents", "debit_count", "credit_count")
+            },
+        )
+        await session.execute(stmt)
+
+
+async def rebuild_daily_rollups(session: AsyncSession) -> int:
+    """Recompute daily_rollups from the raw ledger. Returns the row count."""
+    debit = Transaction.amount_cents < 0
+    credit = Transaction.amount_cents >= 0  # zero-amount rows count as credits
+    day = func.date(Transaction.timestamp)
+    summary = (
+        select(
+            day,
+            Transaction.account_id,
+            Transaction.category,
+            func.sum(case((debit, -Transaction.amount_cents), else_=0)),
+            func.sum(case((credit, Transaction.amount_cents), else_=0)),
+            func.sum(case((debit, 1), else_=0)),
+            func.sum(case((credit, 1), else_=0)),
+        )
+        .group_by(day, Transaction.account_id, Transaction.category)
+    )
+    await session.execute(delete(DailyRollup))
+    await session.execute(
+        insert(DailyRollup).from_select(
+            ["day", "account_id", "category", "debit_cents", "credit_cents", "debit_count", "credit_count"],
+            summary,
+        )
+    )
+    await session.commit()
+    count = (await session.execute(select(func.count()).select_from(DailyRollup))).scalar_one()
+    logger.info("Rebuilt daily rollups: %d row(s).", count)
+    return count
+
+
+def _rollup_range(stmt, start: date, end: date | None):
+    stmt = stmt.where(DailyRollup.day >= start)
+    return stmt if end is None else stmt.where(DailyRollup.day <= end)
+
+
+async def get_rollup_totals(session: AsyncSession, start: date, end: date | None = None) -> dict[str, int]:
+    """Same shape as get_transaction_totals, for whole days in [start, end]."""
+    result = await session.execute(_rollup_range(
+        select(
+            func.coalesce(func.sum(DailyRollup.debit_count + DailyRollup.credit_count), 0),
+            func.coalesce(func.sum(DailyRollup.debit_cents), 0),
+            func.coalesce(func.sum(DailyRollup.credit_cents), 0),
+        ),
+        start, end,
+    ))
+    count, spent, received = result.one()
+    return {"count": count, "spent_cents": spent, "received_cents": received}
+
+
+async def get_rollup_by_category(
+    session: AsyncSession, start: date, end: date | None = None
+) -> dict[str, dict[str, int]]:
+    """Spent/received cents per category for whole days in [start, end]."""
+    result = await session.execute(_rollup_range(
+        select(DailyRollup.category, func.sum(DailyRollup.debit_cents), func.sum(DailyRollup.credit_cents))
+        .group_by(DailyRollup.category),
+        start, end,
+    ))
+    return {
+        category: {"spent_cents": spent, "received_cents": received}
+        for category, spent, received in result.all()
+    }
+
+
+# ── Classification cache ─────────────────────────────────────────────────────
+# Rows are pruned and loaded newest first by SQLite's implicit rowid.
+
+_ROWID = literal_column("rowid")
+
+
+async def load_classification_cache(session: AsyncSession, rules_hash: str, limit: int) -> dict[str, str]:
+    """Drop entries computed under other rules and return up to `limit` of the rest."""
+    await session.execute(
+        delete(ClassificationCacheEntry).where(ClassificationCacheEntry.rules_hash != rules_hash)
+    )
+    await session.commit()
+    result = await session.execute(
+        select(ClassificationCacheEntry.text_key, ClassificationCacheEntry.category)
+        .order_by(_ROWID.desc())
+        .limit(limit)
+    )
+    return dict(result.all())
+
+
+async def save_classification_cache(
+    session: AsyncSession,
+    entries: dict[str, str],
+    rules_hash: str,
+    max_entries: int | None = None,
+) -> None:
+    """Upsert `entries`; with `max_entries`, keep only that many of the newest rows."""
+    if not entries:
+        return
+    rows = [
+        {"text_key": key, "category": category, "rules_hash": rules_hash}
+        for key, category in entries.items()
+    ]
+    for chunk in _chunks(rows):
+        stmt = insert(ClassificationCacheEntry).values(chunk)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=["text_key"],
+            set_={"category": stmt.excluded.category, "rules_hash": stmt.excluded.rules_hash},
+        ))
+    if max_entries is not None:
+        newest = (
+            select(_ROWID).select_from(ClassificationCacheEntry)
+            .order_by(_ROWID.desc()).limit(max_entries).scalar_subquery()
+        )
+        await session.execute(delete(ClassificationCacheEntry).where(_ROWID.not_in(newest)))
+    await session.commit()
+
+
+async def warm_classification_cache(session: AsyncSession) -> None:
+    """Load persisted classifications computed under the current rules into the shared cache."""
+    entries = await load_classification_cache(
+        session, classification_cache.rules_hash, settings.classification_cache_size
+    )
+    classification_cache.load(entries)
+    logger.info("Classification cache warmed with %d entries.", len(entries))
+
+
+async def persist_classification_cache(session: AsyncSession) -> None:
+    """Save classifications computed since the last persist."""
+    entries = classification_cache.drain_unsaved()
+    await save_classification_cache(
+        session, entries, classification_cache.rules_hash, max_entries=settings.classification_cache_size
+    )
+
+
+async def reclassify_transactions(session: AsyncSession, classify_many) -> int:
+    """
+    Re-run classification over the whole ledger, update rows whose category
+    changed and rebuild the rollups. Returns the number of updated rows.
+    """
+    result = await session.execute(
+        select(Transaction.transaction_id, Transaction.description, Transaction.merchant, Transaction.category)
+    )
+    rows = result.all()
+    categories = classify_many((description, merchant) for _, description, merchant, _ in rows)
+    changed = [
+        {"transaction_id": tx_id, "category": new}
+        for (tx_id, _, _, old), new in zip(rows, categories)
+        if new != old
+    ]
+    if changed:
+        # ORM bulk UPDATE by primary key: one executemany for all rows
+        await session.execute(update(Transaction), changed)
+        await session.commit()
+        await rebuild_daily_rollups(session)
+    logger.info("Reclassified %d of %d transaction(s).", len(changed), len(rows))
+    return len(changed)
+
+
+# ── Sync cursors ─────────────────────────────────────────────────────────────
+
+def as_utc(ts: datetime) -> datetime:
+    """SQLite hands datetimes back naive; everything is stored in UTC."""
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+async def get_sync_cursors(session: AsyncSession) -> dict[str, SyncCursor]:
+    result = await session.execute(select(SyncCursor))
+    return {cursor.account_id: cursor for cursor in result.scalars().all()}
+
+
+async def advance_sync_cursors(
+    session: AsyncSession,
+    account_ids: list[str],
+    transactions: list[dict],
+    window_start: datetime,
+    synced_at: datetime,
+) -> None:
+    """
+    Record a successful sync of `account_ids`: extend each account's covered
+    window back to `window_start` and move its watermark to the newest
+    transaction seen.
+    """
+    newest: dict[str, datetime] = {}
+    for tx in transactions:
+        ts = as_utc(tx["timestamp"])
+        if tx["account_id"] not in newest or ts > newest[tx["account_id"]]:
+            newest[tx["account_id"]] = ts
+
+    cursors = await get_sync_cursors(session)
+    for account_id in account_ids:
+        cursor = cursors.get(account_id)
+        seen = newest.get(account_id)
+        if cursor is None:
+            session.add(SyncCursor(
+                account_id=account_id,
+                window_start=window_start,
+                last_seen_at=seen,
+                synced_at=synced_at,
+            ))
+            continue
+        if window_start < as_utc(cursor.window_start):
+            cursor.window_start = window_start
+        if seen is not None and (cursor.last_seen_at is None or seen > as_utc(cursor.last_seen_at)):
+            cursor.last_seen_at = seen
+        cursor.synced_at = synced_at
+    await session.commit()
+
+
 # ── Investments ───────────────────────────────────────────────────────────────
 
 async def upsert_investment(session: AsyncSession, data: dict) -> Investment:
@@ -88,6 +484,10 @@ async def upsert_investment(session: AsyncSession, data: dict) -> Investment:
     return result
 
 
+async def upsert_investments_bulk(session: AsyncSession, rows: list[dict]) -> list[str]:
+    return await _upsert_bulk(session, Investment, "asset_id", rows)
+
+
 async def get_all_investments(session: AsyncSession) -> list[Investment]:
     result = await session.execute(select(Investment))
     return list(result.scalars().all())
@@ -101,7 +501,291 @@ async def get_investments_with_alert(session: AsyncSession) -> list[Investment]:
 
 
 async def clear_investment_alerts(session: AsyncSession) -> None:
-    investments = await get_investments_with_alert(session)
-    for inv in investments:
-        inv.alert_triggered = False
+    await session.execute(
+        update(Investment).where(Investment.alert_triggered.is_(True)).values(alert_triggered=False)
+    )
+    await session.commit()
+
+
+# ── Investment snapshots ─────────────────────────────────────────────────────
+# Raw poll points are downsampled to hourly and then daily closes as they age.
+
+_HOUR = 3600
+_DAY = 86400
+
+
+def _epoch(ts: datetime) -> int:
+    return int(as_utc(ts).timestamp())
+
+
+async def append_investment_snapshots(session: AsyncSession, rows: list[dict], taken_at: datetime) -> int:
+    """Record one point per position (fetch_investments dicts). Returns points added."""
+    ts = _epoch(taken_at)
+    points = [
+        {
+            "asset_id": row["asset_id"],
+            "ts": ts,
+            "price_cents": row["current_price_cents"],
+            "value_cents": row["total_value_cents"],
+            "resolution": 0,
+        }
+        for row in rows
+    ]
+    added = 0
+    for chunk in _chunks(points):
+        stmt = insert(InvestmentSnapshot).values(chunk).on_conflict_do_nothing().returning(InvestmentSnapshot.ts)
+        added += len((await session.execute(stmt)).all())
+    await session.commit()
+    return added
+
+
+async def get_investment_history(
+    session: AsyncSession,
+    asset_id: str,
+    start: datetime,
+    end: datetime | None = None,
+) -> list[tuple[datetime, int, int]]:
+    """(timestamp, price_cents, value_cents) points for `asset_id` in [start, end), oldest first."""
+    stmt = select(InvestmentSnapshot.ts, InvestmentSnapshot.price_cents, InvestmentSnapshot.value_cents).where(
+        InvestmentSnapshot.asset_id == asset_id,
+        InvestmentSnapshot.ts >= _epoch(start),
+    )
+    if end is not None:
+        stmt = stmt.where(InvestmentSnapshot.ts < _epoch(end))
+    result = await session.execute(stmt.order_by(InvestmentSnapshot.ts))
+    return [
+        (datetime.fromtimestamp(ts, tz=timezone.utc), price, value)
+        for ts, price, value in result.all()
+    ]
+
+
+async def get_snapshot_points(
+    session: AsyncSession,
+    start: datetime,
+    end: datetime | None = None,
+) -> list[tuple[str, int, int, int]]:
+    """(asset_id, epoch ts, price_cents, value_cents) for every asset in [start, end), oldest first."""
+    stmt = select(
+        InvestmentSnapshot.asset_id,
+        InvestmentSnapshot.ts,
+        InvestmentSnapshot.price_cents,
+        InvestmentSnapshot.value_cents,
+    ).where(InvestmentSnapshot.ts >= _epoch(start))
+    if end is not None:
+        stmt = stmt.where(InvestmentSnapshot.ts < _epoch(end))
+    result = await session.execute(stmt.order_by(InvestmentSnapshot.ts))
+    return [tuple(row) for row in result.all()]
+
+
+async def get_price_change_since(session: AsyncSession, since: datetime) -> dict[str, float]:
+    """
+    Percent change per asset between its last point at or before `since`
+    (or its first point after, if none) and its latest point.
+    """
+    cutoff = _epoch(since)
+    base_ts = (
+        select(
+            InvestmentSnapshot.asset_id,
+            func.coalesce(
+                func.max(case((InvestmentSnapshot.ts <= cutoff, InvestmentSnapshot.ts))),
+                func.min(InvestmentSnapshot.ts),
+            ).label("base"),
+            func.max(InvestmentSnapshot.ts).label("latest"),
+        )
+        .group_by(InvestmentSnapshot.asset_id)
+        .subquery()
+    )
+    result = await session.execute(
+        select(base_ts.c.asset_id, InvestmentSnapshot.ts, InvestmentSnapshot.price_cents)
+        .join(InvestmentSnapshot, InvestmentSnapshot.asset_id == base_ts.c.asset_id)
+        .where(InvestmentSnapshot.ts.in_([base_ts.c.base, base_ts.c.latest]))
+    )
+    points: dict[str, dict[int, int]] = {}
+    for asset_id, ts, price in result.all():
+        points.setdefault(asset_id, {})[ts] = price
+
+    changes: dict[str, float] = {}
+    for asset_id, by_ts in points.items():
+        base, latest = by_ts[min(by_ts)], by_ts[max(by_ts)]
+        if base:
+            changes[asset_id] = round((latest - base) / base * 100, 4)
+    return changes
+
+
+async def downsample_investment_snapshots(
+    session: AsyncSession,
+    now: datetime | None = None,
+    hourly_after: int = 24 * _HOUR,
+    daily_after: int = 30 * _DAY,
+) -> int:
+    """
+    Collapse points older than `hourly_after` seconds into hourly closes and
+    older than `daily_after` into daily closes; each bucket keeps the last
+    point's values at the bucket start. Returns the number of rows removed.
+    """
+    now_ts = _epoch(now or datetime.now(tz=timezone.utc))
+    removed = 0
+    for bucket, age in ((_HOUR, hourly_after), (_DAY, daily_after)):
+        cutoff = (now_ts - age) // bucket * bucket  # only whole buckets
+        result = await session.execute(
+            select(InvestmentSnapshot)
+            .where(InvestmentSnapshot.ts < cutoff, InvestmentSnapshot.resolution < bucket)
+            .order_by(InvestmentSnapshot.asset_id, InvestmentSnapshot.ts)
+        )
+        points = result.scalars().all()
+        if not points:
+            continue
+        closes: dict[tuple[str, int], InvestmentSnapshot] = {}
+        for point in points:
+            closes[(point.asset_id, point.ts // bucket * bucket)] = point  # last one wins
+        values = [
+            {
+                "asset_id": asset_id,
+                "ts": start,
+                "price_cents": point.price_cents,
+                "value_cents": point.value_cents,
+                "resolution": bucket,
+            }
+            for (asset_id, start), point in closes.items()
+        ]
+        for point in points:
+            await session.delete(point)
+        await session.flush()
+        for chunk in _chunks(values):
+            await session.execute(insert(InvestmentSnapshot).values(chunk))
+        removed += len(points) - len(values)
+    await session.commit()
+    return removed
+
+
+# ── Notification outbox ──────────────────────────────────────────────────────
+# Producers insert rows (deduplicated by idempotency key); the outbox worker
+# claims batches under a lease, sends them and acks what was delivered, or
+# marks as failed what ran out of attempts.
+
+def _outbox_rows(items: list[dict], now: datetime) -> list[dict]:
+    return [
+        {
+            "idempotency_key": item["idempotency_key"],
+            "chat_id": str(item["chat_id"]),
+            "text": item["text"],
+            "coalesce": item.get("coalesce"),
+            "created_at": now,
+            "attempts": 0,
+        }
+        for item in items
+    ]
+
+
+async def _insert_outbox(session: AsyncSession, items: list[dict]) -> int:
+    added = 0
+    for chunk in _chunks(_outbox_rows(items, datetime.now(tz=timezone.utc))):
+        stmt = (
+            insert(NotificationOutbox)
+            .values(chunk)
+            .on_conflict_do_nothing(index_elements=["idempotency_key"])
+            .returning(NotificationOutbox.id)
+        )
+        added += len((await session.execute(stmt)).all())
+    return added
+
+
+async def enqueue_notifications(session: AsyncSession, items: list[dict]) -> int:
+    """Queue messages (idempotency_key, chat_id, text, coalesce). Returns how many were new."""
+    added = await _insert_outbox(session, items)
+    await session.commit()
+    return added
+
+
+async def enqueue_transaction_alerts(
+    session: AsyncSession,
+    items: list[dict],
+    quiet_ids: list[str] | tuple[str, ...] = (),
+) -> int:
+    """
+    Queue alerts and flag their transactions (`transaction_id` in each item)
+    as notified in the same commit, so an alert is never both lost and flagged.
+    `quiet_ids` are rows checked and found not worth an alert; they are
+    flagged too, which keeps the un-notified index small.
+    """
+    added = await _insert_outbox(session, items)
+    await _flag_notified(session, [item["transaction_id"] for item in items] + list(quiet_ids))
+    await session.commit()
+    return added
+
+
+async def claim_notifications(
+    session: AsyncSession,
+    limit: int,
+    lease_seconds: float,
+    now: datetime | None = None,
+) -> list[NotificationOutbox]:
+    """Lease up to `limit` unsent, unclaimed messages, oldest first."""
+    now = now or datetime.now(tz=timezone.utc)
+    claimable = (
+        select(NotificationOutbox.id)
+        .where(
+            NotificationOutbox.sent_at.is_(None),
+            NotificationOutbox.failed_at.is_(None),
+            (NotificationOutbox.claimed_until.is_(None)) | (NotificationOutbox.claimed_until < now),
+        )
+        .order_by(NotificationOutbox.id)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_(claimable))
+        .values(
+            claimed_until=now + timedelta(seconds=lease_seconds),
+            attempts=NotificationOutbox.attempts + 1,
+        )
+        .returning(NotificationOutbox)
+    )
+    claimed = sorted(result.scalars().all(), key=lambda row: row.id)
+    await session.commit()
+    return claimed
+
+
+async def ack_notifications(session: AsyncSession, ids: list[int], sent_at: datetime | None = None) -> None:
+    sent_at = sent_at or datetime.now(tz=timezone.utc)
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(ids[start:start + BULK_CHUNK_SIZE]))
+            .values(sent_at=sent_at, claimed_until=None)
+        )
+    await session.commit()
+
+
+async def fail_notifications(session: AsyncSession, ids: list[int], failed_at: datetime | None = None) -> None:
+    """Give up on messages that ran out of attempts; they are never claimed again."""
+    failed_at = failed_at or datetime.now(tz=timezone.utc)
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id.in_(ids[start:start + BULK_CHUNK_SIZE]))
+            .values(failed_at=failed_at, claimed_until=None)
+        )
+    await session.commit()
+
+
+async def release_notification_claims(session: AsyncSession) -> int:
+    """Drop every outstanding lease — on startup nothing can still hold one."""
+    result = await session.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.sent_at.is_(None), NotificationOutbox.claimed_until.is_not(None))
+        .values(claimed_until=None)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def purge_sent_notifications(session: AsyncSession, before: datetime) -> int:
+    result = await session.execute(
+        delete(NotificationOutbox).where(
+            (NotificationOutbox.sent_at < before) | (NotificationOutbox.failed_at < before)
+        )
+    )
     await session.commit()
+    return result.rowcount
@@ -1,11 +1,14 @@
 """
 SQLAlchemy ORM models for FINOVA's local SQLite cache.
 All monetary values are stored as integers in cents.
+
+The engine (and with it the DB driver) is created on first use, through
+`get_engine()` or the first `AsyncSessionLocal()` session, not at import.
 """
 
-from datetime import datetime
+from datetime import date, datetime
 
-from sqlalchemy import Boolean, DateTime, Float, Integer, String, Text
+from sqlalchemy import Boolean, Date, DateTime, Float, Index, Integer, String, Text, event, inspect, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
 
@@ -29,14 +32,21 @@ class Account(Base):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Per-account range scans; also serves plain account_id lookups
+        Index("ix_transactions_account_id_timestamp", "account_id", "timestamp"),
+        # Only the few rows still awaiting an alert decision: the transaction
+        # watcher flags every row it ingests once it has checked it
+        Index("ix_transactions_unnotified", "timestamp", sqlite_where=text("already_notified = 0")),
+    )
 
     transaction_id: Mapped[str] = mapped_column(String, primary_key=True)
     account_id: Mapped[str] = mapped_column(String, nullable=False)
     amount_cents: Mapped[int] = mapped_column(Integer, nullable=False)
     description: Mapped[str] = mapped_column(Text, nullable=False)
     merchant: Mapped[str | None] = mapped_column(String, nullable=True)
-    category: Mapped[str] = mapped_column(String, default="Other")
-    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    category: Mapped[str] = mapped_column(String, default="Other", index=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
     already_notified: Mapped[bool] = mapped_column(Boolean, default=False)
 
 
@@ -55,19 +65,180 @@ class Investment(Base):
     last_updated: Mapped[datetime] = mapped_column(DateTime, nullable=False)
 
 
+class DailyRollup(Base):
+    """
+    Per-day, per-account, per-category debit/credit sums, maintained
+    incrementally as transactions are inserted. Debits are stored as
+    positive cents; zero-amount transactions count as credits, so the counts
+    cover every transaction.
+    """
+
+    __tablename__ = "daily_rollups"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    account_id: Mapped[str] = mapped_column(String, primary_key=True)
+    category: Mapped[str] = mapped_column(String, primary_key=True)
+    debit_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    credit_cents: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    debit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    credit_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ClassificationCacheEntry(Base):
+    """Persisted classifier results, valid only for the rules they were computed with."""
+
+    __tablename__ = "classification_cache"
+
+    text_key: Mapped[str] = mapped_column(String, primary_key=True)
+    category: Mapped[str] = mapped_column(String, nullable=False)
+    rules_hash: Mapped[str] = mapped_column(String, nullable=False)
+
+
+class SyncCursor(Base):
+    """Per-account transaction sync watermark used for incremental polling."""
+
+    __tablename__ = "sync_cursors"
+
+    account_id: Mapped[str] = mapped_column(String, primary_key=True)
+    window_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)  # oldest instant covered
+    last_seen_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)  # newest transaction seen
+    synced_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class InvestmentSnapshot(Base):
+    """
+    Append-only price history. Timestamps are integer UTC epoch seconds and
+    values are integer cents, so each point stays a few varint bytes in a
+    WITHOUT ROWID table clustered by (asset_id, ts). `resolution` is the
+    bucket width in seconds a point stands for: 0 for raw polls, 3600 or
+    86400 once downsampled.
+    """
+
+    __tablename__ = "investment_snapshots"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    asset_id: Mapped[str] = mapped_column(String, primary_key=True)
+    ts: Mapped[int] = mapped_column(Integer, primary_key=True)
+    price_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    value_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    resolution: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class NotificationOutbox(Base):
+    """
+    Durable queue of outgoing Telegram messages, drained by the outbox worker
+    with at-least-once delivery. `idempotency_key` stops the same event from
+    being queued twice; a claim is a lease (`claimed_until`) so a message
+    claimed by a crashed worker is picked up again. A message still undelivered
+    after OUTBOX_MAX_ATTEMPTS claims is marked `failed_at` and no longer claimed.
+    """
+
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # Claims scan only unsent rows, in insertion order
+        Index("ix_notification_outbox_unsent", "id", sqlite_where=text("sent_at IS NULL")),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    idempotency_key: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    chat_id: Mapped[str] = mapped_column(String, nullable=False)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    coalesce: Mapped[str | None] = mapped_column(String, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    claimed_until: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    failed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
 # ── Engine & session factory ─────────────────────────────────────────────────
 
 _db_url = settings.database_url
 if _db_url.startswith("sqlite:///") and not _db_url.startswith("sqlite+aiosqlite"):
     _db_url = _db_url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
 
-engine: AsyncEngine = create_async_engine(_db_url, echo=False)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    # WAL lets readers run alongside the watchers' writes; NORMAL sync is
+    # durable in WAL mode and avoids an fsync per commit.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kb}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size_bytes}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
+
+def configure_engine(target: AsyncEngine) -> AsyncEngine:
+    if target.dialect.name == "sqlite":
+        event.listen(target.sync_engine, "connect", _apply_sqlite_pragmas)
+    return target
+
+
+_engine: AsyncEngine | None = None
+
+
+def get_engine() -> AsyncEngine:
+    global _engine
+    if _engine is None:
+        _engine = configure_engine(create_async_engine(_db_url, echo=False))
+    return _engine
+
+
+class _LazySessionFactory:
+    """`sessionmaker` stand-in that binds to the engine on the first session."""
+
+    def __init__(self) -> None:
+        self._factory: sessionmaker | None = None
+
+    def __call__(self, **kwargs) -> AsyncSession:
+        if self._factory is None:
+            self._factory = sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
+        return self._factory(**kwargs)
+
+
+AsyncSessionLocal = _LazySessionFactory()
+
+
+def __getattr__(name: str):
+    # `models.engine` still works, but only builds the engine when asked for
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Superseded indexes still present in older databases
+_OBSOLETE_INDEXES = (
+    # The planner picked it over ix_transactions_unnotified for alert lookups
+    "ix_transactions_already_notified",
+)
+
+
+def _create_schema(conn) -> set[str]:
+    """Create missing tables and indexes; returns the names of new tables."""
+    existing = set(inspect(conn).get_table_names())
+    Base.metadata.create_all(conn)
+    # create_all skips indexes on tables that already exist — add any new ones
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    for name in _OBSOLETE_INDEXES:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    return set(Base.metadata.tables) - existing
 
 
 async def init_db() -> None:
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    async with get_engine().begin() as conn:
+        created = await conn.run_sync(_create_schema)
+
+    if DailyRollup.__tablename__ in created:
+        # Backfill rollups for a ledger that predates the table
+        from src.database.crud import rebuild_daily_rollups  # crud imports this module
+
+        async with AsyncSessionLocal() as session:
+            await rebuild_daily_rollups(session)
 
 
 async def get_session() -> AsyncSession:
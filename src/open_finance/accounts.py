@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 
 async def fetch_accounts() -> dict:
     try:
-        data = await client.get("/accounts", params={"itemId": settings.pluggy_item_id})
+        data, _ = await client.get_cached("/accounts", params={"itemId": settings.pluggy_item_id})
         accounts = []
         for item in data.get("results", []):
             institution_obj = item.get("institution") or {}
@@ -0,0 +1,101 @@
+"""
+Access token (Pluggy API key) lifecycle for the Open Finance client.
+
+The manager knows when the current key expires (from its JWT `exp` claim,
+falling back to TOKEN_DEFAULT_TTL_SECONDS), refreshes it in the background
+TOKEN_REFRESH_MARGIN_SECONDS before it lapses, and lets only one refresh run
+at a time — concurrent callers wait for it instead of each POSTing /auth.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MIN_REFRESH_DELAY_SECONDS = 1.0
+_SHORT_TOKEN_MAX_DELAY_SECONDS = 30.0
+
+
+def token_expiry(token: str) -> float | None:
+    """Unix time of the JWT `exp` claim, or None if the token isn't a JWT."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenManager:
+    def __init__(self, fetch_token: Callable[[], Awaitable[str]]) -> None:
+        self._fetch_token = fetch_token
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresher: asyncio.Task | None = None
+
+    def _is_fresh(self) -> bool:
+        margin = settings.token_refresh_margin_seconds
+        return self._token is not None and time.time() < self._expires_at - margin
+
+    async def get(self) -> str:
+        if self._is_fresh():
+            return self._token
+        return await self.refresh()
+
+    async def refresh(self, stale: str | None = None) -> str:
+        """
+        Obtain a new token. Pass the token that was rejected as `stale`; if
+        another caller has already replaced it, that replacement is returned
+        without a second /auth round-trip.
+        """
+        async with self._lock:
+            if self._token is not None and self._token != stale and self._is_fresh():
+                return self._token
+            token = await self._fetch_token()
+            self._token = token
+            self._expires_at = token_expiry(token) or time.time() + settings.token_default_ttl_seconds
+            logger.info("Access token refreshed; valid for %.0fs.", self._expires_at - time.time())
+            self._schedule_refresh()
+            return token
+
+    def _schedule_refresh(self) -> None:
+        if self._refresher is not None and not self._refresher.done():
+            self._refresher.cancel()
+        self._refresher = asyncio.create_task(self._refresh_before_expiry(), name="token_refresher")
+
+    def _refresh_delay(self) -> float:
+        ttl = self._expires_at - time.time()
+        # A key that lives no longer than the margin is renewed half-way
+        # through its life, not in a back-to-back /auth loop
+        return max(
+            ttl - settings.token_refresh_margin_seconds,
+            min(_SHORT_TOKEN_MAX_DELAY_SECONDS, ttl / 2),
+            _MIN_REFRESH_DELAY_SECONDS,
+        )
+
+    async def _refresh_before_expiry(self) -> None:
+        await asyncio.sleep(self._refresh_delay())
+        stale = self._token
+        try:
+            # Runs as its own task; refresh() reschedules, which cancels us — detach first
+            self._refresher = None
+            await self.refresh(stale=stale)
+        except Exception as exc:
+            # The next get() will retry once the token is actually stale
+            logger.warning("Background token refresh failed: %s", exc)
+
+    async def aclose(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
@@ -1,22 +1,56 @@
 """
 Async HTTP client wrapper for the Open Finance API.
 All other open_finance modules use this client to make requests.
+
+A single pooled `httpx.AsyncClient` is kept open for the lifetime of the
+process so polls reuse warm keep-alive connections instead of paying a new
+TCP+TLS handshake each time. Call `aclose()` on shutdown.
+API keys are managed by `TokenManager`; a request rejected with 401 is
+retried once with a refreshed key.
+
+Requests are paced by a token bucket, retried with jittered exponential
+backoff on network errors, 429 and 5xx (honouring Retry-After), and refused
+outright with `CircuitOpenError` while the upstream's circuit is open.
+
+`get_cached()` adds conditional requests on top: validators from the last
+response are sent as If-None-Match / If-Modified-Since, and a 304 or a body
+identical to the cached one returns the cached JSON without re-parsing.
 """
 
+import asyncio
 import logging
 from typing import Any
 
 import httpx
 
 from src.config import settings
+from src.open_finance.auth import TokenManager
+from src.open_finance.http_cache import CachedResponse, ResponseCache, body_hash
+from src.open_finance.resilience import (
+    RETRYABLE_STATUS,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    parse_retry_after,
+)
+from src.utils.ratelimit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401 — presence enables HTTP/2 in httpx
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
 _BASE_HEADERS = {
     "Accept": "application/json",
     "Content-Type": "application/json",
 }
 
+_AUTH_TIMEOUT = 15
+_REQUEST_TIMEOUT = 30
+
 
 class OpenFinanceClient:
     def __init__(self) -> None:
@@ -24,51 +58,159 @@ class OpenFinanceClient:
         self._client_id = settings.open_finance_client_id
         self._client_secret = settings.open_finance_client_secret
         self._consent_token = settings.open_finance_consent_token
-        self._access_token: str | None = None
+        self._tokens = TokenManager(self._request_access_token)
+        self._http: httpx.AsyncClient | None = None
+        self._retry = RetryPolicy(
+            max_retries=settings.http_max_retries,
+            base_delay=settings.http_backoff_base_seconds,
+            max_delay=settings.http_backoff_max_seconds,
+        )
+        # One client talks to one host, so these are per-host
+        self._limiter = TokenBucket(rate=settings.api_rate_limit_per_second, capacity=settings.api_rate_limit_burst)
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.circuit_failure_threshold,
+            reset_timeout=settings.circuit_reset_seconds,
+        )
+        self.cache = ResponseCache(settings.http_cache_dir)
 
-    async def _get_access_token(self) -> str:
-        if self._access_token:
-            return self._access_token
-        async with httpx.AsyncClient(timeout=15) as client:
-            try:
-                response = await client.post(
-                    f"{self._base_url}/auth",
-                    json={
-                        "clientId": self._client_id,
-                        "clientSecret": self._client_secret,
-                    },
-                )
-                response.raise_for_status()
-                self._access_token = response.json()["apiKey"]
-                return self._access_token
-            except httpx.HTTPError as exc:
-                logger.error("Failed to obtain access token: %s", exc)
-                raise
+    def _session(self) -> httpx.AsyncClient:
+        # Created lazily so the pool binds to the running event loop
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self._base_url,
+                headers=_BASE_HEADERS,
+                timeout=_REQUEST_TIMEOUT,
+                http2=_HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry,
+                ),
+            )
+            logger.debug("Opened Open Finance HTTP session (http2=%s).", _HTTP2_AVAILABLE)
+        return self._http
+
+    async def aclose(self) -> None:
+        await self._tokens.aclose()
+        if self._http is not None and not self._http.is_closed:
+            await self._http.aclose()
+            logger.info("Open Finance HTTP session closed.")
+        self._http = None
+
+    async def _request_access_token(self) -> str:
+        try:
+            response = await self._session().post(
+                "/auth",
+                json={
+                    "clientId": self._client_id,
+                    "clientSecret": self._client_secret,
+                },
+                timeout=_AUTH_TIMEOUT,
+            )
+            response.raise_for_status()
+            return response.json()["apiKey"]
+        except httpx.HTTPError as exc:
+            logger.error("Failed to obtain access token: %s", exc)
+            raise
+
+    async def _authorized_get(self, path: str, params: dict | None, headers: dict) -> httpx.Response:
+        token = await self._tokens.get()
+        response = await self._session().get(path, headers={**headers, "X-API-KEY": token}, params=params or {})
+        if response.status_code == 401:
+            # Key revoked or expired early — refresh (once for all callers) and retry once
+            logger.info("Open Finance API rejected the access token [%s]; refreshing.", path)
+            token = await self._tokens.refresh(stale=token)
+            response = await self._session().get(path, headers={**headers, "X-API-KEY": token}, params=params or {})
+        return response
 
     async def get(self, path: str, params: dict | None = None) -> dict[str, Any]:
-        token = await self._get_access_token()
-        headers = {
-            **_BASE_HEADERS,
-            "X-API-KEY": token,
-        }
-        async with httpx.AsyncClient(timeout=30) as client:
+        return (await self._request(path, params)).json()
+
+    async def get_cached(self, path: str, params: dict | None = None) -> tuple[dict[str, Any], bool]:
+        """
+        GET with conditional revalidation. Returns (data, changed).
+        `changed` is relative to the last fetch by any caller, so it must not
+        decide on its own whether a consumer persists the data.
+        """
+        key = self.cache.key(path, params)
+        cached = self.cache.get(key)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        response = await self._request(path, params, headers)
+        if response.status_code == 304 and cached is not None:
+            logger.debug("Open Finance API [%s]: not modified.", path)
+            return cached.data, False
+
+        digest = body_hash(response.content)
+        changed = cached is None or cached.body_hash != digest
+        data = response.json() if changed else cached.data
+        self.cache.put(key, CachedResponse(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            body_hash=digest,
+            data=data,
+        ))
+        return data, changed
+
+    async def _request(self, path: str, params: dict | None, headers: dict | None = None) -> httpx.Response:
+        allowed, probe = self.breaker.allow()
+        if not allowed:
+            raise CircuitOpenError(f"Open Finance API circuit is open; skipping {path}")
+        if not probe:
+            return await self._request_with_retries(path, params, headers or {})
+        try:
+            return await self._request_with_retries(path, params, headers or {})
+        finally:
+            # Every exit resolves the probe, even one that recorded nothing
+            self.breaker.release()
+
+    async def _request_with_retries(self, path: str, params: dict | None, headers: dict) -> httpx.Response:
+        for attempt in range(self._retry.max_retries + 1):
+            last_attempt = attempt == self._retry.max_retries
+            await self._limiter.acquire()
             try:
-                response = await client.get(
-                    f"{self._base_url}{path}",
-                    headers=headers,
-                    params=params or {},
+                response = await self._authorized_get(path, params, headers)
+            except httpx.RequestError as exc:
+                if last_attempt:
+                    self.breaker.record_failure()
+                    logger.error("Network error contacting Open Finance API [%s]: %s", path, exc)
+                    raise
+                delay = self._retry.delay(attempt)
+                logger.warning("Network error [%s], retry %d in %.1fs: %s", path, attempt + 1, delay, exc)
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code in RETRYABLE_STATUS and not last_attempt:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = self._retry.delay(attempt, retry_after)
+                if delay is not None:
+                    logger.warning("HTTP %s [%s], retry %d in %.1fs.", response.status_code, path, attempt + 1, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                logger.warning(
+                    "HTTP %s [%s]: Retry-After %.0fs exceeds the retry budget; not retrying.",
+                    response.status_code, path, retry_after,
                 )
+
+            if response.status_code == 304:
+                self.breaker.record_success()
+                return response
+            try:
                 response.raise_for_status()
-                return response.json()
             except httpx.HTTPStatusError as exc:
-                if exc.response.status_code == 401:
-                    # Token may have expired — force refresh on next call
-                    self._access_token = None
+                if response.status_code in RETRYABLE_STATUS:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()  # a 4xx still means the upstream is up
                 logger.error("HTTP error from Open Finance API [%s %s]: %s", path, exc.response.status_code, exc)
                 raise
-            except httpx.RequestError as exc:
-                logger.error("Network error contacting Open Finance API [%s]: %s", path, exc)
-                raise
+            self.breaker.record_success()
+            return response
 
 
 # Module-level singleton
@@ -0,0 +1,99 @@
+"""
+In-process data coordinator shared by the watchers, bot commands and reports.
+
+- Concurrent identical requests are single-flighted: one API round-trip,
+  every caller gets its result.
+- Read-only fetches (accounts, investments) are served from a short TTL
+  cache (FETCH_CACHE_TTL_SECONDS).
+- The account ID list is kept between calls (ACCOUNT_LIST_TTL_SECONDS), so
+  transaction syncs don't hit /accounts first every time.
+
+Transaction syncs write to the database and report which rows are new, so
+they are single-flighted but never served from the cache.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from src.config import settings
+from src.open_finance.accounts import fetch_accounts
+from src.open_finance.investments import fetch_investments
+from src.open_finance.sync import sync_transactions
+
+logger = logging.getLogger(__name__)
+
+
+class DataCoordinator:
+    def __init__(self) -> None:
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._cache: dict[tuple, tuple[float, dict]] = {}
+        self._account_ids: list[str] | None = None
+        self._account_ids_at = 0.0
+
+    async def _single_flight(self, key: tuple, factory: Callable[[], Awaitable[dict]]) -> dict:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+
+            def _forget(done: asyncio.Task, key: tuple = key) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+
+            task.add_done_callback(_forget)
+        else:
+            logger.debug("Joining in-flight request %s.", key)
+        # Shielded so one caller being cancelled doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+    async def _cached(self, key: tuple, factory: Callable[[], Awaitable[dict]]) -> dict:
+        hit = self._cache.get(key)
+        if hit is not None and hit[0] > time.monotonic():
+            return hit[1]
+        result = await self._single_flight(key, factory)
+        if not result["error"]:
+            self._cache[key] = (time.monotonic() + settings.fetch_cache_ttl_seconds, result)
+        return result
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+        self._account_ids = None
+
+    async def accounts(self) -> dict:
+        result = await self._cached(("accounts",), fetch_accounts)
+        if not result["error"]:
+            self._remember_accounts(result["data"])
+        return result
+
+    def _remember_accounts(self, accounts: list[dict[str, Any]]) -> None:
+        self._account_ids = [a["account_id"] for a in accounts]
+        self._account_ids_at = time.monotonic()
+
+    async def account_ids(self) -> list[str] | None:
+        """Known account IDs, or None if they can't be determined right now."""
+        fresh = time.monotonic() - self._account_ids_at < settings.account_list_ttl_seconds
+        if self._account_ids is None or not fresh:
+            await self.accounts()
+        return self._account_ids
+
+    async def investments(self) -> dict:
+        return await self._cached(("investments",), fetch_investments)
+
+    async def sync_transactions(self, days: int = 1, account_ids: list[str] | None = None) -> dict:
+        """Sync `account_ids` (e.g. those named by a webhook), or every known account."""
+        if account_ids is None:
+            account_ids = await self.account_ids()
+            key = ("sync_transactions", days)
+        else:
+            key = ("sync_transactions", days, tuple(sorted(account_ids)))
+        return await self._single_flight(
+            key,
+            lambda: sync_transactions(days=days, account_ids=account_ids),
+        )
+
+
+# Module-level singleton
+coordinator = DataCoordinator()
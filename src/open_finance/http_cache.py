@@ -0,0 +1,71 @@
+"""
+Validator cache for conditional GETs against the Open Finance API.
+
+Keeps the ETag / Last-Modified validators, a hash of the body and the parsed
+JSON of the last 200 response per (path, params). Entries live in memory and,
+when HTTP_CACHE_DIR is set, are also written to disk so validators survive
+restarts.
+"""
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    body_hash: str
+    data: Any
+
+
+def body_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, directory: str = "") -> None:
+        self._entries: dict[str, CachedResponse] = {}
+        self._dir = Path(directory) if directory else None
+
+    @staticmethod
+    def key(path: str, params: dict | None) -> str:
+        raw = json.dumps([path, sorted((params or {}).items())], default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is None and self._dir is not None:
+            try:
+                entry = CachedResponse(**json.loads((self._dir / f"{key}.json").read_text()))
+                self._entries[key] = entry
+            except FileNotFoundError:
+                return None
+            except (OSError, TypeError, ValueError) as exc:
+                logger.warning("Ignoring unreadable HTTP cache entry %s: %s", key, exc)
+                return None
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        if self._dir is None:
+            return
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            tmp = self._dir / f"{key}.json.tmp"
+            tmp.write_text(json.dumps(asdict(entry)))
+            tmp.replace(self._dir / f"{key}.json")
+        except OSError as exc:
+            logger.warning("Could not persist HTTP cache entry %s: %s", key, exc)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self._dir is not None:
+            for path in self._dir.glob("*.json"):
+                path.unlink(missing_ok=True)
@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 
 async def fetch_investments() -> dict:
     try:
-        data = await client.get("/investments", params={"itemId": settings.pluggy_item_id})
+        data, _ = await client.get_cached("/investments", params={"itemId": settings.pluggy_item_id})
         investments = []
         for item in data.get("results", []):
             quantity = float(item.get("quantity", 1) or 1)
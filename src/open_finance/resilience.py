@@ -0,0 +1,106 @@
+"""
+Retry and circuit-breaker primitives for the Open Finance client
+(rate limiting lives in src.utils.ratelimit).
+
+- RetryPolicy: exponential backoff with full jitter, honouring Retry-After
+  (a Retry-After longer than the retry budget ends the retries instead).
+- CircuitBreaker: after repeated failures, stop calling the upstream for a
+  cool-down period, then let a single probe request through.
+"""
+
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(tz=timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float | None:
+        """
+        Wait before retry number `attempt` (0-based), or None when the server's
+        Retry-After exceeds `max_delay`: retrying sooner would only burn quota,
+        so the caller should give up and leave it to the next scheduled poll.
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        # Full jitter keeps concurrent pollers from retrying in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while requests are being refused (cool-down not yet over)."""
+        return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self) -> tuple[bool, bool]:
+        """
+        (allowed, probe): whether a request may go out, and whether it is the
+        half-open probe — only the probe's caller may `release()` it.
+        """
+        if self._opened_at is None:
+            return True, False
+        if self.is_open or self._probing:
+            return False, False
+        self._probing = True  # half-open: one probe request
+        return True, True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Circuit closed — upstream recovered.")
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def release(self) -> None:
+        """End a probe that produced no verdict (auth error, cancellation, ...) so another may run."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                logger.warning(
+                    "Circuit opened after %d consecutive failures; pausing for %.0fs.",
+                    self._failures, self.reset_timeout,
+                )
+            self._opened_at = time.monotonic()
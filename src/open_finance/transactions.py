@@ -1,8 +1,16 @@
 """
 Fetch transactions from the Open Finance API.
+
+Accounts are fetched concurrently (bounded by FETCH_CONCURRENCY). A failure on
+one account is reported in `failed_accounts` instead of failing the batch.
+Every page of /transactions is followed (see `iter_transaction_pages`).
+Pass `since` to ask each account only for data newer than a sync watermark.
 """
 
+import asyncio
+import contextlib
 import logging
+from collections.abc import AsyncIterator
 from datetime import datetime, timedelta, timezone
 
 from src.config import classify_transaction, settings
@@ -10,53 +18,175 @@ from src.open_finance.client import client
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 500
+
 
-async def fetch_transactions(days: int = 1) -> dict:
+def _parse_transaction(item: dict, account_id: str) -> dict:
+    amount_cents = int(round(float(item.get("amount", 0)) * 100))
+    description = item.get("description", "")
+    merchant_raw = item.get("merchant")
+    if isinstance(merchant_raw, dict):
+        merchant = merchant_raw.get("businessName") or merchant_raw.get("name") or None
+    else:
+        merchant = merchant_raw or None
+    category = classify_transaction(description, merchant)
+    raw_date = item.get("date", item.get("timestamp", ""))
     try:
-        # Pluggy requires accountId (not itemId) — fetch accounts first
-        accounts_data = await client.get("/accounts", params={"itemId": settings.pluggy_item_id})
-        account_ids = [item["id"] for item in accounts_data.get("results", [])]
+        ts = datetime.fromisoformat(raw_date.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        ts = datetime.now(tz=timezone.utc)
+    return {
+        "transaction_id": item["id"],
+        "account_id": item.get("accountId", account_id),
+        "amount_cents": amount_cents,
+        "description": description,
+        "merchant": merchant,
+        "category": category,
+        "timestamp": ts,
+        "already_notified": False,
+    }
+
+
+async def _get_page(
+    account_id: str,
+    from_str: str,
+    to_str: str,
+    page: int,
+    page_size: int,
+    semaphore: asyncio.Semaphore | None,
+) -> dict:
+    params = {
+        "accountId": account_id,
+        "from": from_str,
+        "to": to_str,
+        "pageSize": page_size,
+        "page": page,
+    }
+    if semaphore is None:
+        return await client.get("/transactions", params=params)
+    async with semaphore:
+        return await client.get("/transactions", params=params)
+
+
+async def iter_transaction_pages(
+    account_id: str,
+    from_str: str,
+    to_str: str,
+    page_size: int = PAGE_SIZE,
+    prefetch: bool = True,
+    semaphore: asyncio.Semaphore | None = None,
+) -> AsyncIterator[list[dict]]:
+    """
+    Yield the raw `results` of every /transactions page for one account,
+    following Pluggy's `page`/`totalPages` until the last page.
+    With `prefetch`, the next page is requested while the caller handles
+    the current one.
+    """
+    pending: asyncio.Task | None = None
+    try:
+        page = 1
+        data = await _get_page(account_id, from_str, to_str, page, page_size, semaphore)
+        while True:
+            total_pages = int(data.get("totalPages") or 1)
+            has_next = page < total_pages
+            if has_next and prefetch:
+                pending = asyncio.create_task(
+                    _get_page(account_id, from_str, to_str, page + 1, page_size, semaphore)
+                )
+            yield data.get("results", [])
+            if not has_next:
+                return
+            page += 1
+            if pending is not None:
+                data, pending = await pending, None
+            else:
+                data = await _get_page(account_id, from_str, to_str, page, page_size, semaphore)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await pending
+
+
+async def _fetch_account_transactions(
+    account_id: str,
+    from_str: str,
+    to_str: str,
+    semaphore: asyncio.Semaphore,
+) -> list[dict]:
+    transactions = []
+    async for results in iter_transaction_pages(account_id, from_str, to_str, semaphore=semaphore):
+        transactions.extend(_parse_transaction(item, account_id) for item in results)
+    return transactions
+
+
+def _fmt_watermark(ts: datetime) -> str:
+    # Pluggy compares `from` against whole-day transaction dates
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+
+async def fetch_transactions(
+    days: int = 1,
+    concurrency: int | None = None,
+    since: dict[str, datetime] | None = None,
+    account_ids: list[str] | None = None,
+) -> dict:
+    """
+    `since` maps account IDs to the day to fetch from, overriding the
+    `days` window for those accounts (incremental sync).
+    `account_ids` skips the /accounts lookup when the caller already knows them.
+    """
+    try:
+        if account_ids is None:
+            # Pluggy requires accountId (not itemId) — fetch accounts first
+            accounts_data = await client.get("/accounts", params={"itemId": settings.pluggy_item_id})
+            account_ids = [item["id"] for item in accounts_data.get("results", [])]
 
         to_date = datetime.now(tz=timezone.utc)
         from_date = to_date - timedelta(days=days)
         from_str = from_date.strftime("%Y-%m-%d")
         to_str = to_date.strftime("%Y-%m-%d")
+        since = since or {}
+
+        semaphore = asyncio.Semaphore(max(1, concurrency or settings.fetch_concurrency))
+        results = await asyncio.gather(
+            *(
+                _fetch_account_transactions(
+                    acc,
+                    _fmt_watermark(since[acc]) if acc in since else from_str,
+                    to_str,
+                    semaphore,
+                )
+                for acc in account_ids
+            ),
+            return_exceptions=True,
+        )
 
+        # gather preserves input order, so the merge is stable by account
         transactions = []
-        for account_id in account_ids:
-            data = await client.get("/transactions", params={
-                "accountId": account_id,
-                "from": from_str,
-                "to": to_str,
-                "pageSize": 500,
-            })
-            for item in data.get("results", []):
-                amount_cents = int(round(float(item.get("amount", 0)) * 100))
-                description = item.get("description", "")
-                merchant_raw = item.get("merchant")
-                if isinstance(merchant_raw, dict):
-                    merchant = merchant_raw.get("businessName") or merchant_raw.get("name") or None
-                else:
-                    merchant = merchant_raw or None
-                category = classify_transaction(description, merchant)
-                raw_date = item.get("date", item.get("timestamp", ""))
-                try:
-                    ts = datetime.fromisoformat(raw_date.replace("Z", "+00:00"))
-                except (ValueError, AttributeError):
-                    ts = datetime.now(tz=timezone.utc)
-                transactions.append({
-                    "transaction_id": item["id"],
-                    "account_id": item.get("accountId", account_id),
-                    "amount_cents": amount_cents,
-                    "description": description,
-                    "merchant": merchant,
-                    "category": category,
-                    "timestamp": ts,
-                    "already_notified": False,
-                })
-
-        logger.info("Fetched %d transactions (last %dd).", len(transactions), days)
-        return {"error": False, "data": transactions}
+        failed_accounts: dict[str, str] = {}
+        for account_id, outcome in zip(account_ids, results):
+            if isinstance(outcome, BaseException):
+                if isinstance(outcome, asyncio.CancelledError):
+                    raise outcome
+                logger.warning("fetch_transactions failed for account %s: %s", account_id, outcome)
+                failed_accounts[account_id] = str(outcome)
+                continue
+            transactions.extend(outcome)
+
+        if account_ids and len(failed_accounts) == len(account_ids):
+            raise RuntimeError(f"all {len(account_ids)} account(s) failed: {next(iter(failed_accounts.values()))}")
+
+        logger.info(
+            "Fetched %d transactions (last %dd, %d/%d accounts ok).",
+            len(transactions), days, len(account_ids) - len(failed_accounts), len(account_ids),
+        )
+        return {
+            "error": False,
+            "data": transactions,
+            "account_ids": account_ids,
+            "failed_accounts": failed_accounts,
+        }
     except Exception as exc:
         logger.error("fetch_transactions failed: %s", exc)
         return {"error": True, "message": str(exc), "data": None}
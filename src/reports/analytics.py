@@ -0,0 +1,170 @@
+"""
+Vectorised portfolio analytics.
+
+Positions and snapshot history are loaded into NumPy arrays once and every
+statistic is computed over whole arrays, so cost grows with the size of the
+data rather than with a Python loop per position or per point.
+
+Positions may be `Investment` rows or the dicts produced by
+`fetch_investments`; history is the (asset_id, ts, price_cents, value_cents)
+points returned by `get_snapshot_points`. History returns are time-weighted:
+each period counts only the price moves of positions held across it, so
+deposits, new positions and sales are not mistaken for gains or losses.
+"""
+
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+import numpy as np
+
+
+def _field(position: Any, name: str, default: float = 0) -> Any:
+    if isinstance(position, dict):
+        return position.get(name, default)
+    return getattr(position, name, default)
+
+
+def _cost_basis(position: Any) -> float:
+    invested = _field(position, "invested_cents", None)
+    if invested is not None:
+        return invested
+    return _field(position, "open_price_cents") * _field(position, "quantity")
+
+
+def summarize_portfolio(positions: Sequence[Any]) -> dict:
+    """
+    Totals, P&L and allocation for the current positions.
+    Cost basis is `invested_cents` when present, otherwise open price × quantity.
+    """
+    if not positions:
+        return {
+            "total_value_cents": 0,
+            "invested_cents": 0,
+            "pnl_cents": 0,
+            "return_pct": 0.0,
+            "day_pnl_cents": 0,
+            "weights": {},
+        }
+
+    values = np.fromiter((_field(p, "total_value_cents") for p in positions), dtype=np.float64, count=len(positions))
+    invested = np.fromiter((_cost_basis(p) for p in positions), dtype=np.float64, count=len(positions))
+    day_pct = np.fromiter((_field(p, "daily_change_pct") for p in positions), dtype=np.float64, count=len(positions))
+
+    total = values.sum()
+    total_invested = invested.sum()
+    # Value at the start of the day, backed out of today's change; a -100%
+    # day leaves nothing to back it out of, so that position adds no day P&L
+    factor = 1 + day_pct / 100
+    opening = np.divide(values, factor, out=values.copy(), where=factor > 0)
+    day_pnl = (values - opening).sum()
+    weights = values / total if total else np.zeros_like(values)
+
+    return {
+        "total_value_cents": int(round(total)),
+        "invested_cents": int(round(total_invested)),
+        "pnl_cents": int(round(total - total_invested)),
+        "return_pct": float((total - total_invested) / total_invested * 100) if total_invested else 0.0,
+        "day_pnl_cents": int(round(day_pnl)),
+        "weights": {_field(p, "asset_id", i): float(w) for i, (p, w) in enumerate(zip(positions, weights))},
+    }
+
+
+def history_matrix(
+    points: Iterable[tuple[str, int, int, int]],
+) -> tuple[np.ndarray, list[str], np.ndarray, np.ndarray]:
+    """
+    Pivot (asset_id, ts, price_cents, value_cents) points into time × asset
+    matrices. Gaps between an asset's first and last point are forward-filled;
+    outside that span the asset is not held: price NaN, value 0.
+    Returns (timestamps, asset_ids, prices, values).
+    """
+    rows = list(points)
+    if not rows:
+        return np.empty(0, dtype=np.int64), [], np.empty((0, 0)), np.empty((0, 0))
+
+    asset_col, ts_col, price_col, value_col = zip(*rows)
+    timestamps, row = np.unique(np.asarray(ts_col, dtype=np.int64), return_inverse=True)
+    asset_ids, col = np.unique(np.asarray(asset_col, dtype=object), return_inverse=True)
+    shape = (len(timestamps), len(asset_ids))
+
+    prices = np.full(shape, np.nan)
+    values = np.full(shape, np.nan)
+    prices[row, col] = np.asarray(price_col, dtype=np.float64)
+    values[row, col] = np.asarray(value_col, dtype=np.float64)
+
+    # Forward-fill: carry each asset's last known point down the column...
+    index = np.arange(len(timestamps))[:, None]
+    seen = np.where(~np.isnan(values), index, 0)
+    np.maximum.accumulate(seen, axis=0, out=seen)
+    columns = np.arange(len(asset_ids))
+    prices, values = prices[seen, columns], values[seen, columns]
+    # ...but not past its last point: a position missing from later polls was sold
+    sold = index > seen[-1]
+    prices[sold] = np.nan
+    values[sold] = np.nan
+    return timestamps, list(asset_ids), prices, np.nan_to_num(values, nan=0.0)
+
+
+def time_weighted_returns(prices: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Portfolio return per period (length n - 1): each position held at both
+    ends contributes its price change, weighted by its value at the start.
+    """
+    start, end = prices[:-1], prices[1:]
+    held = ~np.isnan(start) & ~np.isnan(end) & (np.nan_to_num(start) > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        moves = np.where(held, end / start - 1, 0.0)
+    weights = np.where(held, values[:-1], 0.0)
+    total = weights.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0, (weights * moves).sum(axis=1) / total, 0.0)
+
+
+def period_returns(series: np.ndarray) -> np.ndarray:
+    """Simple returns between consecutive points (length n - 1); 0 where the base is 0."""
+    series = np.asarray(series, dtype=np.float64)
+    base = series[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base != 0, np.diff(series) / base, 0.0)
+
+
+def rolling_volatility(series: np.ndarray, window: int) -> np.ndarray:
+    """Sample standard deviation of returns over each trailing `window` returns."""
+    returns = period_returns(series)
+    if window < 2 or len(returns) < window:
+        return np.empty(0)
+    windows = np.lib.stride_tricks.sliding_window_view(returns, window)
+    return windows.std(axis=1, ddof=1)
+
+
+def max_drawdown(series: np.ndarray) -> float:
+    """Largest peak-to-trough fall as a fraction of the peak (0.25 = -25%)."""
+    series = np.asarray(series, dtype=np.float64)
+    if series.size == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(series)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdowns = np.where(peaks > 0, (peaks - series) / peaks, 0.0)
+    return float(drawdowns.max())
+
+
+def portfolio_history_stats(points: Iterable[tuple[str, int, int, int]], window: int = 20) -> dict | None:
+    """
+    Time-weighted return, volatility and drawdown of the portfolio; None
+    without enough history. Volatility and drawdown are taken on the growth
+    index the returns compound to, so flows do not move them either.
+    """
+    timestamps, asset_ids, prices, values = history_matrix(points)
+    if len(timestamps) < 2:
+        return None
+    returns = time_weighted_returns(prices, values)
+    growth = np.concatenate(([1.0], np.cumprod(1 + returns)))
+    volatility = rolling_volatility(growth, min(window, len(returns)))
+    return {
+        "start": int(timestamps[0]),
+        "end": int(timestamps[-1]),
+        "assets": len(asset_ids),
+        "return_pct": float((growth[-1] - 1) * 100),
+        "volatility_pct": float(volatility[-1] * 100) if volatility.size else 0.0,
+        "max_drawdown_pct": max_drawdown(growth) * 100,
+    }
@@ -1,27 +1,54 @@
 """
 Chart generation for FINOVA reports.
-Outputs PNG files to /tmp/finova_charts/ and returns the path.
+Returns PNG bytes, ready to pass straight to `send_photo`.
+
+Rendering runs in a small worker process pool (matplotlib is neither fast
+nor thread-safe), so a slow chart never blocks the event loop. Renders are
+capped at CHART_MAX_CONCURRENT_RENDERS at a time and abandoned after
+CHART_RENDER_TIMEOUT_SECONDS. Call `shutdown_chart_pool()` on exit.
+matplotlib is only imported inside the workers, never in the bot process.
+
+Output is cached by a hash of the chart kind and its input data, so an
+identical chart (e.g. a repeated /relatorio) is never rendered twice.
 """
 
+import asyncio
+import hashlib
+import io
+import json
 import logging
-import os
-from pathlib import Path
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-import matplotlib
-matplotlib.use("Agg")  # Non-interactive backend — must be set before importing pyplot
-import matplotlib.pyplot as plt
+from src.config import settings
 
 logger = logging.getLogger(__name__)
 
-CHARTS_DIR = Path("/tmp/finova_charts")
+_pool: ProcessPoolExecutor | None = None
+_render_slots = asyncio.Semaphore(settings.chart_max_concurrent_renders)
+_cache: OrderedDict[str, bytes] = OrderedDict()
+
 
+# ── Renderers (run inside the worker processes) ──────────────────────────────
 
-def _ensure_charts_dir() -> None:
-    CHARTS_DIR.mkdir(parents=True, exist_ok=True)
+def _pyplot():
+    import matplotlib
+    matplotlib.use("Agg")  # Non-interactive backend — must be set before importing pyplot
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _to_png(plt, fig) -> bytes:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight", dpi=150)
+    plt.close(fig)
+    return buffer.getvalue()
 
 
-async def build_spending_chart(by_category: dict[str, int], title: str) -> str:
-    _ensure_charts_dir()
+def _render_spending_chart(by_category: dict[str, int], title: str) -> bytes:
+    plt = _pyplot()
     labels = list(by_category.keys())
     values = [v / 100 for v in by_category.values()]  # cents → BRL
 
@@ -36,16 +63,11 @@ async def build_spending_chart(by_category: dict[str, int], title: str) -> str:
     for text in autotexts:
         text.set_fontsize(9)
     ax.set_title(f"Gastos por Categoria\n{title}", fontsize=13, pad=15)
-
-    chart_path = str(CHARTS_DIR / "spending_pie.png")
-    fig.savefig(chart_path, bbox_inches="tight", dpi=150)
-    plt.close(fig)
-    logger.info("Chart saved to %s", chart_path)
-    return chart_path
+    return _to_png(plt, fig)
 
 
-async def build_balance_bar_chart(accounts: list[dict], title: str) -> str:
-    _ensure_charts_dir()
+def _render_balance_bar_chart(accounts: list[dict], title: str) -> bytes:
+    plt = _pyplot()
     labels = [f"{a['institution']}\n({a['type']})" for a in accounts]
     values = [a["balance_cents"] / 100 for a in accounts]
 
@@ -56,9 +78,72 @@ async def build_balance_bar_chart(accounts: list[dict], title: str) -> str:
     ax.set_ylabel("Saldo (R$)")
     ax.tick_params(axis="x", labelsize=9)
     fig.tight_layout()
+    return _to_png(plt, fig)
 
-    chart_path = str(CHARTS_DIR / "balance_bar.png")
-    fig.savefig(chart_path, bbox_inches="tight", dpi=150)
-    plt.close(fig)
-    logger.info("Chart saved to %s", chart_path)
-    return chart_path
+
+# ── Worker pool ──────────────────────────────────────────────────────────────
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.chart_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_chart_pool(kill: bool = False) -> None:
+    """Drop the worker pool. `kill` terminates its workers, e.g. one stuck in a render."""
+    global _pool
+    if _pool is None:
+        return
+    if kill:
+        # shutdown() alone leaves a busy worker running until its task ends
+        for process in list((_pool._processes or {}).values()):
+            process.terminate()
+    _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+
+async def _render(fn, *args):
+    async with _render_slots:
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(_get_pool(), fn, *args),
+                timeout=settings.chart_render_timeout_seconds,
+            )
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            # A hung or crashed worker can't be reclaimed — kill it, start a fresh pool next time
+            logger.warning("Chart render %s failed or timed out; recycling the worker pool.", fn.__name__)
+            shutdown_chart_pool(kill=True)
+            raise
+
+
+def _cache_key(fn, args: tuple) -> str:
+    raw = json.dumps([fn.__name__, args], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def _render_cached(fn, *args) -> bytes:
+    key = _cache_key(fn, args)
+    png = _cache.get(key)
+    if png is not None:
+        _cache.move_to_end(key)
+        logger.debug("Chart cache hit for %s.", fn.__name__)
+        return png
+    png = await _render(fn, *args)
+    _cache[key] = png
+    while len(_cache) > settings.chart_cache_size:
+        _cache.popitem(last=False)
+    return png
+
+
+async def build_spending_chart(by_category: dict[str, int], title: str) -> bytes:
+    return await _render_cached(_render_spending_chart, by_category, title)
+
+
+async def build_balance_bar_chart(accounts: list[dict], title: str) -> bytes:
+    return await _render_cached(_render_balance_bar_chart, accounts, title)
@@ -3,41 +3,38 @@ Builds the monthly financial report message and optional chart.
 """
 
 import logging
-from collections import defaultdict
 from datetime import datetime, timezone
 
-from src.database.crud import get_transactions_since
+from src.database.crud import get_rollup_by_category, get_rollup_totals, get_snapshot_points
 from src.database.models import AsyncSessionLocal
-from src.open_finance.transactions import fetch_transactions
-from src.database.crud import insert_transaction
+from src.open_finance.coordinator import coordinator
 from src.reports.charts import build_spending_chart
-from src.telegram.formatter import fmt_brl
+from src.telegram.formatter import fmt_brl, fmt_pct
 
 logger = logging.getLogger(__name__)
 
 
-async def build_monthly_report() -> tuple[str, str | None]:
-    # Fetch last 30 days
-    tx_result = await fetch_transactions(days=30)
+async def build_monthly_report() -> tuple[str, bytes | None]:
+    from src.reports.analytics import portfolio_history_stats  # NumPy loads on first use
 
-    async with AsyncSessionLocal() as session:
-        if not tx_result["error"]:
-            for t in tx_result["data"]:
-                await insert_transaction(session, t)
+    # Sync last 30 days — the sync stores new transactions itself
+    await coordinator.sync_transactions(days=30)
 
+    async with AsyncSessionLocal() as session:
         now = datetime.now(tz=timezone.utc)
-        # First day of current month
-        since = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        transactions = await get_transactions_since(session, since)
+        # First day of current month — whole days, so the daily rollups answer it
+        since = now.replace(day=1).date()
+        totals = await get_rollup_totals(session, since)
+        by_category = {
+            cat: sums["spent_cents"]
+            for cat, sums in (await get_rollup_by_category(session, since)).items()
+            if sums["spent_cents"]
+        }
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        portfolio = portfolio_history_stats(await get_snapshot_points(session, month_start))
 
-    debits = [t for t in transactions if t.amount_cents < 0]
-    credits = [t for t in transactions if t.amount_cents > 0]
-    total_spent = abs(sum(t.amount_cents for t in debits))
-    total_received = sum(t.amount_cents for t in credits)
-
-    by_category: dict[str, int] = defaultdict(int)
-    for tx in debits:
-        by_category[tx.category] += abs(tx.amount_cents)
+    total_spent = totals["spent_cents"]
+    total_received = totals["received_cents"]
 
     month_name = now.strftime("%B %Y")
     lines = [
@@ -45,7 +42,7 @@ async def build_monthly_report() -> tuple[str, str | None]:
         f"*Total recebido:* {fmt_brl(total_received)}",
         f"*Total gasto:* {fmt_brl(total_spent)}",
         f"*Saldo do mês:* {fmt_brl(total_received - total_spent)}",
-        f"*Transações:* {len(transactions)}",
+        f"*Transações:* {totals['count']}",
     ]
 
     if by_category:
@@ -54,11 +51,17 @@ async def build_monthly_report() -> tuple[str, str | None]:
             pct = (amount / total_spent * 100) if total_spent else 0
             lines.append(f"  • {cat}: {fmt_brl(amount)} ({pct:.1f}%)")
 
-    chart_path: str | None = None
+    if portfolio:
+        lines.append("\n*Carteira no mês:*")
+        lines.append(f"  • Retorno: {fmt_pct(portfolio['return_pct'])}")
+        lines.append(f"  • Volatilidade: {portfolio['volatility_pct']:.2f}%")
+        lines.append(f"  • Queda máxima: {fmt_pct(-portfolio['max_drawdown_pct'])}")
+
+    chart: bytes | None = None
     if by_category:
         try:
-            chart_path = await build_spending_chart(by_category, month_name)
+            chart = await build_spending_chart(by_category, month_name)
         except Exception as exc:
             logger.warning("Chart generation failed: %s", exc)
 
-    return "\n".join(lines), chart_path
+    return "\n".join(lines), chart
@@ -0,0 +1,241 @@
+"""
+Outbound Telegram message queue.
+
+Watchers and scheduled jobs enqueue messages instead of calling the Bot API
+inline; a single sender task delivers them. The sender:
+
+- paces sends with a global and a per-chat token bucket (Telegram allows
+  roughly 30 msg/s overall and 1 msg/s per chat before flood control);
+- waits out `RetryAfter` and retries transient network errors;
+- merges a burst of messages that share a `coalesce` key for the same chat
+  into one digest, split at line boundaries to fit Telegram's 4096-character
+  limit;
+- resends a message as plain text if Telegram cannot parse its Markdown.
+
+Call `start(bot)` once the Application is running and `stop()` on shutdown;
+`stop()` drains what is already queued. `enqueue()` returns a future that
+resolves to True once the message (or the digest holding it) was delivered,
+or False if delivery was given up on.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, field, replace
+from datetime import timedelta
+
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError, TimedOut
+
+from src.config import settings
+from src.utils.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096
+_DIGEST_SEPARATOR = "\n\n"
+
+
+@dataclass
+class OutboundMessage:
+    chat_id: int | str
+    text: str
+    parse_mode: str | None = "Markdown"
+    photo: bytes | None = None  # sent with `text` as the caption
+    coalesce: str | None = None  # messages with the same key may merge into a digest
+    delivered: asyncio.Future | None = field(default=None, repr=False)
+
+
+def _retry_after_seconds(exc: RetryAfter) -> float:
+    delay = exc.retry_after
+    return delay.total_seconds() if isinstance(delay, timedelta) else float(delay)
+
+
+def _split_lines(text: str, limit: int) -> list[str]:
+    """
+    Break `text` into pieces of at most `limit` characters at line boundaries,
+    so Markdown entities (which never span lines in our messages) stay whole.
+    Only a single line longer than `limit` is cut mid-line.
+    """
+    if len(text) <= limit:
+        return [text]
+    pieces: list[str] = []
+    current: str | None = None
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current is not None:
+                pieces.append(current)
+                current = None
+            pieces.append(line[:limit])
+            line = line[limit:]
+        candidate = line if current is None else f"{current}\n{line}"
+        if len(candidate) > limit:
+            pieces.append(current)
+            candidate = line
+        current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def build_digest(texts: list[str], limit: int = MAX_MESSAGE_LENGTH) -> list[str]:
+    """Join `texts` under a count header, packed into as few messages as fit `limit`."""
+    if len(texts) == 1:
+        return _split_lines(texts[0], limit)
+    parts = [f"*{len(texts)} alertas*"] + texts
+    chunks: list[str] = []
+    current = ""
+    for part in parts:
+        for piece in _split_lines(part, limit):
+            candidate = f"{current}{_DIGEST_SEPARATOR}{piece}" if current else piece
+            if len(candidate) > limit:
+                chunks.append(current)
+                candidate = piece
+            current = candidate
+    chunks.append(current)
+    return chunks
+
+
+class TelegramDispatcher:
+    def __init__(self) -> None:
+        self._bot = None
+        self._queue: asyncio.Queue[OutboundMessage] = asyncio.Queue()
+        self._held: deque[OutboundMessage] = deque()  # pulled during a coalesce window
+        self._global = TokenBucket(rate=settings.telegram_global_rate, capacity=settings.telegram_global_rate)
+        self._per_chat: dict[int | str, TokenBucket] = {}
+        self._task: asyncio.Task | None = None
+
+    def enqueue(
+        self,
+        chat_id: int | str,
+        text: str,
+        parse_mode: str | None = "Markdown",
+        photo: bytes | None = None,
+        coalesce: str | None = None,
+    ) -> asyncio.Future:
+        delivered = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(OutboundMessage(chat_id, text, parse_mode, photo, coalesce, delivered))
+        return delivered
+
+    def start(self, bot) -> None:
+        self._bot = bot
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="telegram_dispatcher")
+            logger.info("Telegram dispatcher started.")
+
+    async def stop(self, timeout: float = 10) -> None:
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Telegram dispatcher stopped with %d message(s) unsent.", self.pending)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Telegram dispatcher stopped.")
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._held)
+
+    async def _drain(self) -> None:
+        # Held messages were taken off the queue but are not task_done yet
+        await self._queue.join()
+
+    # ── Sender task ──────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            ok = False
+            try:
+                ok = await self._deliver(batch)
+            except Exception as exc:
+                logger.error("Telegram dispatcher failed to deliver %d message(s): %s", len(batch), exc)
+            finally:
+                for message in batch:
+                    if message.delivered is not None and not message.delivered.done():
+                        message.delivered.set_result(ok)
+                    self._queue.task_done()
+
+    async def _next_batch(self) -> list[OutboundMessage]:
+        first = self._held.popleft() if self._held else await self._queue.get()
+        if first.coalesce is None or first.photo is not None:
+            return [first]
+
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.telegram_coalesce_window_seconds
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                message = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if (message.chat_id, message.coalesce, message.photo) == (first.chat_id, first.coalesce, None):
+                batch.append(message)
+            else:
+                self._held.append(message)
+        return batch
+
+    async def _deliver(self, batch: list[OutboundMessage]) -> bool:
+        first = batch[0]
+        if len(batch) > 1:
+            logger.info("Coalescing %d '%s' messages into a digest.", len(batch), first.coalesce)
+        results = [
+            await self._send(OutboundMessage(first.chat_id, text, first.parse_mode, first.photo))
+            for text in build_digest([m.text for m in batch])
+        ]
+        return all(results)
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._per_chat.get(chat_id)
+        if bucket is None:
+            bucket = self._per_chat[chat_id] = TokenBucket(rate=settings.telegram_chat_rate, capacity=1)
+        return bucket
+
+    async def _send(self, message: OutboundMessage) -> bool:
+        for attempt in range(settings.telegram_send_retries + 1):
+            await self._global.acquire()
+            await self._chat_bucket(message.chat_id).acquire()
+            try:
+                if message.photo is not None:
+                    await self._bot.send_photo(
+                        chat_id=message.chat_id,
+                        photo=message.photo,
+                        caption=message.text,
+                        parse_mode=message.parse_mode,
+                    )
+                else:
+                    await self._bot.send_message(
+                        chat_id=message.chat_id,
+                        text=message.text,
+                        parse_mode=message.parse_mode,
+                    )
+                return True
+            except RetryAfter as exc:
+                delay = _retry_after_seconds(exc)
+                logger.warning("Telegram flood control: retrying in %.0fs.", delay)
+            except BadRequest as exc:  # a NetworkError subclass, but never transient
+                if message.parse_mode is not None and "parse entities" in str(exc).lower():
+                    # Broken Markdown (e.g. a line cut to fit): better plain than lost
+                    logger.warning("Telegram could not parse message to %s; resending as plain text.", message.chat_id)
+                    return await self._send(replace(message, parse_mode=None))
+                logger.error("Telegram rejected message to %s: %s", message.chat_id, exc)
+                return False
+            except (TimedOut, NetworkError) as exc:
+                delay = 2 ** attempt
+                logger.warning("Telegram send failed (%s); retrying in %ds.", exc, delay)
+            except TelegramError as exc:
+                logger.error("Telegram rejected message to %s: %s", message.chat_id, exc)
+                return False
+            if attempt < settings.telegram_send_retries:
+                await asyncio.sleep(delay)
+        logger.error("Giving up on Telegram message to %s after %d attempts.", message.chat_id, attempt + 1)
+        return False
+
+
+# Module-level singleton
+dispatcher = TelegramDispatcher()
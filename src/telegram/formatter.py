@@ -5,6 +5,8 @@ Converts raw data dicts into human-readable Markdown strings.
 
 from datetime import datetime
 
+from telegram.helpers import escape_markdown
+
 from src.database.models import Account, Investment, Transaction
 
 
@@ -51,8 +53,10 @@ def fmt_transactions(transactions: list[Transaction], title: str = "Extrato") ->
 def fmt_investments(investments: list[Investment]) -> str:
     if not investments:
         return "Nenhum ativo na carteira."
+    from src.reports.analytics import summarize_portfolio  # NumPy loads on first use
+
     lines = ["*Carteira de Investimentos*\n"]
-    total = 0
+    summary = summarize_portfolio(investments)
     for inv in investments:
         arrow = "📈" if inv.daily_change_pct >= 0 else "📉"
         lines.append(
@@ -61,8 +65,11 @@ def fmt_investments(investments: list[Investment]) -> str:
             f" = *{fmt_brl(inv.total_value_cents)}*\n"
             f"   Hoje: {fmt_pct(inv.daily_change_pct)}"
         )
-        total += inv.total_value_cents
-    lines.append(f"\n*Total investido: {fmt_brl(total)}*")
+    lines.append(f"\n*Total investido: {fmt_brl(summary['total_value_cents'])}*")
+    lines.append(
+        f"Resultado: {fmt_brl(summary['pnl_cents'])} ({fmt_pct(summary['return_pct'])})"
+        f" · Hoje: {fmt_brl(summary['day_pnl_cents'])}"
+    )
     return "\n".join(lines)
 
 
@@ -84,7 +91,7 @@ def fmt_large_transaction_alert(tx: Transaction) -> str:
     return (
         f"{emoji} *Transação Detectada*\n\n"
         f"*{fmt_brl(abs(tx.amount_cents))}* ({direction})\n"
-        f"{tx.description}\n"
-        f"Categoria: {tx.category}\n"
+        f"{escape_markdown(tx.description, version=1)}\n"
+        f"Categoria: {escape_markdown(tx.category, version=1)}\n"
         f"Data: {date_str}"
     )
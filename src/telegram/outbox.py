@@ -0,0 +1,104 @@
+"""
+Background worker draining the notification_outbox table.
+
+Producers (the watchers) commit outbox rows and call `wake()`. The worker
+claims a batch in id order under a lease and hands it to the dispatcher,
+which still coalesces and rate-limits. Rows are acked only after delivery,
+so delivery is at-least-once. Undelivered rows are retried once their lease
+expires, and a restart releases stale leases so the backlog drains at once.
+A row still undelivered after OUTBOX_MAX_ATTEMPTS claims (e.g. one Telegram
+keeps rejecting) is marked failed so it cannot block or flood the queue.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from src.config import settings
+from src.database.crud import (
+    ack_notifications,
+    claim_notifications,
+    fail_notifications,
+    purge_sent_notifications,
+    release_notification_claims,
+)
+from src.database.models import AsyncSessionLocal
+from src.telegram.dispatcher import dispatcher
+
+logger = logging.getLogger(__name__)
+
+_SENT_RETENTION = timedelta(days=7)
+
+
+class OutboxWorker:
+    def __init__(self) -> None:
+        self._wakeup = asyncio.Event()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        logger.info("OutboxWorker started.")
+        async with AsyncSessionLocal() as session:
+            released = await release_notification_claims(session)
+            await purge_sent_notifications(session, datetime.now(tz=timezone.utc) - _SENT_RETENTION)
+        if released:
+            logger.info("Released %d stale outbox claim(s).", released)
+
+        while True:
+            try:
+                drained = await self.drain_once()
+            except asyncio.CancelledError:
+                logger.info("OutboxWorker stopped.")
+                raise
+            except Exception as exc:
+                logger.error("OutboxWorker error: %s", exc)
+                drained = 0
+            if drained:
+                continue  # keep going while there is a backlog
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.outbox_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain_once(self) -> int:
+        """Claim, send and ack one batch. Returns the number of rows claimed."""
+        async with AsyncSessionLocal() as session:
+            batch = await claim_notifications(
+                session,
+                limit=settings.outbox_batch_size,
+                lease_seconds=settings.outbox_lease_seconds,
+            )
+        if not batch:
+            return 0
+
+        deliveries = [
+            dispatcher.enqueue(row.chat_id, row.text, coalesce=row.coalesce)
+            for row in batch
+        ]
+        outcomes = await asyncio.gather(*deliveries, return_exceptions=True)
+        delivered = [row.id for row, ok in zip(batch, outcomes) if ok is True]
+        undelivered = [row for row, ok in zip(batch, outcomes) if ok is not True]
+        exhausted = [row.id for row in undelivered if row.attempts >= settings.outbox_max_attempts]
+        if delivered or exhausted:
+            async with AsyncSessionLocal() as session:
+                if delivered:
+                    await ack_notifications(session, delivered)
+                if exhausted:
+                    await fail_notifications(session, exhausted)
+        if exhausted:
+            logger.error(
+                "Giving up on %d outbox message(s) after %d attempts: %s",
+                len(exhausted), settings.outbox_max_attempts, exhausted,
+            )
+        if len(undelivered) > len(exhausted):
+            logger.warning(
+                "%d outbox message(s) undelivered; retrying after the lease expires.",
+                len(undelivered) - len(exhausted),
+            )
+        return len(batch)
+
+
+# Module-level singleton
+outbox = OutboxWorker()
@@ -1,60 +1,103 @@
 """
-Polls the Open Finance API every POLL_INTERVAL_SECONDS for investment swings.
+Polls the Open Finance API for investment swings during market hours
+(scheduled by src.triggers.scheduler).
 Fires Telegram alerts when any position moves ±INVESTMENT_ALERT_THRESHOLD%.
+Every changed poll is also appended to the investment_snapshots history,
+which is downsampled about once an hour.
 """
 
-import asyncio
+import json
 import logging
+import time
+from datetime import datetime, timezone
 
 from telegram.ext import Application
 
 from src.config import settings
-from src.database.crud import clear_investment_alerts, upsert_investment
+from src.database.crud import (
+    append_investment_snapshots,
+    clear_investment_alerts,
+    downsample_investment_snapshots,
+    enqueue_notifications,
+    get_investments_with_alert,
+    upsert_investments_bulk,
+)
 from src.database.models import AsyncSessionLocal
-from src.open_finance.investments import fetch_investments
+from src.open_finance.client import client
+from src.open_finance.coordinator import coordinator
+from src.open_finance.http_cache import body_hash
 from src.telegram.formatter import fmt_investment_alert
+from src.telegram.outbox import outbox
 
 logger = logging.getLogger(__name__)
 
+_DOWNSAMPLE_EVERY_SECONDS = 3600
+
+
+def _fingerprint(rows: list[dict]) -> str:
+    # last_updated is stamped on every fetch, so it is left out
+    stable = [{k: v for k, v in row.items() if k != "last_updated"} for row in rows]
+    return body_hash(json.dumps(stable, sort_keys=True, default=str).encode())
+
 
 class InvestmentWatcher:
     def __init__(self, app: Application) -> None:
         self._app = app
         self._chat_id = settings.telegram_chat_id
+        self._last_downsample: float | None = None
+        self._persisted: str | None = None  # fingerprint of the last stored payload
 
-    async def run(self) -> None:
-        logger.info("InvestmentWatcher started (interval=%ds).", settings.poll_interval_seconds)
-        while True:
-            try:
-                await self._poll()
-            except asyncio.CancelledError:
-                logger.info("InvestmentWatcher stopped.")
-                break
-            except Exception as exc:
-                logger.error("InvestmentWatcher error: %s", exc)
-            await asyncio.sleep(settings.poll_interval_seconds)
-
-    async def _poll(self) -> None:
-        result = await fetch_investments()
+    async def poll(self) -> bool:
+        """One poll; returns True when it found something new."""
+        if client.breaker.is_open:
+            logger.info("Open Finance API circuit is open; skipping this poll.")
+            return False
+        result = await coordinator.investments()
         if result["error"]:
             logger.warning("Investment fetch error: %s", result["message"])
-            return
+            return False
+        # Compared with what this watcher last stored, not with the client's
+        # `changed` flag: other callers advance that, and a failed write must
+        # be retried on the next poll even if the API has not changed since
+        fingerprint = _fingerprint(result["data"])
+        if fingerprint == self._persisted:
+            logger.debug("Investments unchanged since the last stored poll; nothing to do.")
+            return False
 
         async with AsyncSessionLocal() as session:
-            for inv_data in result["data"]:
-                inv = await upsert_investment(session, inv_data)
-                if inv.alert_triggered:
-                    await self._send_alert(inv)
-                    inv.alert_triggered = False
-            await session.commit()
-
-    async def _send_alert(self, inv) -> None:
-        try:
-            text = fmt_investment_alert(inv)
-            await self._app.bot.send_message(
-                chat_id=self._chat_id,
-                text=text,
-                parse_mode="Markdown",
-            )
-        except Exception as exc:
-            logger.error("Failed to send investment alert for %s: %s", inv.ticker, exc)
+            await append_investment_snapshots(session, result["data"], datetime.now(tz=timezone.utc))
+            await upsert_investments_bulk(session, result["data"])
+            alerted = await get_investments_with_alert(session)
+            if alerted:
+                # Queue first: a crash before the clear re-queues under the same keys
+                await enqueue_notifications(session, [self._alert(inv) for inv in alerted])
+                await clear_investment_alerts(session)
+            await self._maybe_downsample(session)
+        self._persisted = fingerprint
+        if alerted:
+            outbox.wake()
+        return True
+
+    async def _maybe_downsample(self, session) -> None:
+        now = time.monotonic()
+        if self._last_downsample is not None and now - self._last_downsample < _DOWNSAMPLE_EVERY_SECONDS:
+            return
+        self._last_downsample = now
+        removed = await downsample_investment_snapshots(
+            session,
+            hourly_after=settings.snapshot_hourly_after_hours * 3600,
+            daily_after=settings.snapshot_daily_after_days * 86400,
+        )
+        if removed:
+            logger.info("Downsampled investment history (%d points merged).", removed)
+
+    def _alert(self, inv) -> dict:
+        # At most one alert per asset, direction and day
+        direction = "up" if inv.daily_change_pct > 0 else "down"
+        today = datetime.now(tz=timezone.utc).date().isoformat()
+        return {
+            "idempotency_key": f"inv-alert:{inv.asset_id}:{today}:{direction}",
+            "chat_id": self._chat_id,
+            "text": fmt_investment_alert(inv),
+            "coalesce": "investments",
+        }
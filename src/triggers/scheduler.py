@@ -0,0 +1,166 @@
+"""
+Adaptive, fixed-rate scheduler for the polling watchers.
+
+Each job is polled on a fixed-rate grid anchored to its start time, so the
+period does not drift by however long a poll took. On top of that grid:
+
+- jobs are staggered evenly across the first interval and every tick gets a
+  little random jitter, so watchers never hit the API in lockstep;
+- the interval adapts: back to the minimum right after a poll that found a
+  change, growing towards the maximum while nothing happens, and pinned to
+  the maximum during quiet hours;
+- a job with an activity window (investments: market hours on weekdays)
+  is paused outside it and resumes at the next opening.
+
+A job's poll function returns True when it saw a change.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, time as dtime, timedelta
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_FACTOR = 1.5
+
+
+def parse_window(text: str) -> tuple[dtime, dtime]:
+    """'HH:MM-HH:MM' → (start, end). The window may wrap past midnight."""
+    start, end = (dtime.fromisoformat(part.strip()) for part in text.split("-"))
+    return start, end
+
+
+def in_window(moment: dtime, window: tuple[dtime, dtime]) -> bool:
+    start, end = window
+    if start <= end:
+        return start <= moment < end
+    return moment >= start or moment < end
+
+
+def is_market_open(now: datetime) -> bool:
+    return now.weekday() < 5 and in_window(now.time(), parse_window(settings.market_hours))
+
+
+def next_market_open(now: datetime) -> datetime:
+    opening, _ = parse_window(settings.market_hours)
+    candidate = now.replace(hour=opening.hour, minute=opening.minute, second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+@dataclass
+class PollJob:
+    name: str
+    poll: Callable[[], Awaitable[bool]]
+    base_interval: float
+    min_interval: float
+    max_interval: float
+    active: Callable[[datetime], bool] | None = None  # None: always active
+    next_active: Callable[[datetime], datetime] | None = None
+    interval: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.interval = self.base_interval
+
+    def adapt(self, changed: bool, quiet: bool) -> None:
+        if quiet:
+            self.interval = self.max_interval
+        elif changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * BACKOFF_FACTOR, self.max_interval)
+        self.interval = max(self.interval, self.min_interval)
+
+
+class PollScheduler:
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        now: Callable[[], datetime] = lambda: datetime.now(tz=settings.tz),
+    ) -> None:
+        self._jobs: list[PollJob] = []
+        self._clock = clock
+        self._now = now
+
+    def add(self, job: PollJob) -> None:
+        self._jobs.append(job)
+
+    def _is_quiet(self, now: datetime) -> bool:
+        return in_window(now.time(), parse_window(settings.quiet_hours))
+
+    def _jitter(self, interval: float) -> float:
+        spread = interval * settings.poll_jitter_fraction
+        return random.uniform(-spread, spread)
+
+    async def run(self) -> None:
+        tasks = [
+            asyncio.create_task(self._run_job(job, offset=i * job.base_interval / len(self._jobs)), name=f"poll:{job.name}")
+            for i, job in enumerate(self._jobs)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_job(self, job: PollJob, offset: float) -> None:
+        logger.info("Polling '%s' (base interval=%.0fs).", job.name, job.base_interval)
+        anchor = self._clock() + offset
+        while True:
+            await asyncio.sleep(max(anchor + self._jitter(job.interval) - self._clock(), 0))
+
+            now = self._now()
+            if job.active is not None and not job.active(now):
+                resume = job.next_active(now) if job.next_active else now + timedelta(seconds=job.max_interval)
+                pause = max((resume - now).total_seconds(), 0)
+                logger.info("Pausing '%s' until %s.", job.name, resume.isoformat(timespec="minutes"))
+                anchor = self._clock() + pause
+                job.interval = job.base_interval
+                continue
+
+            try:
+                changed = await job.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error("Poll '%s' failed: %s", job.name, exc)
+                changed = False
+            job.adapt(bool(changed), quiet=self._is_quiet(now))
+
+            # Fixed rate: advance the anchor; if a poll overran, skip missed ticks
+            anchor += job.interval
+            if anchor < self._clock():
+                anchor = self._clock()
+
+
+def _bounds(base_interval: float) -> dict:
+    return dict(
+        base_interval=base_interval,
+        min_interval=min(settings.poll_min_interval_seconds, base_interval),
+        max_interval=max(settings.poll_max_interval_seconds, base_interval),
+    )
+
+
+def build_watcher_scheduler(transaction_watcher, investment_watcher) -> PollScheduler:
+    scheduler = PollScheduler()
+    # With webhooks pushing new transactions, polling is only a safety net
+    tx_interval = settings.webhook_safety_poll_seconds if settings.webhook_enabled else settings.poll_interval_seconds
+    scheduler.add(PollJob("transactions", transaction_watcher.poll, **_bounds(tx_interval)))
+    scheduler.add(PollJob(
+        "investments",
+        investment_watcher.poll,
+        active=is_market_open,
+        next_active=next_market_open,
+        **_bounds(settings.poll_interval_seconds),
+    ))
+    return scheduler
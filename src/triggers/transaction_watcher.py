@@ -1,69 +1,106 @@
 """
-Polls the Open Finance API every POLL_INTERVAL_SECONDS for new transactions.
+Polls the Open Finance API for new transactions (scheduled by
+src.triggers.scheduler, and on demand by src.triggers.webhook).
+Only data newer than each account's sync watermark is requested.
 Fires Telegram alerts for new or large transactions.
+
+Each poll runs in stages so no DB session is open while Telegram is slow:
+  1. ingest — the sync stores the new batch with one commit and returns
+     the rows it inserted;
+  2. select — the large ones among those are picked, plus any large row a
+     crashed poll left un-notified within ALERT_LOOKBACK;
+  3. queue — their alerts are written to the notification outbox and every
+     row decided on (alerted or too small) is flagged notified, in one commit;
+  4. send — the outbox worker delivers them (at least once) and acks.
+Alerts follow ingestion, not transaction dates: a posting dated yesterday
+that first shows up today still alerts. A crash before stage 3 leaves rows
+un-notified, so they are picked up on the next poll; after it, the outbox
+still holds the alert.
 """
 
-import asyncio
 import logging
+from datetime import datetime, timedelta, timezone
 
 from telegram.ext import Application
 
 from src.config import settings
 from src.database.crud import (
+    enqueue_transaction_alerts,
     get_unnotified_transactions,
-    insert_transaction,
-    mark_transaction_notified,
 )
 from src.database.models import AsyncSessionLocal
-from src.open_finance.transactions import fetch_transactions
+from src.open_finance.client import client
+from src.open_finance.coordinator import coordinator
+from src.open_finance.resilience import CircuitOpenError
 from src.telegram.formatter import fmt_large_transaction_alert
+from src.telegram.outbox import outbox
 
 logger = logging.getLogger(__name__)
 
 LARGE_THRESHOLD_CENTS = settings.large_transaction_threshold * 100
 
+# How far back a crashed poll's un-notified rows are still recovered
+ALERT_LOOKBACK = timedelta(days=1)
+
 
 class TransactionWatcher:
     def __init__(self, app: Application) -> None:
         self._app = app
         self._chat_id = settings.telegram_chat_id
 
-    async def run(self) -> None:
-        logger.info("TransactionWatcher started (interval=%ds).", settings.poll_interval_seconds)
-        while True:
-            try:
-                await self._poll()
-            except asyncio.CancelledError:
-                logger.info("TransactionWatcher stopped.")
-                break
-            except Exception as exc:
-                logger.error("TransactionWatcher error: %s", exc)
-            await asyncio.sleep(settings.poll_interval_seconds)
-
-    async def _poll(self) -> None:
-        result = await fetch_transactions(days=1)
+    async def poll(self, account_ids: list[str] | None = None) -> bool:
+        """
+        One poll of `account_ids` (all accounts by default); returns True when
+        it found something new.
+        """
+        if client.breaker.is_open:
+            logger.info("Open Finance API circuit is open; skipping this poll.")
+            return False
+        result = await coordinator.sync_transactions(days=1, account_ids=account_ids)
         if result["error"]:
+            # Still fall through: alerts left undelivered earlier are retried
             logger.warning("Transaction fetch error: %s", result["message"])
-            return
+        queued = await self._queue_alerts(result["data"] or [])
+        return queued or bool(result["data"])
+
+    async def ingest(self, account_ids: list[str] | None = None) -> None:
+        """
+        The webhook server's ingest callback: a poll that raises when the sync
+        could not run (circuit open or fetch error), so the server keeps the
+        events and retries them instead of losing them.
+        """
+        if client.breaker.is_open:
+            raise CircuitOpenError("Open Finance API circuit is open")
+        result = await coordinator.sync_transactions(days=1, account_ids=account_ids)
+        await self._queue_alerts(result["data"] or [])
+        if result["error"]:
+            raise RuntimeError(f"Transaction fetch error: {result['message']}")
 
+    async def _queue_alerts(self, inserted: list) -> bool:
+        """Queue alerts for the large rows among `inserted`; flag all of them."""
+        large = {tx.transaction_id: tx for tx in inserted if abs(tx.amount_cents) >= LARGE_THRESHOLD_CENTS}
+        quiet = [tx.transaction_id for tx in inserted if tx.transaction_id not in large]
+        since = datetime.now(tz=timezone.utc) - ALERT_LOOKBACK
         async with AsyncSessionLocal() as session:
-            for tx_data in result["data"]:
-                tx = await insert_transaction(session, tx_data)
-                if tx is None:
-                    continue  # already in DB
+            leftover = await get_unnotified_transactions(session, since=since, min_abs_cents=LARGE_THRESHOLD_CENTS)
+            for tx in leftover:
+                large.setdefault(tx.transaction_id, tx)
+            if not large and not quiet:
+                return False
+            pending = sorted(large.values(), key=lambda tx: tx.timestamp)
+            added = await enqueue_transaction_alerts(session, [self._alert(tx) for tx in pending], quiet_ids=quiet)
 
-                # Alert on large transactions
-                if abs(tx.amount_cents) >= LARGE_THRESHOLD_CENTS:
-                    await self._send_alert(tx)
-                    await mark_transaction_notified(session, tx.transaction_id)
+        if not pending:
+            return False
+        logger.info("Queued %d transaction alert(s).", added)
+        outbox.wake()
+        return True
 
-    async def _send_alert(self, tx) -> None:
-        try:
-            text = fmt_large_transaction_alert(tx)
-            await self._app.bot.send_message(
-                chat_id=self._chat_id,
-                text=text,
-                parse_mode="Markdown",
-            )
-        except Exception as exc:
-            logger.error("Failed to send transaction alert: %s", exc)
+    def _alert(self, tx) -> dict:
+        return {
+            "transaction_id": tx.transaction_id,
+            "idempotency_key": f"tx-alert:{tx.transaction_id}",
+            "chat_id": self._chat_id,
+            "text": fmt_large_transaction_alert(tx),
+            "coalesce": "transactions",  # a burst is merged into one digest
+        }
@@ -0,0 +1,217 @@
+"""
+Optional push ingestion: a small HTTP endpoint for Pluggy webhooks.
+
+Pluggy calls WEBHOOK_PATH on item and transaction events. Each request must
+carry WEBHOOK_SECRET in the X-Webhook-Secret header (set as a custom header
+on the Pluggy webhook); it is checked in constant time before the body is
+read. Verified events are answered with 202 straight away and the accounts
+they name are collected; one ingest task hands them to the transaction
+watcher, so a burst of webhooks costs a single sync. An event's eventId is
+remembered only once its ingest succeeded, so redeliveries of it are dropped;
+if the ingest fails (or the API circuit is open) its accounts are queued
+again and retried with backoff, and a redelivery in the meantime is kept.
+
+While webhooks are on, transaction polling runs only as a slow safety net
+(WEBHOOK_SAFETY_POLL_SECONDS). The server uses plain asyncio streams: one
+POST route, no keep-alive, a bounded body.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from urllib.parse import urlsplit
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Webhook-Secret"
+MAX_BODY_BYTES = 64 * 1024
+ALL_ACCOUNTS = "*"
+
+_READ_TIMEOUT_SECONDS = 10
+_SEEN_EVENTS = 1024
+_RETRY_BASE_SECONDS = 5.0
+_RETRY_MAX_SECONDS = 300.0
+_ITEM_SYNC_EVENTS = {"item/created", "item/updated"}
+_REASONS = {
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+}
+
+
+def event_accounts(payload: dict) -> set[str]:
+    """
+    Accounts a webhook event asks to sync: its accountId for transaction
+    events, {ALL_ACCOUNTS} when the whole item was updated, empty to ignore.
+    """
+    event = payload.get("event", "")
+    if payload.get("itemId") not in (None, settings.pluggy_item_id):
+        return set()
+    if event.startswith("transactions/") and payload.get("accountId"):
+        return {payload["accountId"]}
+    if event in _ITEM_SYNC_EVENTS:
+        return {ALL_ACCOUNTS}
+    return set()
+
+
+def _response(status: int) -> bytes:
+    return (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        "Content-Length: 0\r\n"
+        "Connection: close\r\n\r\n"
+    ).encode("ascii")
+
+
+class WebhookServer:
+    def __init__(
+        self,
+        ingest: Callable[[list[str] | None], Awaitable[object]],
+        secret: str | None = None,
+        host: str | None = None,
+        port: int | None = None,
+        path: str | None = None,
+    ) -> None:
+        secret = settings.webhook_secret if secret is None else secret
+        if not secret:
+            raise RuntimeError("WEBHOOK_SECRET must be set to accept webhooks.")
+        self._ingest = ingest  # called with account IDs, or None for all accounts
+        self._secret = secret.encode()
+        self._host = settings.webhook_host if host is None else host
+        self._port = settings.webhook_port if port is None else port
+        self._path = path or settings.webhook_path
+        self._pending: set[str] = set()
+        self._pending_events: set[str] = set()  # eventIds behind `_pending`
+        self._wakeup = asyncio.Event()
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._server: asyncio.Server | None = None
+        self._worker: asyncio.Task | None = None
+
+    @property
+    def port(self) -> int:
+        """The bound port (differs from the configured one when that is 0)."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        self._worker = asyncio.create_task(self._run_ingest(), name="webhook_ingest")
+        logger.info("Webhook server listening on %s:%d%s.", self._host, self.port, self._path)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        logger.info("Webhook server stopped.")
+
+    async def run(self) -> None:
+        await self.start()
+        try:
+            await self._worker
+        finally:
+            await self.stop()
+
+    def accept(self, payload: dict) -> None:
+        """Queue the accounts named by a verified event for the next ingest."""
+        event_id = payload.get("eventId")
+        if event_id is not None and (event_id in self._seen or event_id in self._pending_events):
+            logger.debug("Dropping redelivered webhook event %s.", event_id)
+            return
+
+        accounts = event_accounts(payload)
+        if not accounts:
+            logger.debug("Ignoring webhook event %r.", payload.get("event"))
+            return
+        self._pending |= accounts
+        if event_id is not None:
+            self._pending_events.add(event_id)
+        self._wakeup.set()
+
+    def _remember(self, event_ids: set[str]) -> None:
+        for event_id in event_ids:
+            self._seen[event_id] = None
+        while len(self._seen) > _SEEN_EVENTS:
+            self._seen.popitem(last=False)
+
+    # ── HTTP ─────────────────────────────────────────────────────────────────
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status = await asyncio.wait_for(self._read_request(reader), _READ_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            status = 400
+        try:
+            writer.write(_response(status))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+        if status != 202:
+            logger.warning("Rejected webhook request (%d).", status)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> int:
+        head = await reader.readuntil(b"\r\n\r\n")
+        request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+        method, target, _ = request_line.split(" ", 2)
+        headers = {}
+        for line in header_lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if urlsplit(target).path != self._path:
+            return 404
+        if method != "POST":
+            return 405
+        if not hmac.compare_digest(headers.get(SECRET_HEADER.lower(), "").encode(), self._secret):
+            return 401
+        length = int(headers.get("content-length", "0"))
+        if length < 0:
+            return 400
+        if length > MAX_BODY_BYTES:
+            return 413
+
+        payload = json.loads(await reader.readexactly(length))
+        if not isinstance(payload, dict):
+            return 400
+        self.accept(payload)
+        return 202
+
+    # ── Ingest task ──────────────────────────────────────────────────────────
+
+    async def _run_ingest(self) -> None:
+        delay = _RETRY_BASE_SECONDS
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            pending, self._pending = self._pending, set()
+            events, self._pending_events = self._pending_events, set()
+            account_ids = None if ALL_ACCOUNTS in pending else sorted(pending)
+            logger.info("Webhook ingest for %s.", "all accounts" if account_ids is None else account_ids)
+            try:
+                await self._ingest(account_ids)
+            except Exception as exc:
+                logger.error("Webhook ingest failed (%s); retrying in %.0fs.", exc, delay)
+                self._pending |= pending
+                self._pending_events |= events
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _RETRY_MAX_SECONDS)
+                self._wakeup.set()
+                continue
+            delay = _RETRY_BASE_SECONDS
+            self._remember(events)
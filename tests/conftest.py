@@ -5,6 +5,8 @@ so that src.config.Settings() doesn't raise RuntimeError during collection.
 
 import os
 
+import pytest_asyncio
+
 os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test-bot-token")
 os.environ.setdefault("TELEGRAM_CHAT_ID", "123456789")
 os.environ.setdefault("OPEN_FINANCE_CLIENT_ID", "test-client-id")
@@ -12,3 +14,23 @@ os.environ.setdefault("OPEN_FINANCE_CLIENT_SECRET", "test-client-secret")
 os.environ.setdefault("OPEN_FINANCE_BASE_URL", "https://api.pluggy.ai")
 os.environ.setdefault("PLUGGY_ITEM_ID_MEU_PLUGGY", "test-item-id")
 os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./test_finova.db")
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    """Fresh in-memory SQLite database with the full FINOVA schema."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from src.database.models import Base
+
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
@@ -0,0 +1,131 @@
+"""
+Tests for the vectorised portfolio analytics, checked against straightforward
+pure-Python reference implementations.
+"""
+
+import math
+import random
+
+import pytest
+
+
+def _ref_returns(series):
+    return [(b - a) / a if a else 0.0 for a, b in zip(series, series[1:])]
+
+
+def _ref_volatility(series, window):
+    returns = _ref_returns(series)
+    out = []
+    for end in range(window, len(returns) + 1):
+        chunk = returns[end - window:end]
+        mean = sum(chunk) / window
+        out.append(math.sqrt(sum((r - mean) ** 2 for r in chunk) / (window - 1)))
+    return out
+
+
+def _ref_drawdown(series):
+    peak, worst = 0.0, 0.0
+    for value in series:
+        peak = max(peak, value)
+        if peak > 0:
+            worst = max(worst, (peak - value) / peak)
+    return worst
+
+
+def _random_walk(n, seed):
+    rng = random.Random(seed)
+    value, out = 10_000.0, []
+    for _ in range(n):
+        value *= 1 + rng.uniform(-0.05, 0.05)
+        out.append(round(value))
+    return out
+
+
+class TestSeriesStatistics:
+    @pytest.mark.parametrize("seed", [1, 2, 3])
+    def test_returns_volatility_and_drawdown_match_reference(self, seed):
+        from src.reports.analytics import max_drawdown, period_returns, rolling_volatility
+
+        series = _random_walk(200, seed)
+        assert period_returns(series).tolist() == pytest.approx(_ref_returns(series))
+        assert rolling_volatility(series, 20).tolist() == pytest.approx(_ref_volatility(series, 20))
+        assert max_drawdown(series) == pytest.approx(_ref_drawdown(series))
+
+    def test_degenerate_inputs(self):
+        from src.reports.analytics import max_drawdown, rolling_volatility
+
+        assert max_drawdown([]) == 0.0
+        assert max_drawdown([0, 0, 5]) == 0.0
+        assert rolling_volatility([1, 2], 5).size == 0
+
+
+class TestPortfolio:
+    def test_summary_matches_reference(self):
+        from src.reports.analytics import summarize_portfolio
+
+        positions = [
+            {"asset_id": "a", "total_value_cents": 12_000, "invested_cents": 10_000, "daily_change_pct": 2.0},
+            {"asset_id": "b", "total_value_cents": 8_000, "open_price_cents": 100, "quantity": 90.0, "daily_change_pct": -1.0},
+        ]
+        summary = summarize_portfolio(positions)
+
+        day_pnl = sum(p["total_value_cents"] - p["total_value_cents"] / (1 + p["daily_change_pct"] / 100) for p in positions)
+        assert summary["total_value_cents"] == 20_000
+        assert summary["invested_cents"] == 19_000
+        assert summary["pnl_cents"] == 1_000
+        assert summary["return_pct"] == pytest.approx(1_000 / 19_000 * 100)
+        assert summary["day_pnl_cents"] == round(day_pnl)
+        assert summary["weights"] == {"a": pytest.approx(0.6), "b": pytest.approx(0.4)}
+        assert summarize_portfolio([])["weights"] == {}
+
+    def test_wiped_out_position_adds_no_day_pnl(self):
+        from src.reports.analytics import summarize_portfolio
+
+        summary = summarize_portfolio([
+            {"asset_id": "a", "total_value_cents": 0, "invested_cents": 5_000, "daily_change_pct": -100.0},
+            {"asset_id": "b", "total_value_cents": 11_000, "invested_cents": 10_000, "daily_change_pct": 10.0},
+        ])
+        assert summary["day_pnl_cents"] == 1_000
+
+    def test_history_matrix_forward_fills_only_while_held(self):
+        import numpy as np
+        from src.reports.analytics import history_matrix
+
+        timestamps, assets, prices, values = history_matrix([
+            ("a", 100, 10, 10), ("b", 200, 5, 5), ("a", 300, 12, 12), ("a", 400, 13, 13),
+            ("b", 300, 6, 6),  # b's last point: sold before 400
+        ])
+        assert timestamps.tolist() == [100, 200, 300, 400]
+        assert assets == ["a", "b"]
+        assert values.tolist() == [[10, 0], [10, 5], [12, 6], [13, 0]]
+        assert np.isnan(prices[[0, 3], 1]).all() and prices[1, 0] == 10
+
+    def test_flows_are_not_returns(self):
+        from src.reports.analytics import portfolio_history_stats
+
+        points = [
+            ("a", 1, 100, 10_000), ("a", 2, 110, 11_000),
+            # b bought at 2 (a deposit), a topped up at 3: neither is a gain
+            ("a", 3, 110, 22_000), ("b", 2, 50, 50_000), ("b", 3, 50, 50_000),
+            # b sold at 4; its last value must not linger in the totals
+            ("a", 4, 121, 24_200),
+        ]
+        stats = portfolio_history_stats(points)
+        assert stats["return_pct"] == pytest.approx(21.0)  # 100 → 110 → 121
+        assert stats["max_drawdown_pct"] == 0.0
+
+    def test_history_stats_against_reference(self):
+        from src.reports.analytics import portfolio_history_stats
+
+        a, b = _random_walk(60, 7), _random_walk(60, 8)
+        # Constant holdings: the time-weighted return is the total value's return
+        points = [("a", t, v, v) for t, v in enumerate(a)] + [("b", t, v, v) for t, v in enumerate(b)]
+        random.Random(0).shuffle(points)
+        totals = [x + y for x, y in zip(a, b)]
+
+        stats = portfolio_history_stats(points, window=10)
+        assert stats["assets"] == 2
+        assert stats["return_pct"] == pytest.approx((totals[-1] - totals[0]) / totals[0] * 100)
+        assert stats["volatility_pct"] == pytest.approx(_ref_volatility(totals, 10)[-1] * 100)
+        assert stats["max_drawdown_pct"] == pytest.approx(_ref_drawdown(totals) * 100)
+        assert portfolio_history_stats([("a", 1, 10, 10)]) is None
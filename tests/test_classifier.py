@@ -0,0 +1,99 @@
+"""
+Tests for the compiled keyword classifier behind classify_transaction.
+"""
+
+import random
+
+from src.classifier import KeywordClassifier, fold
+
+
+def _reference(rules: dict[str, list[str]], description: str, merchant: str | None = None) -> str:
+    # The original linear scan, with the same accent folding applied
+    text = fold(f"{description} {merchant or ''}")
+    for category, keywords in rules.items():
+        if any(fold(kw) in text for kw in keywords):
+            return category
+    return "Other"
+
+
+class TestKeywordClassifier:
+    def test_matches_reference_on_category_keywords(self):
+        from src.config import CATEGORY_KEYWORDS
+
+        classifier = KeywordClassifier(CATEGORY_KEYWORDS)
+        samples = [
+            "IFOOD *PEDIDO 123", "UBER *TRIP", "Uber Eats", "Posto Shell BR",
+            "PAGAMENTO RECEBIDO", "Netflix.com", "Drogasil 0412", "Compra aleatória",
+            "Mercado Livre", "Amazon Prime Video", "PIX RECEBIDO FULANO", "tesouro direto",
+            "", "99POP", "c&a shopping",
+        ]
+        for text in samples:
+            assert classifier.classify(text) == _reference(CATEGORY_KEYWORDS, text), text
+
+    def test_matches_reference_on_random_text(self):
+        rules = {"A": ["abc", "bcd", "x"], "B": ["ab", "cdx"], "C": ["bc", "dd"], "D": ["abcd"]}
+        classifier = KeywordClassifier(rules)
+        rng = random.Random(42)
+        for _ in range(2000):
+            text = "".join(rng.choice("abcdx ") for _ in range(rng.randint(0, 12)))
+            assert classifier.classify_text(text) == _reference(rules, text), text
+
+    def test_first_category_wins_regardless_of_position(self):
+        classifier = KeywordClassifier({"First": ["zzz"], "Second": ["aaa"]})
+        assert classifier.classify("aaa then zzz") == "First"
+
+    def test_accent_folding(self):
+        classifier = KeywordClassifier({"Health": ["farmácia"], "Housing & Bills": ["condominio"]})
+        assert classifier.classify("FARMACIA SAO JOAO") == "Health"
+        assert classifier.classify("Condomínio Edifício") == "Housing & Bills"
+
+    def test_merchant_is_considered(self):
+        from src.config import classify_transaction
+        assert classify_transaction("Compra cartão", "Drogasil") == "Health"
+
+    def test_classify_many(self):
+        from src.config import classify_many
+        assert classify_many([("iFood pedido", None), ("Sem categoria", None), ("x", "Spotify")]) == [
+            "Food & Delivery", "Other", "Subscriptions",
+        ]
+
+
+class TestClassificationCache:
+    def test_hits_misses_and_lru_eviction(self):
+        from src.classifier import ClassificationCache
+
+        cache = ClassificationCache(KeywordClassifier({"Transport": ["uber"], "Food": ["ifood"]}), maxsize=2)
+        assert cache.classify("UBER *TRIP") == "Transport"
+        assert cache.classify("uber   *trip") == "Transport"  # same normalized key
+        assert cache.classify("IFOOD") == "Food"
+        assert cache.classify("padaria") == "Other"  # evicts the uber entry
+        assert cache.classify("UBER *TRIP") == "Transport"
+
+        assert cache.stats() == {"hits": 1, "misses": 4, "size": 2}
+
+    def test_digits_masked_unless_a_digit_keyword_matches_there(self):
+        from src.classifier import ClassificationCache
+
+        plain = ClassificationCache(KeywordClassifier({"Food": ["ifood"]}))
+        assert plain.key("IFOOD *1234") == plain.key("IFOOD *98765")
+
+        with_digits = ClassificationCache(KeywordClassifier({"Transport": ["99"], "Food": ["ifood"]}))
+        assert with_digits.key("IFOOD *1234") == with_digits.key("IFOOD *5678") == "ifood *#"
+        assert with_digits.key("PAG 1990") != with_digits.key("PAG 1234")
+        assert with_digits.key("99 POP 1234") == "99 pop #"
+        assert with_digits.classify("PAG 1990") == "Transport"
+        assert with_digits.classify("PAG 1234") == "Other"
+
+    def test_repeated_merchants_hit_with_the_shipped_rules(self):
+        from src.classifier import ClassificationCache
+        from src.config import CATEGORY_KEYWORDS
+
+        cache = ClassificationCache(KeywordClassifier(CATEGORY_KEYWORDS))
+        assert [cache.classify(f"IFOOD *{n}") for n in ("1234", "5678", "4321")] == ["Food & Delivery"] * 3
+        assert cache.stats()["hits"] == 2
+
+    def test_rules_hash_changes_with_rules_and_order(self):
+        a = KeywordClassifier({"A": ["x"], "B": ["y"]})
+        assert a.rules_hash == KeywordClassifier({"A": ["x"], "B": ["y"]}).rules_hash
+        assert a.rules_hash != KeywordClassifier({"B": ["y"], "A": ["x"]}).rules_hash
+        assert a.rules_hash != KeywordClassifier({"A": ["x", "z"], "B": ["y"]}).rules_hash
@@ -0,0 +1,377 @@
+"""
+Tests for database CRUD helpers and incremental sync, against in-memory SQLite.
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+
+def _tx(tx_id: str, account_id: str, ts: datetime, amount_cents: int = -1000) -> dict:
+    return {
+        "transaction_id": tx_id,
+        "account_id": account_id,
+        "amount_cents": amount_cents,
+        "description": "Compra",
+        "merchant": None,
+        "category": "Other",
+        "timestamp": ts,
+        "already_notified": False,
+    }
+
+
+class TestBulkWrites:
+    @pytest.mark.asyncio
+    async def test_insert_transactions_bulk_returns_only_new_ids(self, session_factory):
+        from src.database.crud import BULK_CHUNK_SIZE, get_transactions_since, insert_transactions_bulk
+
+        now = datetime.now(tz=timezone.utc)
+        rows = [_tx(f"tx-{i}", "acc-1", now) for i in range(BULK_CHUNK_SIZE + 10)]
+        async with session_factory() as session:
+            first = await insert_transactions_bulk(session, rows[:5])
+            second = await insert_transactions_bulk(session, rows)
+            stored = await get_transactions_since(session, now - timedelta(days=1))
+
+        assert first == ["tx-0", "tx-1", "tx-2", "tx-3", "tx-4"]
+        assert sorted(second) == sorted(r["transaction_id"] for r in rows[5:])
+        assert len(stored) == len(rows)
+
+    @pytest.mark.asyncio
+    async def test_upsert_investments_bulk_updates_and_reports_new(self, session_factory):
+        from src.database.crud import get_all_investments, upsert_investments_bulk
+
+        def inv(asset_id: str, value: int) -> dict:
+            return {
+                "asset_id": asset_id, "ticker": asset_id.upper(), "name": asset_id,
+                "quantity": 1.0, "current_price_cents": value, "open_price_cents": value,
+                "total_value_cents": value, "daily_change_pct": 0.0,
+                "alert_triggered": False, "last_updated": datetime.now(tz=timezone.utc),
+            }
+
+        async with session_factory() as session:
+            assert await upsert_investments_bulk(session, [inv("a", 100)]) == ["a"]
+            assert await upsert_investments_bulk(session, [inv("a", 150), inv("b", 200)]) == ["b"]
+            stored = {i.asset_id: i.total_value_cents for i in await get_all_investments(session)}
+
+        assert stored == {"a": 150, "b": 200}
+
+    @pytest.mark.asyncio
+    async def test_upsert_skips_rows_that_did_not_change(self, session_factory):
+        from src.database.crud import get_all_investments, upsert_investments_bulk
+
+        t0 = datetime(2026, 1, 1, 12, 0)
+        row = {
+            "asset_id": "a", "ticker": "A", "name": "a", "quantity": 1.0,
+            "current_price_cents": 100, "open_price_cents": 100, "total_value_cents": 100,
+            "daily_change_pct": 0.0, "alert_triggered": False, "last_updated": t0,
+        }
+
+        async with session_factory() as session:
+            await upsert_investments_bulk(session, [row])
+            await upsert_investments_bulk(session, [{**row, "last_updated": t0 + timedelta(minutes=5)}])
+            unchanged = (await get_all_investments(session))[0].last_updated
+
+            await upsert_investments_bulk(session, [{**row, "total_value_cents": 120, "last_updated": t0 + timedelta(minutes=10)}])
+            session.expire_all()
+            changed = (await get_all_investments(session))[0]
+
+        assert unchanged == t0
+        assert changed.total_value_cents == 120
+        assert changed.last_updated == t0 + timedelta(minutes=10)
+
+
+class TestAggregations:
+    @pytest.mark.asyncio
+    async def test_totals_and_category_breakdown_match_rows(self, session_factory):
+        from src.database.crud import (
+            get_spending_by_category,
+            get_transaction_totals,
+            insert_transactions_bulk,
+        )
+
+        now = datetime.now(tz=timezone.utc)
+        rows = [
+            {**_tx("tx-1", "acc-1", now, -1000), "category": "Transport"},
+            {**_tx("tx-2", "acc-1", now, -2500), "category": "Transport"},
+            {**_tx("tx-3", "acc-2", now, -500), "category": "Health"},
+            {**_tx("tx-4", "acc-2", now, 9000), "category": "Income"},
+            {**_tx("tx-old", "acc-1", now - timedelta(days=40), -7000), "category": "Transport"},
+        ]
+        async with session_factory() as session:
+            await insert_transactions_bulk(session, rows)
+            since = now - timedelta(days=1)
+            totals = await get_transaction_totals(session, since)
+            by_category = await get_spending_by_category(session, since)
+
+        assert totals == {"count": 4, "spent_cents": 4000, "received_cents": 9000}
+        assert by_category == {"Transport": 3500, "Health": 500}
+
+
+class TestDailyRollups:
+    @pytest.mark.asyncio
+    async def test_incremental_rollups_match_rebuild(self, session_factory):
+        from sqlalchemy import select
+
+        from src.database.crud import (
+            get_rollup_by_category,
+            get_rollup_totals,
+            insert_transaction,
+            insert_transactions_bulk,
+            rebuild_daily_rollups,
+        )
+        from src.database.models import DailyRollup
+
+        day = datetime(2024, 3, 10, 15, 0, tzinfo=timezone.utc)
+        rows = [
+            {**_tx("tx-1", "acc-1", day, -1000), "category": "Transport"},
+            {**_tx("tx-2", "acc-1", day, -2500), "category": "Transport"},
+            {**_tx("tx-3", "acc-1", day + timedelta(days=1), 9000), "category": "Income"},
+        ]
+
+        async def snapshot(session):
+            result = await session.execute(select(DailyRollup).order_by(
+                DailyRollup.day, DailyRollup.account_id, DailyRollup.category))
+            return [(r.day, r.account_id, r.category, r.debit_cents, r.credit_cents,
+                     r.debit_count, r.credit_count) for r in result.scalars().all()]
+
+        async with session_factory() as session:
+            await insert_transactions_bulk(session, rows[:2])
+            # Re-sending known rows must not double count
+            await insert_transactions_bulk(session, rows)
+            await insert_transaction(session, {**_tx("tx-4", "acc-2", day, -500), "category": "Health"})
+            await insert_transaction(session, {**_tx("tx-5", "acc-2", day, 0), "category": "Other"})
+            incremental = await snapshot(session)
+
+            totals = await get_rollup_totals(session, day.date(), day.date())
+            by_category = await get_rollup_by_category(session, day.date())
+
+            await rebuild_daily_rollups(session)
+            session.expunge_all()
+            rebuilt = await snapshot(session)
+
+        assert incremental == rebuilt
+        # Zero-amount rows are counted, as get_transaction_totals counts them
+        assert totals == {"count": 4, "spent_cents": 4000, "received_cents": 0}
+        assert by_category["Transport"] == {"spent_cents": 3500, "received_cents": 0}
+        assert by_category["Income"] == {"spent_cents": 0, "received_cents": 9000}
+
+
+class TestClassificationPersistence:
+    @pytest.mark.asyncio
+    async def test_cache_round_trip_is_invalidated_by_rule_change(self, session_factory):
+        from src.database.crud import load_classification_cache, save_classification_cache
+
+        async with session_factory() as session:
+            await save_classification_cache(session, {"uber trip": "Transport"}, "rules-v1")
+            assert await load_classification_cache(session, "rules-v1", 100) == {"uber trip": "Transport"}
+            assert await load_classification_cache(session, "rules-v2", 100) == {}
+            assert await load_classification_cache(session, "rules-v1", 100) == {}
+
+    @pytest.mark.asyncio
+    async def test_persisted_cache_keeps_only_the_newest_entries(self, session_factory):
+        from src.database.crud import load_classification_cache, save_classification_cache
+
+        async with session_factory() as session:
+            for i in range(5):
+                await save_classification_cache(session, {f"key {i}": "Other"}, "rules-v1", max_entries=3)
+            assert await load_classification_cache(session, "rules-v1", 100) == {
+                "key 2": "Other", "key 3": "Other", "key 4": "Other",
+            }
+
+    @pytest.mark.asyncio
+    async def test_reclassify_updates_changed_rows_and_rollups(self, session_factory):
+        from src.classifier import ClassificationCache, KeywordClassifier
+        from src.database.crud import get_rollup_by_category, insert_transactions_bulk, reclassify_transactions
+
+        now = datetime(2024, 5, 2, 12, 0, tzinfo=timezone.utc)
+        rows = [
+            {**_tx("tx-1", "acc-1", now, -1000), "description": "PADARIA REAL", "category": "Other"},
+            {**_tx("tx-2", "acc-1", now, -2000), "description": "UBER *TRIP", "category": "Transport"},
+        ]
+        cache = ClassificationCache(KeywordClassifier({"Food": ["padaria"], "Transport": ["uber"]}))
+        async with session_factory() as session:
+            await insert_transactions_bulk(session, rows)
+            changed = await reclassify_transactions(session, cache.classify_many)
+            by_category = await get_rollup_by_category(session, now.date())
+
+        assert changed == 1
+        assert by_category == {
+            "Food": {"spent_cents": 1000, "received_cents": 0},
+            "Transport": {"spent_cents": 2000, "received_cents": 0},
+        }
+
+
+def _inv(asset_id: str, price_cents: int) -> dict:
+    return {"asset_id": asset_id, "current_price_cents": price_cents, "total_value_cents": price_cents * 10}
+
+
+class TestInvestmentSnapshots:
+    @pytest.mark.asyncio
+    async def test_history_range_and_change(self, session_factory):
+        from src.database.crud import append_investment_snapshots, get_investment_history, get_price_change_since
+
+        t0 = datetime(2026, 3, 2, 10, 0, tzinfo=timezone.utc)
+        async with session_factory() as session:
+            for minutes, price in ((0, 1000), (5, 1100), (10, 900), (15, 1200)):
+                await append_investment_snapshots(session, [_inv("a", price)], t0 + timedelta(minutes=minutes))
+            assert await append_investment_snapshots(session, [_inv("a", 1)], t0) == 0  # duplicate point
+
+            history = await get_investment_history(session, "a", t0 + timedelta(minutes=5), t0 + timedelta(minutes=15))
+            changes = await get_price_change_since(session, t0 + timedelta(minutes=7))
+            since_start = await get_price_change_since(session, t0 - timedelta(days=1))
+
+        assert history == [(t0 + timedelta(minutes=5), 1100, 11000), (t0 + timedelta(minutes=10), 900, 9000)]
+        assert changes == {"a": pytest.approx(9.0909, abs=1e-3)}  # 1100 → 1200
+        assert since_start == {"a": 20.0}
+
+    @pytest.mark.asyncio
+    async def test_downsampling_keeps_bucket_closes(self, session_factory):
+        from src.database.crud import append_investment_snapshots, downsample_investment_snapshots, get_investment_history
+
+        now = datetime(2026, 3, 31, 12, 0, tzinfo=timezone.utc)
+        old_day = now - timedelta(days=40)
+        old_hour = now - timedelta(days=2)
+        async with session_factory() as session:
+            for minutes in range(0, 120, 10):
+                await append_investment_snapshots(session, [_inv("a", 1000 + minutes)], old_day + timedelta(minutes=minutes))
+                await append_investment_snapshots(session, [_inv("a", 2000 + minutes)], old_hour + timedelta(minutes=minutes))
+            await append_investment_snapshots(session, [_inv("a", 3000)], now)
+
+            removed = await downsample_investment_snapshots(session, now=now)
+            again = await downsample_investment_snapshots(session, now=now)
+            history = await get_investment_history(session, "a", now - timedelta(days=60))
+
+        assert removed == 25 - 4
+        assert again == 0
+        assert history == [
+            (datetime(2026, 2, 19, 0, 0, tzinfo=timezone.utc), 1110, 11100),  # daily close
+            (datetime(2026, 3, 29, 12, 0, tzinfo=timezone.utc), 2050, 20500),  # hourly closes
+            (datetime(2026, 3, 29, 13, 0, tzinfo=timezone.utc), 2110, 21100),
+            (now, 3000, 30000),  # recent raw point untouched
+        ]
+
+
+class TestSchemaAndEngine:
+    @pytest.mark.asyncio
+    async def test_sqlite_pragmas_and_indexes(self, tmp_path):
+        from sqlalchemy import text
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        from src.database.models import _create_schema, configure_engine
+
+        engine = configure_engine(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'finova.db'}"))
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(_create_schema)
+                # Running it twice must be a no-op on an existing database
+                await conn.run_sync(_create_schema)
+            async with engine.connect() as conn:
+                journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+                synchronous = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+                plan = (await conn.execute(text(
+                    "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE timestamp >= '2024-01-01'"
+                ))).all()
+                unnotified_plan = (await conn.execute(text(
+                    "EXPLAIN QUERY PLAN SELECT * FROM transactions "
+                    "WHERE already_notified = 0 AND timestamp >= '2024-01-01' ORDER BY timestamp"
+                ))).all()
+        finally:
+            await engine.dispose()
+
+        assert journal == "wal"
+        assert synchronous == 1  # NORMAL
+        assert "ix_transactions_timestamp" in " ".join(str(row) for row in plan)
+        assert "ix_transactions_unnotified" in " ".join(str(row) for row in unnotified_plan)
+
+
+class TestSyncTransactions:
+    @pytest.mark.asyncio
+    async def test_second_sync_resumes_from_watermark(self, session_factory):
+        now = datetime.now(tz=timezone.utc)
+        first = {
+            "error": False,
+            "data": [_tx("tx-1", "acc-1", now - timedelta(hours=3))],
+            "account_ids": ["acc-1", "acc-2"],
+            "failed_accounts": {},
+        }
+        second = {
+            "error": False,
+            "data": [_tx("tx-1", "acc-1", now - timedelta(hours=3)),
+                     _tx("tx-2", "acc-1", now - timedelta(minutes=5))],
+            "account_ids": ["acc-1", "acc-2"],
+            "failed_accounts": {"acc-2": "boom"},
+        }
+        fetch = AsyncMock(side_effect=[first, second])
+
+        with patch("src.open_finance.sync.fetch_transactions", fetch), \
+             patch("src.open_finance.sync.AsyncSessionLocal", session_factory), \
+             patch("src.open_finance.sync.settings") as mock_settings:
+            mock_settings.sync_overlap_minutes = 60
+            from src.open_finance.sync import sync_transactions
+            r1 = await sync_transactions(days=1)
+            r2 = await sync_transactions(days=1)
+
+        assert fetch.call_args_list[0].kwargs["since"] == {}
+        since = fetch.call_args_list[1].kwargs["since"]
+        midnight = dict(hour=0, minute=0, second=0, microsecond=0)
+        # acc-1 resumes from the day of its newest transaction minus the overlap
+        assert since["acc-1"] == (now - timedelta(hours=4)).replace(**midnight)
+        # acc-2 had no transactions: re-read from the start of its covered window
+        assert since["acc-2"] == (now - timedelta(days=1)).replace(**midnight)
+        assert [t.transaction_id for t in r1["data"]] == ["tx-1"]
+        assert [t.transaction_id for t in r2["data"]] == ["tx-2"]
+
+    def test_default_overlap_rereads_a_full_day(self):
+        from src.config import settings
+        from src.database.models import SyncCursor
+        from src.open_finance.sync import _resume_points
+
+        now = datetime(2024, 6, 10, 12, 0, tzinfo=timezone.utc)
+        window_start = now - timedelta(days=7)
+        cursors = {
+            "acc-1": SyncCursor(account_id="acc-1", window_start=window_start - timedelta(days=1),
+                                last_seen_at=now - timedelta(hours=2), synced_at=now),
+            "acc-2": SyncCursor(account_id="acc-2", window_start=window_start,
+                                last_seen_at=None, synced_at=now),
+        }
+        since = _resume_points(cursors, window_start, timedelta(minutes=settings.sync_overlap_minutes))
+
+        assert since["acc-1"] == datetime(2024, 6, 9, tzinfo=timezone.utc)
+        assert since["acc-2"] == datetime(2024, 6, 3, tzinfo=timezone.utc)
+
+    def test_watcher_poll_resumes_from_a_whole_day(self):
+        from src.config import settings
+        from src.database.models import SyncCursor
+        from src.open_finance.sync import _resume_points
+        from src.open_finance.transactions import _fmt_watermark
+
+        now = datetime(2024, 6, 10, 10, 5, tzinfo=timezone.utc)
+        cursors = {
+            "acc-1": SyncCursor(account_id="acc-1", window_start=now - timedelta(days=3),
+                                last_seen_at=now - timedelta(minutes=5), synced_at=now),
+        }
+        since = _resume_points(cursors, now - timedelta(days=1), timedelta(minutes=settings.sync_overlap_minutes))
+
+        # Whole-day postings dated yesterday 00:00Z that arrive late are still covered
+        assert since["acc-1"] == datetime(2024, 6, 9, tzinfo=timezone.utc)
+        assert _fmt_watermark(since["acc-1"]) == "2024-06-09"
+
+    @pytest.mark.asyncio
+    async def test_wider_window_ignores_narrow_cursor(self, session_factory):
+        now = datetime.now(tz=timezone.utc)
+        async with session_factory() as session:
+            from src.database.crud import advance_sync_cursors
+            await advance_sync_cursors(session, ["acc-1"], [], now - timedelta(days=1), now)
+
+        fetch = AsyncMock(return_value={
+            "error": False, "data": [], "account_ids": ["acc-1"], "failed_accounts": {},
+        })
+        with patch("src.open_finance.sync.fetch_transactions", fetch), \
+             patch("src.open_finance.sync.AsyncSessionLocal", session_factory):
+            from src.open_finance.sync import sync_transactions
+            await sync_transactions(days=7)
+            await sync_transactions(days=7)
+
+        # The 1-day cursor can't serve a 7-day request; once widened, it can
+        assert fetch.call_args_list[0].kwargs["since"] == {}
+        assert "acc-1" in fetch.call_args_list[1].kwargs["since"]
@@ -0,0 +1,110 @@
+"""
+Tests for the outbound Telegram dispatch queue.
+Uses a mocked bot; rate limits and the coalesce window are shrunk via settings.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+
+def _settings(**overrides):
+    values = dict(
+        telegram_global_rate=1000,
+        telegram_chat_rate=1000,
+        telegram_coalesce_window_seconds=0.05,
+        telegram_send_retries=2,
+    )
+    values.update(overrides)
+    return MagicMock(**values)
+
+
+class TestDigest:
+    def test_single_message_is_untouched(self):
+        from src.telegram.dispatcher import build_digest
+        assert build_digest(["only"]) == ["only"]
+
+    def test_digest_is_split_at_message_boundaries(self):
+        from src.telegram.dispatcher import build_digest
+
+        chunks = build_digest(["a" * 40, "b" * 40, "c" * 40], limit=100)
+        assert chunks == ["*3 alertas*\n\n" + "a" * 40 + "\n\n" + "b" * 40, "c" * 40]
+        assert all(len(chunk) <= 100 for chunk in chunks)
+
+    def test_oversized_message_is_split_at_line_boundaries(self):
+        from src.telegram.dispatcher import build_digest
+
+        alert = "\n".join(f"*linha {i}*: R$ 10,00" for i in range(10))
+        chunks = build_digest([alert, "*curta*"], limit=60)
+        assert all(len(chunk) <= 60 for chunk in chunks)
+        assert all(chunk.count("*") % 2 == 0 for chunk in chunks)
+        assert chunks[1] == "*linha 0*: R$ 10,00\n*linha 1*: R$ 10,00\n*linha 2*: R$ 10,00"
+        assert chunks[-1].endswith("\n\n*curta*")
+
+
+class TestTelegramDispatcher:
+    @pytest.mark.asyncio
+    async def test_burst_is_coalesced_into_one_digest(self):
+        with patch("src.telegram.dispatcher.settings", _settings()):
+            from src.telegram.dispatcher import TelegramDispatcher
+
+            bot = MagicMock()
+            bot.send_message = AsyncMock()
+            dispatcher = TelegramDispatcher()
+            deliveries = [dispatcher.enqueue(1, f"tx {i}", coalesce="transactions") for i in range(30)]
+            dispatcher.enqueue(1, "daily summary")
+            dispatcher.start(bot)
+            await dispatcher.stop()
+
+        texts = [call.kwargs["text"] for call in bot.send_message.await_args_list]
+        assert len(texts) == 2
+        assert texts[0].startswith("*30 alertas*") and "tx 29" in texts[0]
+        assert texts[1] == "daily summary"
+        assert all(d.result() is True for d in deliveries)
+
+    @pytest.mark.asyncio
+    async def test_retry_after_is_honoured(self):
+        from telegram.error import RetryAfter
+
+        with patch("src.telegram.dispatcher.settings", _settings()), \
+             patch("src.telegram.dispatcher.asyncio.sleep", new_callable=AsyncMock) as sleep:
+            from src.telegram.dispatcher import OutboundMessage, TelegramDispatcher
+
+            bot = MagicMock()
+            bot.send_message = AsyncMock(side_effect=[RetryAfter(7), None])
+            dispatcher = TelegramDispatcher()
+            dispatcher._bot = bot
+            await dispatcher._send(OutboundMessage(1, "hello"))
+
+        assert bot.send_message.await_count == 2
+        sleep.assert_any_await(7.0)
+
+    @pytest.mark.asyncio
+    async def test_bad_request_is_not_retried(self):
+        from telegram.error import BadRequest
+
+        with patch("src.telegram.dispatcher.settings", _settings()):
+            from src.telegram.dispatcher import OutboundMessage, TelegramDispatcher
+
+            bot = MagicMock()
+            bot.send_photo = AsyncMock(side_effect=BadRequest("Chat not found"))
+            dispatcher = TelegramDispatcher()
+            dispatcher._bot = bot
+            await dispatcher._send(OutboundMessage(1, "caption", photo=b"\x89PNG"))
+
+        assert bot.send_photo.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_unparseable_markdown_is_resent_as_plain_text(self):
+        from telegram.error import BadRequest
+
+        with patch("src.telegram.dispatcher.settings", _settings()):
+            from src.telegram.dispatcher import OutboundMessage, TelegramDispatcher
+
+            bot = MagicMock()
+            bot.send_message = AsyncMock(side_effect=[BadRequest("Can't parse entities: unclosed *"), None])
+            dispatcher = TelegramDispatcher()
+            dispatcher._bot = bot
+            ok = await dispatcher._send(OutboundMessage(1, "*cut mid-entity"))
+
+        assert ok is True
+        assert [call.kwargs["parse_mode"] for call in bot.send_message.await_args_list] == ["Markdown", None]
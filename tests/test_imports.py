@@ -0,0 +1,47 @@
+"""
+Import-time regression guard: starting the bot must not pull in heavy
+dependencies that are only needed on first use.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded lazily: chart workers, analytics, and the engine's DB driver
+LAZY_MODULES = ("matplotlib", "numpy", "plotly", "kaleido", "aiosqlite")
+
+# Generous ceiling — catches an accidental eager import, not machine noise
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "3.0"))
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": sorted({m.split(".")[0] for m in sys.modules})}))
+"""
+
+
+def _probe() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=PROJECT_ROOT,
+        env=os.environ.copy(),
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestStartupImports:
+    def test_heavy_dependencies_are_lazy_and_import_is_fast(self):
+        probe = _probe()
+
+        assert not set(LAZY_MODULES) & set(probe["loaded"])
+        assert probe["elapsed"] < IMPORT_BUDGET_SECONDS, f"import main took {probe['elapsed']:.2f}s"
@@ -12,7 +12,7 @@ class TestFetchAccounts:
     async def test_returns_accounts_list(self):
         # Pluggy returns {"results": [...]} with "id", "institution" as object
         with patch("src.open_finance.accounts.client") as mock_client:
-            mock_client.get = AsyncMock(return_value={
+            mock_client.get_cached = AsyncMock(return_value=({
                 "results": [
                     {
                         "id": "acc-1",
@@ -22,7 +22,7 @@ class TestFetchAccounts:
                         "currencyCode": "BRL",
                     }
                 ]
-            })
+            }, True))
             from src.open_finance.accounts import fetch_accounts
             result = await fetch_accounts()
 
@@ -35,7 +35,7 @@ class TestFetchAccounts:
     @pytest.mark.asyncio
     async def test_returns_error_dict_on_exception(self):
         with patch("src.open_finance.accounts.client") as mock_client:
-            mock_client.get = AsyncMock(side_effect=Exception("timeout"))
+            mock_client.get_cached = AsyncMock(side_effect=Exception("timeout"))
             from src.open_finance.accounts import fetch_accounts
             result = await fetch_accounts()
 
@@ -99,6 +99,74 @@ class TestFetchTransactions:
         assert result["error"] is True
         assert result["data"] is None
 
+    @pytest.mark.asyncio
+    async def test_accounts_fetched_concurrently_with_partial_failure(self):
+        import asyncio
+
+        async def fake_get(path, params=None):
+            if path == "/accounts":
+                return {"results": [{"id": "acc-1"}, {"id": "acc-2"}, {"id": "acc-3"}]}
+            account_id = params["accountId"]
+            if account_id == "acc-2":
+                raise Exception("upstream 500")
+            # acc-1 answers last, but must still come first in the merge
+            await asyncio.sleep(0.02 if account_id == "acc-1" else 0)
+            return {"results": [{
+                "id": f"tx-{account_id}",
+                "amount": -1.00,
+                "description": "Compra",
+                "date": "2024-01-15T12:00:00Z",
+            }]}
+
+        with patch("src.open_finance.transactions.client") as mock_client:
+            mock_client.get = AsyncMock(side_effect=fake_get)
+            from src.open_finance.transactions import fetch_transactions
+            result = await fetch_transactions(days=1, concurrency=3)
+
+        assert result["error"] is False
+        assert [t["transaction_id"] for t in result["data"]] == ["tx-acc-1", "tx-acc-3"]
+        assert result["data"][1]["account_id"] == "acc-3"
+        assert "upstream 500" in result["failed_accounts"]["acc-2"]
+
+    @pytest.mark.asyncio
+    async def test_follows_every_page(self):
+        def page(n):
+            return {"page": n, "totalPages": 3, "results": [{
+                "id": f"tx-p{n}",
+                "amount": -1.00,
+                "description": "Compra",
+                "date": "2024-01-15T12:00:00Z",
+            }]}
+
+        async def fake_get(path, params=None):
+            if path == "/accounts":
+                return {"results": [{"id": "acc-1"}]}
+            return page(params["page"])
+
+        with patch("src.open_finance.transactions.client") as mock_client:
+            mock_client.get = AsyncMock(side_effect=fake_get)
+            from src.open_finance.transactions import fetch_transactions
+            result = await fetch_transactions(days=30)
+
+        assert [t["transaction_id"] for t in result["data"]] == ["tx-p1", "tx-p2", "tx-p3"]
+        pages_requested = [c.kwargs["params"]["page"] for c in mock_client.get.call_args_list[1:]]
+        assert pages_requested == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_page_stream_stops_without_prefetch_leak(self):
+        with patch("src.open_finance.transactions.client") as mock_client:
+            mock_client.get = AsyncMock(side_effect=lambda path, params=None: {
+                "page": params["page"], "totalPages": 5, "results": [{"id": params["page"]}],
+            })
+            from src.open_finance.transactions import iter_transaction_pages
+            pages = iter_transaction_pages("acc-1", "2024-01-01", "2024-01-31")
+            first = await pages.__anext__()
+            await pages.aclose()
+
+        assert first == [{"id": 1}]
+        # At most the prefetched page 2 was requested; nothing beyond it
+        assert mock_client.get.call_count <= 2
+
 
 class TestFetchInvestments:
     @pytest.mark.asyncio
@@ -108,7 +176,7 @@ class TestFetchInvestments:
              patch("src.open_finance.investments.settings") as mock_settings:
             mock_settings.pluggy_item_id = "test-item"
             mock_settings.investment_alert_threshold = 3.0
-            mock_client.get = AsyncMock(return_value={
+            mock_client.get_cached = AsyncMock(return_value=({
                 "results": [{
                     "id": "inv-1",
                     "code": "PETR4",
@@ -118,7 +186,7 @@ class TestFetchInvestments:
                     "amount": 3700.0,
                     "lastMonthRate": 150,
                 }]
-            })
+            }, True))
             from src.open_finance.investments import fetch_investments
             result = await fetch_investments()
 
@@ -134,7 +202,7 @@ class TestFetchInvestments:
              patch("src.open_finance.investments.settings") as mock_settings:
             mock_settings.pluggy_item_id = "test-item"
             mock_settings.investment_alert_threshold = 3.0
-            mock_client.get = AsyncMock(return_value={
+            mock_client.get_cached = AsyncMock(return_value=({
                 "results": [{
                     "id": "inv-2",
                     "code": "VALE3",
@@ -144,7 +212,7 @@ class TestFetchInvestments:
                     "amount": 4900.0,
                     "lastMonthRate": 3,
                 }]
-            })
+            }, True))
             from src.open_finance.investments import fetch_investments
             result = await fetch_investments()
 
@@ -158,9 +226,476 @@ class TestFetchInvestments:
              patch("src.open_finance.investments.settings") as mock_settings:
             mock_settings.pluggy_item_id = "test-item"
             mock_settings.investment_alert_threshold = 3.0
-            mock_client.get = AsyncMock(side_effect=Exception("api error"))
+            mock_client.get_cached = AsyncMock(side_effect=Exception("api error"))
             from src.open_finance.investments import fetch_investments
             result = await fetch_investments()
 
         assert result["error"] is True
         assert result["data"] is None
+
+
+class TestOpenFinanceClient:
+    @pytest.mark.asyncio
+    async def test_session_is_reused_across_requests(self):
+        import httpx
+        from src.open_finance.client import OpenFinanceClient
+
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            assert request.headers["X-API-KEY"] == "key-1"
+            return httpx.Response(200, json={"results": []})
+
+        of_client = OpenFinanceClient()
+        session = of_client._session()
+        of_client._http = httpx.AsyncClient(
+            base_url=session.base_url, transport=httpx.MockTransport(handler)
+        )
+        await session.aclose()
+
+        await of_client.get("/accounts")
+        first = of_client._session()
+        await of_client.get("/investments")
+
+        assert of_client._session() is first
+        assert calls == ["/auth", "/accounts", "/investments"]
+
+        await of_client.aclose()
+        assert first.is_closed
+        assert of_client._session() is not first
+        await of_client.aclose()
+
+
+class TestConditionalRequests:
+    @pytest.mark.asyncio
+    async def test_etag_revalidation_returns_cached_data_on_304(self):
+        import httpx
+
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            seen.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(200, json={"results": [1]}, headers={"ETag": '"v1"'})
+
+        of_client = _mock_client(handler)
+        first = await of_client.get_cached("/accounts", params={"itemId": "x"})
+        second = await of_client.get_cached("/accounts", params={"itemId": "x"})
+        await of_client.aclose()
+
+        assert first == ({"results": [1]}, True)
+        assert second == ({"results": [1]}, False)
+        assert seen == [None, '"v1"']
+
+    @pytest.mark.asyncio
+    async def test_identical_body_without_validators_is_unchanged(self):
+        import httpx
+
+        bodies = iter([{"results": [1]}, {"results": [1]}, {"results": [2]}])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            return httpx.Response(200, json=next(bodies))
+
+        of_client = _mock_client(handler)
+        changes = [(await of_client.get_cached("/investments"))[1] for _ in range(3)]
+        await of_client.aclose()
+
+        assert changes == [True, False, True]
+
+    def test_disk_cache_survives_restart(self, tmp_path):
+        from src.open_finance.http_cache import CachedResponse, ResponseCache
+
+        key = ResponseCache.key("/accounts", {"itemId": "x"})
+        ResponseCache(str(tmp_path)).put(key, CachedResponse('"v1"', None, "abc", {"results": []}))
+
+        entry = ResponseCache(str(tmp_path)).get(key)
+        assert entry == CachedResponse('"v1"', None, "abc", {"results": []})
+
+    @pytest.mark.asyncio
+    async def test_fetch_parses_a_payload_served_from_cache(self):
+        payload = {"results": [{"id": "acc-1", "name": "Conta", "balance": 12.5}]}
+        with patch("src.open_finance.accounts.client") as mock_client:
+            mock_client.get_cached = AsyncMock(return_value=(payload, False))
+            from src.open_finance.accounts import fetch_accounts
+            result = await fetch_accounts()
+
+        assert result["error"] is False
+        assert [(a["account_id"], a["balance_cents"]) for a in result["data"]] == [("acc-1", 1250)]
+
+
+class TestDataCoordinator:
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_are_single_flighted(self):
+        import asyncio
+        from src.open_finance.coordinator import DataCoordinator
+
+        async def slow_investments():
+            await asyncio.sleep(0.01)
+            return {"error": False, "data": [{"asset_id": "inv-1"}]}
+
+        fetch = AsyncMock(side_effect=slow_investments)
+        with patch("src.open_finance.coordinator.fetch_investments", fetch):
+            coordinator = DataCoordinator()
+            first, second = await asyncio.gather(coordinator.investments(), coordinator.investments())
+            third = await coordinator.investments()  # served from the TTL cache
+
+        assert fetch.await_count == 1
+        assert first is second is third
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        from src.open_finance.coordinator import DataCoordinator
+
+        fetch = AsyncMock(side_effect=[
+            {"error": True, "message": "boom", "data": None},
+            {"error": False, "data": []},
+        ])
+        with patch("src.open_finance.coordinator.fetch_investments", fetch):
+            coordinator = DataCoordinator()
+            assert (await coordinator.investments())["error"] is True
+            assert (await coordinator.investments())["error"] is False
+
+        assert fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_sync_reuses_known_account_ids(self):
+        from src.open_finance.coordinator import DataCoordinator
+
+        accounts = AsyncMock(return_value={"error": False, "data": [{"account_id": "acc-1"}]})
+        sync = AsyncMock(return_value={"error": False, "data": []})
+        with patch("src.open_finance.coordinator.fetch_accounts", accounts), \
+             patch("src.open_finance.coordinator.sync_transactions", sync):
+            coordinator = DataCoordinator()
+            await coordinator.accounts()
+            await coordinator.sync_transactions(days=1)
+            await coordinator.sync_transactions(days=7)
+
+        assert accounts.await_count == 1
+        assert [c.kwargs for c in sync.await_args_list] == [
+            {"days": 1, "account_ids": ["acc-1"]},
+            {"days": 7, "account_ids": ["acc-1"]},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_sync_of_named_accounts_skips_account_lookup(self):
+        from src.open_finance.coordinator import DataCoordinator
+
+        accounts = AsyncMock()
+        sync = AsyncMock(return_value={"error": False, "data": []})
+        with patch("src.open_finance.coordinator.fetch_accounts", accounts), \
+             patch("src.open_finance.coordinator.sync_transactions", sync):
+            await DataCoordinator().sync_transactions(days=1, account_ids=["acc-2"])
+
+        accounts.assert_not_awaited()
+        sync.assert_awaited_once_with(days=1, account_ids=["acc-2"])
+
+
+def _jwt(exp: float) -> str:
+    import base64
+    import json
+
+    def enc(obj) -> str:
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).decode().rstrip("=")
+
+    return f"{enc({'alg': 'HS256'})}.{enc({'exp': exp})}.signature"
+
+
+class TestTokenManager:
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_refresh(self):
+        import asyncio
+        from src.open_finance.auth import TokenManager
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return "key-1"
+
+        fetch_token = AsyncMock(side_effect=fetch)
+        manager = TokenManager(fetch_token)
+        tokens = await asyncio.gather(*(manager.get() for _ in range(5)))
+        await manager.aclose()
+
+        assert tokens == ["key-1"] * 5
+        assert fetch_token.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_expiry_read_from_jwt_and_refreshed_before_lapse(self):
+        import time
+        from src.open_finance.auth import TokenManager, token_expiry
+
+        soon = _jwt(time.time() + 60)  # inside the default 300s refresh margin
+        later = _jwt(time.time() + 7200)
+        assert abs(token_expiry(later) - (time.time() + 7200)) < 5
+        assert token_expiry("opaque-key") is None
+
+        fetch_token = AsyncMock(side_effect=[soon, later])
+        manager = TokenManager(fetch_token)
+        first = await manager.get()
+        second = await manager.get()
+        await manager.aclose()
+
+        assert (first, second) == (soon, later)
+
+    def test_short_lived_token_is_not_refreshed_back_to_back(self):
+        import time
+        from src.open_finance.auth import TokenManager
+
+        manager = TokenManager(AsyncMock())
+        manager._expires_at = time.time() + 7200
+        assert 6890 <= manager._refresh_delay() <= 6900  # the 300s margin before expiry
+        manager._expires_at = time.time() + 60  # inside the margin: half-way, capped at 30s
+        assert 25 <= manager._refresh_delay() <= 30
+        manager._expires_at = time.time() - 10  # expired on arrival
+        assert manager._refresh_delay() >= 1
+
+    @pytest.mark.asyncio
+    async def test_stale_refresh_is_skipped_when_already_replaced(self):
+        from src.open_finance.auth import TokenManager
+
+        fetch_token = AsyncMock(side_effect=["key-1", "key-2", "key-3"])
+        manager = TokenManager(fetch_token)
+        await manager.get()
+        assert await manager.refresh(stale="key-1") == "key-2"
+        # A second caller that also saw key-1 rejected gets key-2 without a new /auth
+        assert await manager.refresh(stale="key-1") == "key-2"
+        await manager.aclose()
+
+        assert fetch_token.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_client_retries_once_after_401(self):
+        import httpx
+        from src.open_finance.client import OpenFinanceClient
+
+        keys = iter(["key-1", "key-2"])
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": next(keys)})
+            if request.headers["X-API-KEY"] == "key-1":
+                return httpx.Response(401, json={"message": "expired"})
+            return httpx.Response(200, json={"results": ["ok"]})
+
+        of_client = OpenFinanceClient()
+        of_client._http = httpx.AsyncClient(base_url="https://api.test", transport=httpx.MockTransport(handler))
+        data = await of_client.get("/accounts")
+        await of_client.aclose()
+
+        assert data == {"results": ["ok"]}
+        assert calls == ["/auth", "/accounts", "/auth", "/accounts"]
+
+
+def _mock_client(handler):
+    import httpx
+    from src.open_finance.client import OpenFinanceClient
+
+    of_client = OpenFinanceClient()
+    of_client._http = httpx.AsyncClient(
+        base_url="https://api.test", transport=httpx.MockTransport(handler)
+    )
+    return of_client
+
+
+class TestResilience:
+    def test_retry_after_parsing(self):
+        from src.open_finance.resilience import parse_retry_after
+
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("not a date") is None
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # in the past
+
+    def test_backoff_is_jittered_and_capped(self):
+        from src.open_finance.resilience import RetryPolicy
+
+        policy = RetryPolicy(max_retries=5, base_delay=1, max_delay=4)
+        assert all(0 <= policy.delay(attempt) <= min(4, 2 ** attempt) for attempt in range(6))
+        assert policy.delay(0, retry_after=10) is None  # longer than the budget: don't retry early
+        assert policy.delay(0, retry_after=2) == 2
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_after_burst(self):
+        from src.utils.ratelimit import TokenBucket
+
+        bucket = TokenBucket(rate=10, capacity=2)
+        with patch("src.utils.ratelimit.asyncio.sleep", new_callable=AsyncMock) as sleep:
+            await bucket.acquire()
+            await bucket.acquire()
+            sleep.assert_not_awaited()
+            await bucket.acquire()
+        assert sleep.await_args.args[0] == pytest.approx(0.1, abs=0.01)
+
+    def test_circuit_opens_then_half_opens(self):
+        from src.open_finance.resilience import CircuitBreaker
+
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        with patch("src.open_finance.resilience.time.monotonic", return_value=100.0):
+            breaker.record_failure()
+            assert breaker.allow() == (True, False)
+            breaker.record_failure()
+            assert breaker.is_open and breaker.allow() == (False, False)
+        with patch("src.open_finance.resilience.time.monotonic", return_value=131.0):
+            assert breaker.allow() == (True, True)  # the single probe
+            assert breaker.allow() == (False, False)
+            breaker.record_success()
+            assert breaker.allow() == (True, False) and not breaker.is_open
+
+    @pytest.mark.asyncio
+    async def test_get_retries_on_503_honouring_retry_after(self):
+        import httpx
+
+        responses = iter([
+            httpx.Response(503, headers={"Retry-After": "3"}),
+            httpx.Response(200, json={"results": ["ok"]}),
+        ])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            return next(responses)
+
+        of_client = _mock_client(handler)
+        with patch("src.open_finance.client.asyncio.sleep", new_callable=AsyncMock) as sleep:
+            data = await of_client.get("/accounts")
+        await of_client.aclose()
+
+        assert data == {"results": ["ok"]}
+        sleep.assert_awaited_once_with(3.0)
+
+    @pytest.mark.asyncio
+    async def test_retry_after_beyond_the_budget_is_not_retried_early(self):
+        import httpx
+
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            calls.append(request.url.path)
+            return httpx.Response(429, headers={"Retry-After": "120"})
+
+        of_client = _mock_client(handler)
+        with patch("src.open_finance.client.asyncio.sleep", new_callable=AsyncMock) as sleep:
+            with pytest.raises(httpx.HTTPStatusError):
+                await of_client.get("/accounts")
+        await of_client.aclose()
+
+        assert calls == ["/accounts"]
+        sleep.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_only_the_probe_releases_the_half_open_slot(self):
+        import asyncio
+        import httpx
+
+        started = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            started.set()
+            await asyncio.Event().wait()  # never answers
+
+        of_client = _mock_client(handler)
+        breaker = of_client.breaker
+        slow = asyncio.create_task(of_client.get("/slow"))  # sent while the circuit was closed
+        await started.wait()
+        breaker.failure_threshold = 1
+        breaker.record_failure()
+        breaker._opened_at -= breaker.reset_timeout  # cool-down over: half-open
+        assert breaker.allow() == (True, True)  # a probe is now in flight
+        slow.cancel()  # ends without a verdict
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        await of_client.aclose()
+
+        assert breaker.allow() == (False, False)  # the slow request didn't free the probe slot
+
+    @pytest.mark.asyncio
+    async def test_persistent_failures_open_the_circuit(self):
+        import httpx
+        from src.open_finance.resilience import CircuitOpenError
+
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            calls.append(request.url.path)
+            return httpx.Response(500)
+
+        of_client = _mock_client(handler)
+        of_client.breaker.failure_threshold = 1
+        with patch("src.open_finance.client.asyncio.sleep", new_callable=AsyncMock):
+            with pytest.raises(httpx.HTTPStatusError):
+                await of_client.get("/accounts")
+            with pytest.raises(CircuitOpenError):
+                await of_client.get("/accounts")
+        await of_client.aclose()
+
+        assert len(calls) == of_client._retry.max_retries + 1
+        assert of_client.breaker.is_open
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        import httpx
+
+        calls = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            calls.append(request.url.path)
+            return httpx.Response(404)
+
+        of_client = _mock_client(handler)
+        with pytest.raises(httpx.HTTPStatusError):
+            await of_client.get("/accounts/missing")
+        await of_client.aclose()
+
+        assert calls == ["/accounts/missing"]
+        assert not of_client.breaker.is_open
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_resolved_by_client_error(self):
+        import httpx
+
+        responses = iter([httpx.Response(404), httpx.Response(200, json={"results": []})])
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/auth":
+                return httpx.Response(200, json={"apiKey": "key-1"})
+            return next(responses)
+
+        of_client = _mock_client(handler)
+        of_client.breaker.failure_threshold = 1
+        of_client.breaker.record_failure()
+        of_client.breaker._opened_at -= of_client.breaker.reset_timeout  # cool-down over: half-open
+        with pytest.raises(httpx.HTTPStatusError):
+            await of_client.get("/accounts/missing")  # the probe
+        data = await of_client.get("/accounts")
+        await of_client.aclose()
+
+        assert data == {"results": []}
+        assert not of_client.breaker.is_open
+
+    @pytest.mark.asyncio
+    async def test_half_open_probe_released_on_auth_error(self):
+        from src.open_finance.resilience import CircuitBreaker
+
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        breaker._opened_at -= 30
+        assert breaker.allow() == (True, True)
+        breaker.release()  # e.g. /auth failed before the probe reached the API
+        assert breaker.allow() == (True, True)
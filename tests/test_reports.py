@@ -15,15 +15,16 @@ class TestDailySummary:
         mock_account.institution = "Nubank"
         mock_account.type = "checking"
 
-        mock_tx = MagicMock()
-        mock_tx.amount_cents = -5000
-        mock_tx.category = "Food & Delivery"
-        mock_tx.timestamp = datetime.now(tz=timezone.utc)
+        totals = {"count": 1, "spent_cents": 5000, "received_cents": 0}
 
-        with patch("src.reports.daily.fetch_accounts", AsyncMock(return_value={"error": True, "data": None})), \
-             patch("src.reports.daily.fetch_transactions", AsyncMock(return_value={"error": True, "data": None})), \
+        mock_coordinator = MagicMock()
+        mock_coordinator.accounts = AsyncMock(return_value={"error": True, "data": None})
+        mock_coordinator.sync_transactions = AsyncMock(return_value={"error": True, "data": None})
+
+        with patch("src.reports.daily.coordinator", mock_coordinator), \
              patch("src.reports.daily.get_all_accounts", AsyncMock(return_value=[mock_account])), \
-             patch("src.reports.daily.get_transactions_since", AsyncMock(return_value=[mock_tx])), \
+             patch("src.reports.daily.get_transaction_totals", AsyncMock(return_value=totals)), \
+             patch("src.reports.daily.get_spending_by_category", AsyncMock(return_value={"Food & Delivery": 5000})), \
              patch("src.reports.daily.AsyncSessionLocal") as mock_session_cls:
             mock_session = AsyncMock()
             mock_session_cls.return_value.__aenter__ = AsyncMock(return_value=mock_session)
@@ -34,18 +35,47 @@ class TestDailySummary:
 
         assert "Resumo" in message
         assert "R$" in message or "2.500" in message
+        assert "Food & Delivery: R$ 50,00" in message
+
+
+    @pytest.mark.asyncio
+    async def test_balances_stored_even_when_transactions_fail(self):
+        mock_coordinator = MagicMock()
+        mock_coordinator.accounts = AsyncMock(return_value={"error": False, "data": [{}]})
+        mock_coordinator.sync_transactions = AsyncMock(return_value={"error": True, "data": None})
+        totals = {"count": 0, "spent_cents": 0, "received_cents": 0}
+
+        with patch("src.reports.daily.coordinator", mock_coordinator), \
+             patch("src.reports.daily.upsert_accounts_bulk", AsyncMock(return_value=[])) as mock_upsert, \
+             patch("src.reports.daily.get_all_accounts", AsyncMock(return_value=[])), \
+             patch("src.reports.daily.get_transaction_totals", AsyncMock(return_value=totals)), \
+             patch("src.reports.daily.get_spending_by_category", AsyncMock(return_value={})), \
+             patch("src.reports.daily.AsyncSessionLocal") as mock_session_cls:
+            mock_session_cls.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+            mock_session_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            from src.reports.daily import build_daily_summary
+            await build_daily_summary()
+
+        mock_upsert.assert_awaited_once()
 
 
 class TestMonthlyReport:
     @pytest.mark.asyncio
     async def test_returns_tuple_message_and_chart(self):
-        mock_tx = MagicMock()
-        mock_tx.amount_cents = -10000
-        mock_tx.category = "Supermarket"
-
-        with patch("src.reports.monthly.fetch_transactions", AsyncMock(return_value={"error": True, "data": None})), \
-             patch("src.reports.monthly.get_transactions_since", AsyncMock(return_value=[mock_tx])), \
-             patch("src.reports.monthly.build_spending_chart", AsyncMock(return_value="/tmp/finova_charts/test.png")), \
+        totals = {"count": 1, "spent_cents": 10000, "received_cents": 0}
+
+        mock_coordinator = MagicMock()
+        mock_coordinator.sync_transactions = AsyncMock(return_value={"error": True, "data": None})
+
+        with patch("src.reports.monthly.coordinator", mock_coordinator), \
+             patch("src.reports.monthly.get_rollup_totals", AsyncMock(return_value=totals)), \
+             patch("src.reports.monthly.get_rollup_by_category", AsyncMock(return_value={
+                 "Supermarket": {"spent_cents": 10000, "received_cents": 0},
+                 "Income": {"spent_cents": 0, "received_cents": 5000},
+             })), \
+             patch("src.reports.monthly.get_snapshot_points", AsyncMock(return_value=[])), \
+             patch("src.reports.monthly.build_spending_chart", AsyncMock(return_value=b"\x89PNG")), \
              patch("src.reports.monthly.AsyncSessionLocal") as mock_session_cls:
             mock_session = AsyncMock()
             mock_session_cls.return_value.__aenter__ = AsyncMock(return_value=mock_session)
@@ -56,6 +86,8 @@ class TestMonthlyReport:
 
         assert isinstance(message, str)
         assert "Relatório Mensal" in message
+        assert "Supermarket: R$ 100,00 (100.0%)" in message
+        assert chart == b"\x89PNG"
 
 
 class TestFormatter:
@@ -74,3 +106,73 @@ class TestFormatter:
     def test_fmt_pct_negative(self):
         from src.telegram.formatter import fmt_pct
         assert fmt_pct(-1.2) == "-1.20%"
+
+    def test_transaction_alert_escapes_merchant_markdown(self):
+        from datetime import datetime
+        from src.database.models import Transaction
+        from src.telegram.formatter import fmt_large_transaction_alert
+
+        tx = Transaction(
+            amount_cents=-25000, description="UBER *TRIP_SP", category="Transport",
+            timestamp=datetime(2024, 5, 1, 8, 30),
+        )
+        assert "UBER \\*TRIP\\_SP" in fmt_large_transaction_alert(tx)
+
+
+class TestChartRendering:
+    @pytest.mark.asyncio
+    async def test_renders_png_bytes_in_worker_process(self):
+        from src.reports.charts import build_spending_chart, shutdown_chart_pool
+
+        try:
+            png = await build_spending_chart({"Food": 12000, "Transport": 3000}, "Jan")
+        finally:
+            shutdown_chart_pool()
+
+        assert png.startswith(b"\x89PNG")
+
+    @pytest.mark.asyncio
+    async def test_identical_inputs_are_rendered_once(self):
+        from src.reports import charts
+
+        render = AsyncMock(side_effect=[b"png-1", b"png-2"])
+        with patch.object(charts, "_render", render), patch.dict(charts._cache, clear=True):
+            first = await charts.build_spending_chart({"Food": 100}, "Jan")
+            second = await charts.build_spending_chart({"Food": 100}, "Jan")
+            other = await charts.build_spending_chart({"Food": 200}, "Jan")
+
+        assert first == second == b"png-1"
+        assert other == b"png-2"
+        assert render.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout_recycles_pool(self):
+        import asyncio
+        import time
+        from src.reports import charts
+
+        with patch.object(charts, "settings", MagicMock(chart_render_timeout_seconds=0.2, chart_workers=1)):
+            pool = charts._get_pool()
+            with pytest.raises(asyncio.TimeoutError):
+                await charts._render(time.sleep, 2)
+
+        assert charts._pool is None or charts._pool is not pool
+        charts.shutdown_chart_pool()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_workers_are_terminated(self):
+        import asyncio
+        import multiprocessing
+        import time
+        from src.reports import charts
+
+        before = len(multiprocessing.active_children())
+        with patch.object(charts, "settings", MagicMock(chart_render_timeout_seconds=0.2, chart_workers=1)):
+            for _ in range(3):
+                with pytest.raises(asyncio.TimeoutError):
+                    await charts._render(time.sleep, 60)
+
+        deadline = time.monotonic() + 10
+        while len(multiprocessing.active_children()) > before and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        assert len(multiprocessing.active_children()) <= before
@@ -3,6 +3,7 @@ Tests for transaction and investment watchers, plus intent classifier.
 """
 
 import pytest
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 
@@ -24,63 +25,167 @@ class TestIntentClassifier:
         assert classify_intent("olá tudo bem?") == "ajuda"
 
 
+def _tx(tx_id: str, amount_cents: int, ts: datetime) -> dict:
+    return {
+        "transaction_id": tx_id,
+        "account_id": "acc-1",
+        "amount_cents": amount_cents,
+        "description": "Compra",
+        "merchant": None,
+        "category": "Other",
+        "timestamp": ts,
+        "already_notified": False,
+    }
+
+
+def _delivery(ok: bool = True):
+    import asyncio
+
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(ok)
+    return future
+
+
+async def _seed(session_factory, rows: list[dict] | None = None) -> list:
+    """Insert rows the way a sync does; returns the new Transaction objects."""
+    from src.database.crud import get_transactions_by_ids, insert_transactions_bulk
+
+    now = datetime.now(tz=timezone.utc)
+    rows = rows or [
+        _tx("tx-large", -50000, now),   # R$ 500 — above R$200 threshold
+        _tx("tx-small", -500, now),     # R$ 5 — below threshold
+        _tx("tx-late", -90000, (now - timedelta(days=1)).replace(hour=0, minute=0)),  # dated yesterday 00:00Z
+    ]
+    async with session_factory() as session:
+        new_ids = await insert_transactions_bulk(session, rows)
+        return await get_transactions_by_ids(session, new_ids)
+
+
 class TestTransactionWatcher:
+    async def _run_poll(self, session_factory, inserted: list | None = None):
+        from src.triggers.transaction_watcher import TransactionWatcher
+
+        mock_coordinator = MagicMock()
+        mock_coordinator.sync_transactions = AsyncMock(return_value={"error": False, "data": inserted or []})
+        with patch("src.triggers.transaction_watcher.coordinator", mock_coordinator), \
+        patch("src.triggers.transaction_watcher.outbox") as mock_outbox, \
+        patch("src.triggers.transaction_watcher.AsyncSessionLocal", session_factory):
+            await TransactionWatcher(MagicMock()).poll()
+        return mock_outbox
+
     @pytest.mark.asyncio
-    async def test_alert_sent_for_large_transaction(self):
-        mock_app = MagicMock()
-        mock_app.bot.send_message = AsyncMock()
+    async def test_new_large_transactions_queued_and_every_new_row_flagged(self, session_factory):
+        from sqlalchemy import select
+        from src.database.models import NotificationOutbox, Transaction
 
-        mock_tx = MagicMock()
-        mock_tx.amount_cents = -50000  # R$ 500 — above R$200 threshold
-        mock_tx.transaction_id = "tx-large"
+        inserted = await _seed(session_factory)
+        first = await self._run_poll(session_factory, inserted)
+        second = await self._run_poll(session_factory)  # nothing left to queue
 
-        with patch("src.triggers.transaction_watcher.fetch_transactions", AsyncMock(return_value={
-            "error": False,
-            "data": [{"transaction_id": "tx-large", "account_id": "acc-1",
-                       "amount_cents": -50000, "description": "test", "merchant": None,
-                       "category": "Other", "timestamp": __import__("datetime").datetime.now(),
-                       "already_notified": False}]
-        })), \
-        patch("src.triggers.transaction_watcher.insert_transaction", AsyncMock(return_value=mock_tx)), \
-        patch("src.triggers.transaction_watcher.mark_transaction_notified", AsyncMock()), \
-        patch("src.triggers.transaction_watcher.AsyncSessionLocal") as mock_session_cls:
-            mock_session = AsyncMock()
-            mock_session_cls.return_value.__aenter__ = AsyncMock(return_value=mock_session)
-            mock_session_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+        async with session_factory() as session:
+            queued = (await session.execute(select(NotificationOutbox))).scalars().all()
+            flagged = (await session.execute(
+                select(Transaction.transaction_id).where(Transaction.already_notified.is_(True))
+            )).scalars().all()
+
+        assert sorted((row.idempotency_key, row.coalesce) for row in queued) == [
+            ("tx-alert:tx-large", "transactions"),
+            ("tx-alert:tx-late", "transactions"),  # alerts follow ingestion, not its date
+        ]
+        assert sorted(flagged) == ["tx-large", "tx-late", "tx-small"]
+        first.wake.assert_called_once()
+        second.wake.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rows_left_by_a_crashed_poll_are_recovered(self, session_factory):
+        from sqlalchemy import select
+        from src.database.models import NotificationOutbox
+
+        now = datetime.now(tz=timezone.utc)
+        # Inserted by a poll that crashed before queueing; not new to this one
+        await _seed(session_factory, [_tx("tx-crash", -50000, now), _tx("tx-import", -90000, now - timedelta(days=30))])
+        await self._run_poll(session_factory)
+
+        async with session_factory() as session:
+            keys = (await session.execute(select(NotificationOutbox.idempotency_key))).scalars().all()
+        assert keys == ["tx-alert:tx-crash"]
+
+
+class TestOutboxWorker:
+    async def _queue(self, session_factory, count: int):
+        from src.database.crud import enqueue_notifications
 
-            from src.triggers.transaction_watcher import TransactionWatcher
-            watcher = TransactionWatcher(mock_app)
-            await watcher._poll()
+        async with session_factory() as session:
+            return await enqueue_notifications(session, [
+                {"idempotency_key": f"k{i}", "chat_id": 1, "text": f"msg {i}", "coalesce": "transactions"}
+                for i in range(count)
+            ])
 
-        mock_app.bot.send_message.assert_called_once()
+    async def _unsent(self, session_factory) -> list[str]:
+        from sqlalchemy import select
+        from src.database.models import NotificationOutbox
+
+        async with session_factory() as session:
+            result = await session.execute(
+                select(NotificationOutbox.text).where(NotificationOutbox.sent_at.is_(None)).order_by(NotificationOutbox.id)
+            )
+            return list(result.scalars().all())
 
     @pytest.mark.asyncio
-    async def test_no_alert_for_small_transaction(self):
-        mock_app = MagicMock()
-        mock_app.bot.send_message = AsyncMock()
+    async def test_drains_in_order_and_acks_delivered(self, session_factory):
+        assert await self._queue(session_factory, 3) == 3
+        assert await self._queue(session_factory, 3) == 0  # idempotency keys
 
-        mock_tx = MagicMock()
-        mock_tx.amount_cents = -500  # R$ 5 — below threshold
-        mock_tx.transaction_id = "tx-small"
+        outcomes = iter([True, False, True])
+        mock_dispatcher = MagicMock()
+        mock_dispatcher.enqueue = MagicMock(side_effect=lambda *a, **kw: _delivery(next(outcomes)))
+        with patch("src.telegram.outbox.dispatcher", mock_dispatcher), \
+             patch("src.telegram.outbox.AsyncSessionLocal", session_factory):
+            from src.telegram.outbox import OutboxWorker
+            worker = OutboxWorker()
+            assert await worker.drain_once() == 3
+            assert await worker.drain_once() == 0  # the failed one is still leased
 
-        with patch("src.triggers.transaction_watcher.fetch_transactions", AsyncMock(return_value={
-            "error": False,
-            "data": [{"transaction_id": "tx-small", "account_id": "acc-1",
-                       "amount_cents": -500, "description": "coffee", "merchant": None,
-                       "category": "Other", "timestamp": __import__("datetime").datetime.now(),
-                       "already_notified": False}]
-        })), \
-        patch("src.triggers.transaction_watcher.insert_transaction", AsyncMock(return_value=mock_tx)), \
-        patch("src.triggers.transaction_watcher.AsyncSessionLocal") as mock_session_cls:
-            mock_session = AsyncMock()
-            mock_session_cls.return_value.__aenter__ = AsyncMock(return_value=mock_session)
-            mock_session_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+        assert [c.args[1] for c in mock_dispatcher.enqueue.call_args_list] == ["msg 0", "msg 1", "msg 2"]
+        assert await self._unsent(session_factory) == ["msg 1"]
 
-            from src.triggers.transaction_watcher import TransactionWatcher
-            watcher = TransactionWatcher(mock_app)
-            await watcher._poll()
+    @pytest.mark.asyncio
+    async def test_expired_or_released_claims_are_retried(self, session_factory):
+        from datetime import datetime, timedelta, timezone
+        from src.database.crud import claim_notifications, release_notification_claims
 
-        mock_app.bot.send_message.assert_not_called()
+        await self._queue(session_factory, 2)
+        now = datetime.now(tz=timezone.utc)
+        async with session_factory() as session:
+            assert len(await claim_notifications(session, limit=1, lease_seconds=60, now=now)) == 1
+            assert [r.text for r in await claim_notifications(session, limit=5, lease_seconds=60, now=now)] == ["msg 1"]
+            assert await claim_notifications(session, limit=5, lease_seconds=60, now=now) == []
+            later = await claim_notifications(session, limit=5, lease_seconds=60, now=now + timedelta(seconds=61))
+            assert [r.text for r in later] == ["msg 0", "msg 1"]
+            assert await release_notification_claims(session) == 2
+            again = await claim_notifications(session, limit=5, lease_seconds=60, now=now)
+            assert [(r.text, r.attempts) for r in again] == [("msg 0", 3), ("msg 1", 3)]
+
+    @pytest.mark.asyncio
+    async def test_message_failing_every_attempt_is_given_up(self, session_factory):
+        from src.config import settings
+        from src.database.crud import release_notification_claims
+
+        await self._queue(session_factory, 1)
+        mock_dispatcher = MagicMock()
+        mock_dispatcher.enqueue = MagicMock(side_effect=lambda *a, **kw: _delivery(False))
+        with patch("src.telegram.outbox.dispatcher", mock_dispatcher), \
+             patch("src.telegram.outbox.AsyncSessionLocal", session_factory):
+            from src.telegram.outbox import OutboxWorker
+            worker = OutboxWorker()
+            for _ in range(settings.outbox_max_attempts):
+                assert await worker.drain_once() == 1
+                async with session_factory() as session:
+                    await release_notification_claims(session)
+            assert await worker.drain_once() == 0
+
+        assert mock_dispatcher.enqueue.call_count == settings.outbox_max_attempts
+        assert await self._unsent(session_factory) == ["msg 0"]  # kept for inspection, never sent
 
 
 class TestInvestmentWatcher:
@@ -97,11 +202,20 @@ class TestInvestmentWatcher:
         mock_inv.current_price_cents = 3850
         mock_inv.total_value_cents = 385000
 
-        with patch("src.triggers.investment_watcher.fetch_investments", AsyncMock(return_value={
+        mock_coordinator = MagicMock()
+        mock_coordinator.investments = AsyncMock(return_value={
             "error": False,
             "data": [{}]  # raw data doesn't matter; upsert is mocked
-        })), \
-        patch("src.triggers.investment_watcher.upsert_investment", AsyncMock(return_value=mock_inv)), \
+        })
+
+        with patch("src.triggers.investment_watcher.coordinator", mock_coordinator), \
+        patch("src.triggers.investment_watcher.upsert_investments_bulk", AsyncMock(return_value=[])), \
+        patch("src.triggers.investment_watcher.append_investment_snapshots", AsyncMock(return_value=1)), \
+        patch("src.triggers.investment_watcher.downsample_investment_snapshots", AsyncMock(return_value=0)), \
+        patch("src.triggers.investment_watcher.get_investments_with_alert", AsyncMock(return_value=[mock_inv])), \
+        patch("src.triggers.investment_watcher.clear_investment_alerts", AsyncMock()) as mock_clear, \
+        patch("src.triggers.investment_watcher.enqueue_notifications", AsyncMock(return_value=1)) as mock_enqueue, \
+        patch("src.triggers.investment_watcher.outbox") as mock_outbox, \
         patch("src.triggers.investment_watcher.AsyncSessionLocal") as mock_session_cls:
             mock_session = AsyncMock()
             mock_session_cls.return_value.__aenter__ = AsyncMock(return_value=mock_session)
@@ -109,6 +223,143 @@ class TestInvestmentWatcher:
 
             from src.triggers.investment_watcher import InvestmentWatcher
             watcher = InvestmentWatcher(mock_app)
-            await watcher._poll()
+            await watcher.poll()
+
+        alerts = mock_enqueue.await_args.args[1]
+        assert len(alerts) == 1 and alerts[0]["idempotency_key"].startswith("inv-alert:")
+        mock_clear.assert_awaited_once()
+        mock_outbox.wake.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_investments_skip_db_work_only_once_stored(self):
+        mock_coordinator = MagicMock()
+        mock_coordinator.investments = AsyncMock(return_value={
+            "error": False,
+            "data": [{"asset_id": "a1", "current_price_cents": 100, "last_updated": datetime.now()}],
+        })
+        upsert = AsyncMock(side_effect=[RuntimeError("database is locked"), [], []])
+
+        with patch("src.triggers.investment_watcher.coordinator", mock_coordinator), \
+        patch("src.triggers.investment_watcher.upsert_investments_bulk", upsert), \
+        patch("src.triggers.investment_watcher.append_investment_snapshots", AsyncMock(return_value=1)), \
+        patch("src.triggers.investment_watcher.downsample_investment_snapshots", AsyncMock(return_value=0)), \
+        patch("src.triggers.investment_watcher.get_investments_with_alert", AsyncMock(return_value=[])), \
+        patch("src.triggers.investment_watcher.AsyncSessionLocal") as mock_session_cls:
+            mock_session_cls.return_value.__aenter__ = AsyncMock(return_value=AsyncMock())
+            mock_session_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+
+            from src.triggers.investment_watcher import InvestmentWatcher
+            watcher = InvestmentWatcher(MagicMock())
+            with pytest.raises(RuntimeError):
+                await watcher.poll()          # write fails
+            stored = await watcher.poll()     # same payload is written again
+            skipped = await watcher.poll()    # now it is stored: nothing to do
+
+        assert (stored, skipped) == (True, False)
+        assert upsert.await_count == 2
+
+
+class _FakeClock:
+    """Monotonic clock and wall time that only move when the scheduler sleeps or a poll runs."""
+
+    def __init__(self, start: datetime) -> None:
+        self.t = 0.0
+        self.start = start
+        self.sleeps: list[float] = []
+
+    def monotonic(self) -> float:
+        return self.t
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.t)
+
+    async def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.t += delay
+
+
+class TestPollScheduler:
+    def test_window_wraps_past_midnight(self):
+        from datetime import time
+        from src.triggers.scheduler import in_window, parse_window
+
+        quiet = parse_window("22:00-07:00")
+        assert in_window(time(23, 30), quiet)
+        assert in_window(time(6, 59), quiet)
+        assert not in_window(time(7, 0), quiet)
+        assert in_window(time(12, 0), parse_window("10:00-18:00"))
+
+    def test_market_closed_on_weekend_reopens_monday(self):
+        from src.triggers.scheduler import is_market_open, next_market_open
+
+        saturday = datetime(2024, 6, 8, 12, 0)
+        assert not is_market_open(saturday)
+        assert is_market_open(datetime(2024, 6, 10, 12, 0))
+        assert next_market_open(saturday) == datetime(2024, 6, 10, 10, 0)
+        # After Friday's close, the next opening is Monday too
+        assert next_market_open(datetime(2024, 6, 7, 18, 30)) == datetime(2024, 6, 10, 10, 0)
+
+    def test_interval_adapts_to_activity(self):
+        from src.triggers.scheduler import PollJob
+
+        job = PollJob("t", AsyncMock(), base_interval=100, min_interval=10, max_interval=200)
+        job.adapt(changed=False, quiet=False)
+        assert job.interval == 150
+        job.adapt(changed=False, quiet=False)
+        assert job.interval == 200  # capped
+        job.adapt(changed=True, quiet=False)
+        assert job.interval == 10
+        job.adapt(changed=True, quiet=True)
+        assert job.interval == 200  # quiet hours win
+
+    async def _run(self, job, clock: _FakeClock, polls: int, poll_seconds: float = 0) -> list[float]:
+        """Run `job` until it has polled `polls` times; returns the clock time of each poll."""
+        import asyncio
+        from src.triggers.scheduler import PollScheduler
+
+        times: list[float] = []
+
+        async def poll():
+            times.append(clock.t)
+            clock.t += poll_seconds
+            if len(times) == polls:
+                raise asyncio.CancelledError
+            return False
+
+        job.poll = poll
+        scheduler = PollScheduler(clock=clock.monotonic, now=clock.now)
+        with patch("src.triggers.scheduler.asyncio.sleep", clock.sleep), \
+        patch("src.triggers.scheduler.random.uniform", return_value=0):
+            with pytest.raises(asyncio.CancelledError):
+                await scheduler._run_job(job, offset=0)
+        return times
+
+    @pytest.mark.asyncio
+    async def test_fixed_rate_does_not_drift_with_poll_time(self):
+        from src.triggers.scheduler import PollJob
+
+        job = PollJob("t", AsyncMock(), base_interval=60, min_interval=60, max_interval=60)
+        clock = _FakeClock(datetime(2024, 6, 10, 12, 0))
+        assert await self._run(job, clock, polls=4, poll_seconds=15) == [0, 60, 120, 180]
+
+    @pytest.mark.asyncio
+    async def test_overrunning_poll_skips_missed_ticks(self):
+        from src.triggers.scheduler import PollJob
+
+        job = PollJob("t", AsyncMock(), base_interval=60, min_interval=60, max_interval=60)
+        clock = _FakeClock(datetime(2024, 6, 10, 12, 0))
+        assert await self._run(job, clock, polls=3, poll_seconds=150) == [0, 150, 300]
+
+    @pytest.mark.asyncio
+    async def test_inactive_job_pauses_until_next_window(self):
+        from src.triggers.scheduler import PollJob, is_market_open, next_market_open
+
+        job = PollJob(
+            "investments", AsyncMock(), base_interval=60, min_interval=60, max_interval=60,
+            active=is_market_open, next_active=next_market_open,
+        )
+        clock = _FakeClock(datetime(2024, 6, 8, 12, 0))  # Saturday
+        times = await self._run(job, clock, polls=1)
 
-        mock_app.bot.send_message.assert_called_once()
+        assert clock.now() == datetime(2024, 6, 10, 10, 0)  # first poll at Monday's opening
+        assert len(times) == 1
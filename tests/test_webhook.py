@@ -0,0 +1,180 @@
+"""
+Tests for the Pluggy webhook endpoint.
+A real server is started on an ephemeral local port and fed by an httpx
+client acting as the webhook sender; ingestion is a recording mock.
+"""
+
+import asyncio
+
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+SECRET = "s3cret"
+PATH = "/webhooks/pluggy"
+
+
+@asynccontextmanager
+async def _running_server(ingest):
+    import httpx
+    from src.triggers.webhook import WebhookServer
+
+    server = WebhookServer(ingest, secret=SECRET, host="127.0.0.1", port=0, path=PATH)
+    await server.start()
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{server.port}") as sender:
+            yield server, sender
+    finally:
+        await server.stop()
+
+
+def _event(event: str, event_id: str, **fields) -> dict:
+    return {"event": event, "eventId": event_id, "itemId": "test-item-id", **fields}
+
+
+async def _settle() -> None:
+    # Let the ingest task pick up what the handler queued
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestEventAccounts:
+    def test_transaction_event_names_its_account(self):
+        from src.triggers.webhook import event_accounts
+        assert event_accounts(_event("transactions/created", "e1", accountId="acc-1")) == {"acc-1"}
+
+    def test_item_update_syncs_every_account(self):
+        from src.triggers.webhook import ALL_ACCOUNTS, event_accounts
+        assert event_accounts(_event("item/updated", "e1")) == {ALL_ACCOUNTS}
+
+    def test_other_items_and_events_are_ignored(self):
+        from src.triggers.webhook import event_accounts
+        assert event_accounts({"event": "item/updated", "itemId": "someone-else"}) == set()
+        assert event_accounts(_event("item/error", "e1")) == set()
+
+    def test_server_requires_a_secret(self):
+        from src.triggers.webhook import WebhookServer
+
+        with pytest.raises(RuntimeError):
+            WebhookServer(AsyncMock(), secret="")
+
+
+class TestWebhookServer:
+    @pytest.mark.asyncio
+    async def test_verified_event_is_ingested(self):
+        ingest = AsyncMock()
+        async with _running_server(ingest) as (_, sender):
+            response = await sender.post(
+                PATH,
+                json=_event("transactions/created", "e1", accountId="acc-1"),
+                headers={"X-Webhook-Secret": SECRET},
+            )
+            await _settle()
+
+        assert response.status_code == 202
+        ingest.assert_awaited_once_with(["acc-1"])
+
+    @pytest.mark.asyncio
+    async def test_wrong_secret_is_rejected_without_ingest(self):
+        ingest = AsyncMock()
+        async with _running_server(ingest) as (_, sender):
+            missing = await sender.post(PATH, json=_event("item/updated", "e1"))
+            wrong = await sender.post(PATH, json=_event("item/updated", "e2"), headers={"X-Webhook-Secret": "nope"})
+            await _settle()
+
+        assert (missing.status_code, wrong.status_code) == (401, 401)
+        ingest.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_bad_requests(self):
+        headers = {"X-Webhook-Secret": SECRET}
+        async with _running_server(AsyncMock()) as (_, sender):
+            assert (await sender.post("/elsewhere", json={}, headers=headers)).status_code == 404
+            assert (await sender.get(PATH, headers=headers)).status_code == 405
+            assert (await sender.post(PATH, content=b"{not json", headers=headers)).status_code == 400
+            too_big = b"x" * (64 * 1024 + 1)
+            assert (await sender.post(PATH, content=too_big, headers=headers)).status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_burst_is_merged_and_redeliveries_dropped(self):
+        calls: list = []
+        release = asyncio.Event()
+
+        async def ingest(account_ids):
+            calls.append(account_ids)
+            await release.wait()  # hold the first ingest while the burst arrives
+
+        headers = {"X-Webhook-Secret": SECRET}
+        async with _running_server(ingest) as (_, sender):
+            await sender.post(PATH, json=_event("transactions/created", "e1", accountId="acc-1"), headers=headers)
+            await _settle()
+            for event_id, account in [("e2", "acc-2"), ("e3", "acc-3"), ("e2", "acc-2"), ("e4", "acc-2")]:
+                await sender.post(
+                    PATH, json=_event("transactions/created", event_id, accountId=account), headers=headers,
+                )
+            release.set()
+            await _settle()
+
+        assert calls == [["acc-1"], ["acc-2", "acc-3"]]
+
+    @pytest.mark.asyncio
+    async def test_failed_ingest_is_retried_before_the_event_counts_as_seen(self):
+        from src.open_finance.resilience import CircuitOpenError
+
+        ingest = AsyncMock(side_effect=[CircuitOpenError("open"), None])
+        headers = {"X-Webhook-Secret": SECRET}
+        with patch("src.triggers.webhook._RETRY_BASE_SECONDS", 0):
+            async with _running_server(ingest) as (_, sender):
+                event = _event("transactions/created", "e1", accountId="acc-1")
+                await sender.post(PATH, json=event, headers=headers)
+                await _settle()
+                await sender.post(PATH, json=event, headers=headers)  # redelivery after success
+                await _settle()
+
+        assert [call.args for call in ingest.await_args_list] == [(["acc-1"],), (["acc-1"],)]
+
+    @pytest.mark.asyncio
+    async def test_item_update_ingests_all_accounts(self):
+        ingest = AsyncMock()
+        async with _running_server(ingest) as (_, sender):
+            headers = {"X-Webhook-Secret": SECRET}
+            await sender.post(PATH, json=_event("transactions/created", "e1", accountId="acc-1"), headers=headers)
+            await sender.post(PATH, json=_event("item/updated", "e2"), headers=headers)
+            await _settle()
+
+        assert [call.args for call in ingest.await_args_list][-1] == (None,)
+
+
+class TestWebhookIngestion:
+    @pytest.mark.asyncio
+    async def test_watcher_syncs_only_the_named_accounts(self):
+        from src.triggers.transaction_watcher import TransactionWatcher
+
+        mock_coordinator = MagicMock()
+        mock_coordinator.sync_transactions = AsyncMock(return_value={"error": True, "message": "x", "data": None})
+        mock_session = AsyncMock()
+        with patch("src.triggers.transaction_watcher.coordinator", mock_coordinator), \
+        patch("src.triggers.transaction_watcher.get_unnotified_transactions", AsyncMock(return_value=[])), \
+        patch("src.triggers.transaction_watcher.AsyncSessionLocal") as mock_session_cls:
+            mock_session_cls.return_value.__aenter__ = AsyncMock(return_value=mock_session)
+            mock_session_cls.return_value.__aexit__ = AsyncMock(return_value=False)
+            changed = await TransactionWatcher(MagicMock()).poll(["acc-1"])
+
+        assert changed is False
+        mock_coordinator.sync_transactions.assert_awaited_once_with(days=1, account_ids=["acc-1"])
+
+    @pytest.mark.asyncio
+    async def test_ingest_raises_while_the_circuit_is_open(self):
+        from src.open_finance.resilience import CircuitOpenError
+        from src.triggers.transaction_watcher import TransactionWatcher
+
+        mock_client = MagicMock()
+        mock_client.breaker.is_open = True
+        mock_coordinator = MagicMock()
+        mock_coordinator.sync_transactions = AsyncMock()
+        with patch("src.triggers.transaction_watcher.client", mock_client), \
+        patch("src.triggers.transaction_watcher.coordinator", mock_coordinator):
+            with pytest.raises(CircuitOpenError):
+                await TransactionWatcher(MagicMock()).ingest(["acc-1"])
+
+        mock_coordinator.sync_transactions.assert_not_awaited()